@@ -26,7 +26,9 @@ from app.library.youtube import (
     fetchVideoComments,
     rejectComments,
 )
+from app.library.quota import BACKGROUND
 from app.library.video_analysis import VideoAnalysis
+from app.library.artifacts import artifact_store
 from app.exceptions import *
 
 # ---------- CONSTANTS ----------
@@ -265,28 +267,25 @@ async def exchange_code(code: str):
     return response
 
 
-def refresh_analysis_from_youtube(credentials, video_id: str):
+def refresh_analysis_from_youtube(credentials, video_id: str, analysis_obj: VideoAnalysis = None):
     """
-    Create a fresh VideoAnalysis object by fetching current comments from YouTube,
-    classifying them, and generating visual artifacts. Returns the new analysis_obj.
+    Refresh a VideoAnalysis object by fetching current comments from YouTube,
+    classifying the ones not seen before, and generating visual artifacts.
+    Previous predictions of analysis_obj are reused. Returns the refreshed analysis_obj.
     """
-    analysis_obj = VideoAnalysis()
+    if analysis_obj is None:
+        analysis_obj = VideoAnalysis()
+    analysis_obj.refreshComments()
     try:
-        # fetch and consume comments
+        # fetch comments, classifying each page while the next one downloads
         comment_itr = fetchVideoComments(credentials, video_id)
-
-        async def consume_comments():
-            async for comment_dict in comment_itr:
-                analysis_obj.appendComments(comment_dict)
-
-        asyncio.run(consume_comments())
+        asyncio.run(analysis_obj.streamComments(comment_itr))
 
         # If no comments, return the empty analysis object (caller will handle)
         if analysis_obj.comments_df.empty:
             return analysis_obj
 
-        # Classify and recreate visuals
-        analysis_obj.classifyComments()
+        # Recreate visuals
         analysis_obj.createWordCloud(video_id)
         analysis_obj.createClassificationGraph(video_id)
 
@@ -459,11 +458,12 @@ def render_home():
     # ---------- VIDEO ANALYSIS GRID ----------
     st.markdown("### Video Analysis")
 
-    # fetch videos once per session (or after REFRESH)
+    # fetch videos once per session (or after REFRESH), listing every upload is a bulk walk and is
+    # shed before the quota interactive calls (analyses, deletions) need
     if "video_data" not in st.session_state:
         with st.spinner("Fetching videos..."):
             try:
-                video_data = asyncio.run(fetchVideoData(creds))
+                video_data = asyncio.run(fetchVideoData(creds, channel_data.get("uploads_playlist_id"), BACKGROUND))
                 st.session_state.video_data = video_data
             except Exception as e:
                 st.error(f"Error fetching videos: {e}")
@@ -510,20 +510,14 @@ def analyze_video(credentials, video_id: str):
     with st.spinner("Analyzing comments... this may take a moment."):
         analysis_obj = VideoAnalysis()
         try:
+            # fetch comments, classifying each page while the next one downloads
             comment_itr = fetchVideoComments(credentials, video_id)
-
-            async def consume_comments():
-                async for comment_dict in comment_itr:
-                    analysis_obj.appendComments(comment_dict)
-
-            asyncio.run(consume_comments())
+            asyncio.run(analysis_obj.streamComments(comment_itr))
 
             if analysis_obj.comments_df.empty:
                 st.warning("No comments found for this video.")
                 return
 
-            # Classify
-            analysis_obj.classifyComments()
             
             # Save results to session state
             st.session_state["analysis_video_id"] = video_id
@@ -554,31 +548,27 @@ def render_analysis_results(credentials, video_id):
         ["Word Cloud", "Classification", "Toxic Comments", "All Comments"]
     )
 
-    # FIX: Use robust absolute path
-    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-    img_dir = os.path.join(project_root, "app", "static", "images")
-    
     with tab1:
-        img_path = os.path.join(img_dir, f"word_cloud_{video_id}.png")
-        if os.path.exists(img_path):
-            # Read as bytes to prevent browser caching of static file
-            with open(img_path, "rb") as f:
-                img_bytes = f.read()
-            st.image(img_bytes, caption="Word cloud of comments")
+        # generated charts are kept in the in-memory artifact store
+        artifact = artifact_store.get(video_id, "word_cloud")
+        if artifact is not None:
+            # svg word clouds are passed as markup
+            if artifact.media_type == "image/svg+xml":
+                st.image(artifact.content.decode(), caption="Word cloud of comments")
+            else:
+                st.image(artifact.content, caption="Word cloud of comments")
         else:
-            st.warning(f"Image not found at: {img_path}")
+            st.warning("Word cloud not available.")
 
     with tab2:
         # Use dynamic chart instead of static image
         predictions = analysis_obj.predictions
         if not predictions.empty:
-            # Calculate counts for each class (columns 1 onwards)
-            class_cols = predictions.columns[1:]
-            counts_data = []
-            for col in class_cols:
-                # Count how many rows have 1 for this class
-                count = predictions[predictions[col] == 1].shape[0]
-                counts_data.append({"Class": col, "Count": count})
+            # Count of comments in each class
+            counts_data = [
+                {"Class": label, "Count": count}
+                for label, count in predictions.class_counts().items()
+            ]
             
             import pandas as pd
             chart_df = pd.DataFrame(counts_data).set_index("Class")
@@ -637,7 +627,7 @@ def render_analysis_results(credentials, video_id):
                     asyncio.run(rejectComments(credentials, selected_ids))
 
                     # 2) Immediately re-fetch fresh comments from YouTube & re-classify
-                    new_analysis = refresh_analysis_from_youtube(credentials, video_id)
+                    new_analysis = refresh_analysis_from_youtube(credentials, video_id, analysis_obj)
 
                     # 3) Use the fresh analysis in session state (and update timestamp)
                     st.session_state["analysis_obj"] = new_analysis
@@ -668,7 +658,7 @@ def render_analysis_results(credentials, video_id):
                     asyncio.run(rejectComments(credentials, toxic_ids))
 
                     # 2) Immediately refresh from youtube and re-classify
-                    new_analysis = refresh_analysis_from_youtube(credentials, video_id)
+                    new_analysis = refresh_analysis_from_youtube(credentials, video_id, analysis_obj)
 
                     # 3) Update session state + timestamp
                     st.session_state["analysis_obj"] = new_analysis
@@ -1,6 +1,100 @@
 """Contains configurations helpful throught the project"""
 
+import os
+
 from fastapi.templating import Jinja2Templates
 
 # object for directory containing html templates for views returning template responses
-templates = Jinja2Templates(directory="app/templates")
\ No newline at end of file
+templates = Jinja2Templates(directory="app/templates")
+
+# torch thread pool sizes for model inference (0 keeps torch defaults)
+INTRA_OP_THREADS = int(os.getenv("TORCH_INTRA_OP_THREADS", 0))
+INTER_OP_THREADS = int(os.getenv("TORCH_INTER_OP_THREADS", 0))
+
+# precision of model weights/activations for inference: fp32, int8 or bf16
+MODEL_PRECISION = os.getenv("MODEL_PRECISION", "fp32")
+
+# runtime executing the model: torch or onnx (export with `python -m app.machine_learning.onnx_backend`)
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "torch")
+
+# prediction cache: in-process LRU entries and on-disk SQLite tier (empty path disables the disk tier)
+PREDICTION_CACHE_PATH = os.getenv("PREDICTION_CACHE_PATH", os.path.join(".cache", "predictions.sqlite3"))
+PREDICTION_CACHE_ITEMS = int(os.getenv("PREDICTION_CACHE_ITEMS", 100_000))
+PREDICTION_CACHE_MB = int(os.getenv("PREDICTION_CACHE_MB", 256))
+
+# micro-batching of concurrent requests: comments per round, wait for more requests, comments per forward pass
+BATCH_MAX_COMMENTS = int(os.getenv("BATCH_MAX_COMMENTS", 256))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", 10))
+BATCH_FORWARD_SIZE = int(os.getenv("BATCH_FORWARD_SIZE", 32))
+
+# inference worker processes started through a forkserver, mapping the same weights file (0 runs inference in the web process)
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", 0))
+
+# output classes of the fine-tuned model, in logit order
+LABELS = ['Toxic', 'Severe Toxic', 'Obscene', 'Threat', 'Insult', 'Identity Hate']
+
+# per class probability thresholds, one per label
+CLASS_THRESHOLDS = [float(threshold) for threshold in os.getenv("CLASS_THRESHOLDS", "0.5,0.5,0.5,0.5,0.5,0.5").split(",")]
+if len(CLASS_THRESHOLDS) != len(LABELS) or not all(0 <= threshold <= 1 for threshold in CLASS_THRESHOLDS):
+    raise ValueError(
+        f"CLASS_THRESHOLDS needs {len(LABELS)} comma separated probabilities between 0 and 1 "
+        f"({', '.join(LABELS)}), got {os.getenv('CLASS_THRESHOLDS')!r}."
+    )
+
+# seconds a request waits for the model while it is loaded in the background at startup
+MODEL_LOAD_TIMEOUT = float(os.getenv("MODEL_LOAD_TIMEOUT", 300))
+
+# cascade in front of the model: rule fast paths and the first stage settle comments whose first stage
+# probabilities all fall outside the LOW,HIGH confidence band (train with `python -m app.machine_learning.cascade`).
+# Off by default, only enable it once a first stage has been trained and checked against the model
+CASCADE_ENABLED = os.getenv("CASCADE_ENABLED", "0") == "1"
+CASCADE_BAND = [float(bound) for bound in os.getenv("CASCADE_BAND", "0.05,0.95").split(",")]
+if len(CASCADE_BAND) != 2 or not 0 <= CASCADE_BAND[0] < CASCADE_BAND[1] <= 1:
+    raise ValueError(
+        f"CASCADE_BAND needs two comma separated probabilities LOW,HIGH with 0 <= LOW < HIGH <= 1, "
+        f"got {os.getenv('CASCADE_BAND')!r}."
+    )
+
+# minimum similarity (Jaccard of character shingles) for comments to be grouped as near-duplicates
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.8))
+
+# word cloud rendering: size in pixels, png or svg, font, no. of words and no. of renders kept in memory
+WORD_CLOUD_WIDTH = int(os.getenv("WORD_CLOUD_WIDTH", 2500))
+WORD_CLOUD_HEIGHT = int(os.getenv("WORD_CLOUD_HEIGHT", 1800))
+WORD_CLOUD_FORMAT = os.getenv("WORD_CLOUD_FORMAT", "png")
+WORD_CLOUD_FONT = os.getenv("WORD_CLOUD_FONT", "arial")
+WORD_CLOUD_MAX_WORDS = int(os.getenv("WORD_CLOUD_MAX_WORDS", 200))
+WORD_CLOUD_CACHE_ITEMS = int(os.getenv("WORD_CLOUD_CACHE_ITEMS", 64))
+
+# generated charts kept in memory (MB) and a directory they are written through to (empty keeps them in memory only,
+# evicted ones are dropped). Web workers serve each other's charts from it, it is required for more than one worker
+ARTIFACT_CACHE_MB = int(os.getenv("ARTIFACT_CACHE_MB", 64))
+ARTIFACT_SPILL_PATH = os.getenv("ARTIFACT_SPILL_PATH", "")
+
+# no. of web worker processes, read by uvicorn as the default of --workers
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 1))
+if WEB_CONCURRENCY > 1 and not ARTIFACT_SPILL_PATH:
+    raise ValueError("Running more than one web worker needs ARTIFACT_SPILL_PATH, a directory shared by the workers.")
+
+# shared http client for youtube api calls: pooled connections, idle keep-alive and request timeout (seconds)
+YOUTUBE_MAX_CONNECTIONS = int(os.getenv("YOUTUBE_MAX_CONNECTIONS", 20))
+YOUTUBE_KEEPALIVE_SECONDS = float(os.getenv("YOUTUBE_KEEPALIVE_SECONDS", 60))
+YOUTUBE_TIMEOUT_SECONDS = float(os.getenv("YOUTUBE_TIMEOUT_SECONDS", 30))
+
+# youtube api responses kept with their etags for conditional (If-None-Match) requests: size bound (MB) and
+# seconds an entry is kept without being revalidated
+YOUTUBE_CACHE_MB = int(os.getenv("YOUTUBE_CACHE_MB", 32))
+YOUTUBE_CACHE_TTL_SECONDS = float(os.getenv("YOUTUBE_CACHE_TTL_SECONDS", 24 * 60 * 60))
+
+# youtube api quota: daily budget (units) of the project, share of it held back for interactive requests, and request
+# rate of each web worker (token bucket refill per second and burst size). Every worker spends its own even share of the budget
+YOUTUBE_DAILY_QUOTA = int(os.getenv("YOUTUBE_DAILY_QUOTA", 10000))
+YOUTUBE_QUOTA_RESERVE = float(os.getenv("YOUTUBE_QUOTA_RESERVE", 0.2))
+YOUTUBE_REQUESTS_PER_SECOND = float(os.getenv("YOUTUBE_REQUESTS_PER_SECOND", 10))
+YOUTUBE_REQUEST_BURST = int(os.getenv("YOUTUBE_REQUEST_BURST", 20))
+if YOUTUBE_DAILY_QUOTA < 0 or not 0 <= YOUTUBE_QUOTA_RESERVE <= 1 or YOUTUBE_REQUESTS_PER_SECOND <= 0 or YOUTUBE_REQUEST_BURST < 1:
+    raise ValueError(
+        "YouTube quota settings need YOUTUBE_DAILY_QUOTA >= 0, YOUTUBE_QUOTA_RESERVE between 0 and 1, "
+        f"YOUTUBE_REQUESTS_PER_SECOND > 0 and YOUTUBE_REQUEST_BURST >= 1, got {YOUTUBE_DAILY_QUOTA}, "
+        f"{YOUTUBE_QUOTA_RESERVE}, {YOUTUBE_REQUESTS_PER_SECOND} and {YOUTUBE_REQUEST_BURST}."
+    )
@@ -23,4 +23,19 @@ class EntityNotFoundError(Exception):
 
 class AccessTokenExpiredError(Exception):
     """Raised when authorization access token is expired."""
-    pass
\ No newline at end of file
+    pass
+
+class YouTubeApiError(Exception):
+    """Raised when youtube api responds with an error status other than the ones handled by the errors above."""
+    
+    def __init__(self, status_code: int, message: str) -> None:
+        """Constructor for the Error.
+
+        Args:
+            status_code (int): HTTP status code of the response.
+            message (str): Error message.
+        """
+        
+        self.status_code = status_code
+        self.message = message
+        super().__init__(self.message)
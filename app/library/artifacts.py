@@ -0,0 +1,203 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+from app.config import ARTIFACT_CACHE_MB, ARTIFACT_SPILL_PATH
+
+# generated file (chart image) with its media type and content hash
+Artifact = namedtuple("Artifact", ["content", "media_type", "etag"])
+
+
+class ArtifactStore:
+    """In-memory LRU of generated artifacts (word clouds, graphs) keyed by video, artifact name and content hash.
+
+    Artifacts are addressed by their content hash, so that a page always loads the version it was rendered with.
+    When a spill directory is set every artifact is also written to it and read back from it on a miss, a directory
+    shared by web workers lets any of them serve artifacts generated by another one.
+    """
+
+    def __init__(self, max_bytes: int, spill_dir: str = None) -> None:
+        """Constructor for the class.
+
+        Args:
+            max_bytes (int): Maximum total size of artifacts kept in memory.
+            spill_dir (str, optional): Directory artifacts are written through to, None keeps them in memory only
+                (and drops evicted ones). Defaults to None.
+        """
+
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.lock = threading.Lock()
+
+        # (video id, name, etag) -> Artifact in LRU order, (video id, name) -> etag of latest version
+        self.artifacts = OrderedDict()
+        self.latest = {}
+        self.size = 0
+
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok = True)
+
+
+    def _spillPath(self, video_id: str, name: str, etag: str) -> str:
+        return os.path.join(self.spill_dir, f"{video_id}-{name}-{etag}")
+
+
+    def _writeSpill(self, key: tuple, artifact: Artifact) -> None:
+        """Writes an artifact to the spill directory, through a temporary file so other workers never read it half written."""
+
+        path = self._spillPath(*key)
+        if os.path.exists(path):
+            return
+
+        with open(f"{path}.{os.getpid()}.tmp", "wb") as spill_file:
+            spill_file.write(artifact.media_type.encode() + b"\n" + artifact.content)
+
+        os.replace(f"{path}.{os.getpid()}.tmp", path)
+
+
+    def put(self, video_id: str, name: str, content: bytes, media_type: str) -> Artifact:
+        """Stores the latest version of an artifact, older versions are dropped.
+
+        Args:
+            video_id (str): Video id of a particular yt video.
+            name (str): Artifact name, e.g. word_cloud.
+            content (bytes): File content.
+            media_type (str): MIME type of content.
+
+        Returns:
+            Artifact: Stored artifact, its etag is the content hash.
+        """
+
+        artifact = Artifact(content, media_type, hashlib.sha1(content).hexdigest()[:20])
+
+        with self.lock:
+            previous = self.latest.get((video_id, name))
+            if previous is not None and previous != artifact.etag:
+                self._drop(video_id, name, previous)
+
+            if (video_id, name, artifact.etag) not in self.artifacts:
+                self.artifacts[(video_id, name, artifact.etag)] = artifact
+                self.size += len(content)
+
+                if self.spill_dir:
+                    self._writeSpill((video_id, name, artifact.etag), artifact)
+
+                    # older versions, possibly written by other workers
+                    self._removeSpills(
+                        lambda spill_video_id, spill_name, spill_etag:
+                            (spill_video_id, spill_name) == (video_id, name) and spill_etag != artifact.etag
+                    )
+
+            self.artifacts.move_to_end((video_id, name, artifact.etag))
+            self.latest[(video_id, name)] = artifact.etag
+            self._evict()
+
+        return artifact
+
+
+    def get(self, video_id: str, name: str, etag: str = None) -> Artifact:
+        """Returns a version of an artifact, reading it from the spill directory if it isn't in memory.
+
+        Args:
+            video_id (str): Video id of a particular yt video.
+            name (str): Artifact name.
+            etag (str, optional): Content hash of the version, e.g. taken from an artifact url. Defaults to the latest
+                version stored by this process.
+
+        Returns:
+            Artifact: Stored artifact or None if there is none.
+        """
+
+        with self.lock:
+            latest = self.latest.get((video_id, name))
+            etag = etag or latest
+            if etag is None:
+                return None
+
+            key = (video_id, name, etag)
+            if key in self.artifacts:
+                self.artifacts.move_to_end(key)
+                return self.artifacts[key]
+
+            if not self.spill_dir or not os.path.exists(self._spillPath(*key)):
+                if etag == latest:
+                    del self.latest[(video_id, name)]
+                return None
+
+            with open(self._spillPath(*key), "rb") as spill_file:
+                media_type, content = spill_file.read().split(b"\n", 1)
+
+            artifact = Artifact(content, media_type.decode(), etag)
+            self.artifacts[key] = artifact
+            self.size += len(content)
+            self._evict()
+
+            return artifact
+
+
+    def delete(self, video_id: str) -> None:
+        """Drops all artifacts of a video.
+
+        Args:
+            video_id (str): Video id of a particular yt video.
+        """
+
+        with self.lock:
+            for key in [key for key in self.artifacts if key[0] == video_id]:
+                self._drop(*key)
+
+            for key in [key for key in self.latest if key[0] == video_id]:
+                del self.latest[key]
+
+            # versions written by other workers
+            self._removeSpills(lambda spill_video_id, spill_name, spill_etag: spill_video_id == video_id)
+
+
+    def _drop(self, video_id: str, name: str, etag: str) -> None:
+        """Removes an artifact version from memory and disk."""
+
+        artifact = self.artifacts.pop((video_id, name, etag), None)
+        if artifact is not None:
+            self.size -= len(artifact.content)
+
+        if self.spill_dir:
+            self._removeSpill(self._spillPath(video_id, name, etag))
+
+
+    @staticmethod
+    def _removeSpill(path: str) -> None:
+        """Removes a spilled file, another worker may have removed it already."""
+
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+    def _removeSpills(self, predicate) -> None:
+        """Removes spilled files whose (video id, name, etag) match the predicate, whichever worker wrote them."""
+
+        if not self.spill_dir:
+            return
+
+        for file_name in os.listdir(self.spill_dir):
+            parts = file_name.rsplit("-", 2)
+            if len(parts) == 3 and not file_name.endswith(".tmp") and predicate(*parts):
+                self._removeSpill(os.path.join(self.spill_dir, file_name))
+
+
+    def _evict(self) -> None:
+        """Moves least recently used artifacts out of memory until the size bound holds (the latest one always stays),
+        they stay readable from the spill directory they were written to."""
+
+        while self.size > self.max_bytes and len(self.artifacts) > 1:
+            key, artifact = self.artifacts.popitem(last = False)
+            self.size -= len(artifact.content)
+
+            if not self.spill_dir and self.latest.get(key[:2]) == key[2]:
+                del self.latest[key[:2]]
+
+
+# global artifact store instance
+artifact_store = ArtifactStore(ARTIFACT_CACHE_MB * 1024 * 1024, ARTIFACT_SPILL_PATH or None)
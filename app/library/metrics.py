@@ -0,0 +1,227 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# upper bounds (seconds) of stage duration histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def escapeLabelValue(value) -> str:
+    """Escapes backslashes, double quotes and line feeds of a label value as the text exposition format requires."""
+
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metric:
+    """Base class of metrics with optional labels, values are kept per label combination."""
+
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()) -> None:
+        """Constructor for the class. Registers the metric in the global registry.
+
+        Args:
+            name (str): Prometheus metric name.
+            documentation (str): Help text.
+            labelnames (tuple, optional): Label names, every update passes a value for each. Defaults to ().
+        """
+
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+        registry.register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labelText(self, key: tuple, **extra) -> str:
+        pairs = list(zip(self.labelnames, key)) + list(extra.items())
+        if not pairs:
+            return ""
+
+        return "{" + ",".join(f'{name}="{escapeLabelValue(value)}"' for name, value in pairs) + "}"
+
+
+class Counter(Metric):
+    """Monotonically increasing count, e.g. comments processed."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Increases the count of the given label values."""
+
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def _merge(self, values: dict) -> None:
+        for key, value in values.items():
+            self.values[key] = self.values.get(key, 0) + value
+
+    def render(self) -> list:
+        return [f"{self.name}{self._labelText(key)} {value}" for key, value in self.values.items()]
+
+
+class Gauge(Metric):
+    """Value that goes up and down, e.g. remaining quota. Set by the process owning the value only."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        """Sets the value of the given label values."""
+
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def _merge(self, values: dict) -> None:
+        self.values.update(values)
+
+    def render(self) -> list:
+        return [f"{self.name}{self._labelText(key)} {value}" for key, value in self.values.items()]
+
+
+class Histogram(Metric):
+    """Distribution of observed values (e.g. stage durations) over cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> None:
+        """Constructor for the class, see Metric.
+
+        Args:
+            buckets (tuple, optional): Sorted bucket upper bounds, +Inf is added. Defaults to DEFAULT_BUCKETS.
+        """
+
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        """Records a value for the given label values."""
+
+        key = self._key(labels)
+        with self.lock:
+            # per bucket (non-cumulative) counts, then sum and count
+            state = self.values.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0, 0])
+            state[bisect.bisect_left(self.buckets, value)] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Context manager observing the duration (seconds) of its block."""
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _merge(self, values: dict) -> None:
+        for key, state in values.items():
+            current = self.values.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0, 0])
+            self.values[key] = [total + value for total, value in zip(current, state)]
+
+    def render(self) -> list:
+        lines = []
+
+        for key, state in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), state):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{self._labelText(key, le=bound)} {cumulative}")
+
+            lines.append(f"{self.name}_sum{self._labelText(key)} {state[-2]}")
+            lines.append(f"{self.name}_count{self._labelText(key)} {state[-1]}")
+
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together in Prometheus text format."""
+
+    def __init__(self) -> None:
+        self.metrics = {}
+
+    def register(self, metric: Metric) -> None:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} already registered.")
+
+        self.metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """Renders every metric in Prometheus text exposition format.
+
+        Returns:
+            str: Exposition text.
+        """
+
+        lines = []
+
+        for metric in self.metrics.values():
+            with metric.lock:
+                lines.append(f"# HELP {metric.name} {metric.documentation}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                lines.extend(metric.render())
+
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """Copies values of every metric, used to ship observations made in worker processes to the parent."""
+
+        snapshot = {}
+        for name, metric in self.metrics.items():
+            with metric.lock:
+                snapshot[name] = {key: list(value) if isinstance(value, list) else value for key, value in metric.values.items()}
+
+        return snapshot
+
+    def merge(self, snapshot: dict) -> None:
+        """Adds values of a snapshot (e.g. taken in a worker process) to the metrics."""
+
+        for name, values in snapshot.items():
+            metric = self.metrics[name]
+            with metric.lock:
+                metric._merge(values)
+
+    def reset(self) -> None:
+        """Clears values of every metric."""
+
+        for metric in self.metrics.values():
+            with metric.lock:
+                metric.values = {}
+
+
+# global registry instance
+registry = Registry()
+
+# durations of the stages of a video analysis
+STAGE_SECONDS = Histogram(
+    "detox_stage_seconds", "Duration of video analysis stages in seconds.", ("stage",)
+)
+
+COMMENTS_PROCESSED = Counter("detox_comments_processed_total", "Comments classified.")
+BATCHES = Counter("detox_batches_total", "Forward passes run by the model.")
+CACHE_HITS = Counter("detox_prediction_cache_hits_total", "Comments served from the prediction cache.")
+CACHE_MISSES = Counter("detox_prediction_cache_misses_total", "Unique comments missing from the prediction cache.")
+
+YOUTUBE_REQUESTS = Counter(
+    "detox_youtube_requests_total", "YouTube Data API calls by endpoint and HTTP status code.", ("endpoint", "status")
+)
+YOUTUBE_SECONDS = Histogram(
+    "detox_youtube_request_seconds", "Duration of YouTube Data API calls in seconds.", ("endpoint",)
+)
+
+YOUTUBE_QUOTA_UNITS = Counter(
+    "detox_youtube_quota_units_total", "YouTube Data API quota units spent by endpoint and priority.", ("endpoint", "priority")
+)
+YOUTUBE_QUOTA_REMAINING = Gauge(
+    "detox_youtube_quota_remaining", "YouTube Data API quota units left for the day in this process's share of the quota."
+)
+YOUTUBE_SHED = Counter(
+    "detox_youtube_shed_total", "YouTube Data API calls refused to save quota, by endpoint and priority.", ("endpoint", "priority")
+)
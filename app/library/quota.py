@@ -0,0 +1,172 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from app.exceptions import QuotaExceededError
+from app.library.metrics import YOUTUBE_QUOTA_UNITS, YOUTUBE_QUOTA_REMAINING, YOUTUBE_SHED
+
+# request priorities, lower value is served first
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = ("interactive", "background")
+
+# quota units charged per call of an endpoint
+ENDPOINT_COSTS = {
+    "search": 100,
+    "channels": 1,
+    "playlistItems": 1,
+    "videos": 1,
+    "commentThreads": 1,
+    "comments/setModerationStatus": 50,
+}
+DEFAULT_COST = 1
+
+# daily quota resets at midnight pacific time
+try:
+    QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+except ZoneInfoNotFoundError:
+    QUOTA_TIMEZONE = timezone.utc
+
+
+def quotaDay():
+    """Date of the current quota day."""
+
+    return datetime.now(QUOTA_TIMEZONE).date()
+
+
+class QuotaScheduler:
+    """Admits YouTube Data API calls against a daily unit budget and paces them with a token bucket.
+
+    Background calls are refused once spending reaches the reserve held back for interactive calls, and wait while
+    interactive calls are queued for tokens. Spending is tracked per process, processes sharing a project's quota
+    each get a share of it as their budget.
+    """
+
+    def __init__(self, daily_budget: int, reserve: float, rate: float, burst: int) -> None:
+        """Constructor for the class.
+
+        Args:
+            daily_budget (int): Quota units per day.
+            reserve (float): Share of the budget only interactive calls may spend, e.g. 0.2.
+            rate (float): Calls per second the token bucket refills.
+            burst (int): Token bucket size, calls sent back to back.
+        """
+
+        self.daily_budget = daily_budget
+        self.reserve = int(daily_budget * reserve)
+        self.rate = rate
+        self.burst = burst
+        self.lock = threading.Lock()
+
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.day = quotaDay()
+        self.spent = 0
+
+        # no. of calls waiting for a token per priority
+        self.waiting = [0] * len(PRIORITY_NAMES)
+
+
+    @staticmethod
+    def cost(endpoint: str) -> int:
+        """Quota units charged for a call of an endpoint."""
+
+        return ENDPOINT_COSTS.get(endpoint, DEFAULT_COST)
+
+
+    def remaining(self) -> int:
+        """Quota units of this process's budget left for the day.
+
+        Returns:
+            int: Remaining units.
+        """
+
+        with self.lock:
+            self._rollDay()
+
+            return self.daily_budget - self.spent
+
+
+    def exhaust(self) -> None:
+        """Marks the budget as spent, e.g. when the api reports the quota exceeded, until the next quota day."""
+
+        with self.lock:
+            self._rollDay()
+            self.spent = max(self.spent, self.daily_budget)
+            YOUTUBE_QUOTA_REMAINING.set(0)
+
+
+    async def acquire(self, endpoint: str, priority: int = INTERACTIVE) -> None:
+        """Waits for a token and charges the cost of a call to the budget.
+
+        Args:
+            endpoint (str): Endpoint path relative to the api url, e.g. commentThreads.
+            priority (int, optional): INTERACTIVE or BACKGROUND. Defaults to INTERACTIVE.
+
+        Raises:
+            QuotaExceededError: If the call doesn't fit in the budget left for its priority.
+        """
+
+        cost = self.cost(endpoint)
+
+        # refuse before queueing, a call that doesn't fit now won't fit later today
+        with self.lock:
+            self._admit(endpoint, cost, priority)
+            self.waiting[priority] += 1
+
+        try:
+            while True:
+                with self.lock:
+                    self._refill()
+
+                    if self.tokens >= 1 and not any(self.waiting[:priority]):
+                        self._admit(endpoint, cost, priority)
+                        self.tokens -= 1
+                        self.spent += cost
+
+                        YOUTUBE_QUOTA_UNITS.inc(cost, endpoint = endpoint, priority = PRIORITY_NAMES[priority])
+                        YOUTUBE_QUOTA_REMAINING.set(self.daily_budget - self.spent)
+                        return
+
+                    delay = max(1 - self.tokens, 0.1) / self.rate
+
+                await asyncio.sleep(delay)
+
+        finally:
+            with self.lock:
+                self.waiting[priority] -= 1
+
+
+    def _admit(self, endpoint: str, cost: int, priority: int) -> None:
+        """Raises QuotaExceededError if a call would overspend the budget left for its priority."""
+
+        self._rollDay()
+
+        limit = self.daily_budget if priority == INTERACTIVE else self.daily_budget - self.reserve
+        if self.spent + cost > limit:
+            YOUTUBE_SHED.inc(endpoint = endpoint, priority = PRIORITY_NAMES[priority])
+            raise QuotaExceededError(
+                f"{PRIORITY_NAMES[priority].capitalize()} {endpoint} call refused, "
+                f"{self.daily_budget - self.spent} of {self.daily_budget} quota units left for the day."
+            )
+
+
+    def _rollDay(self) -> None:
+        """Resets spending when a new quota day has started."""
+
+        day = quotaDay()
+        if day != self.day:
+            self.day = day
+            self.spent = 0
+
+        YOUTUBE_QUOTA_REMAINING.set(self.daily_budget - self.spent)
+
+
+    def _refill(self) -> None:
+        """Adds the tokens accrued since the last refill."""
+
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
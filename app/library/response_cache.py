@@ -0,0 +1,114 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+# body of an api response with the headers replayed on a cache hit, its etag and expiry (monotonic seconds)
+CachedResponse = namedtuple("CachedResponse", ["content", "headers", "etag", "expires"])
+
+
+class ResponseCache:
+    """LRU of YouTube API response bodies with their ETags, used to turn repeated reads into conditional requests.
+
+    Entries expire after ttl seconds without being revalidated and the least recently used ones are evicted once
+    the total body size exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float) -> None:
+        """Constructor for the class.
+
+        Args:
+            max_bytes (int): Maximum total size of cached bodies, 0 disables caching.
+            ttl (float): Seconds an entry is kept after it was last stored or revalidated.
+        """
+
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.lock = threading.Lock()
+
+        # request key -> CachedResponse in LRU order
+        self.responses = OrderedDict()
+        self.size = 0
+
+
+    @staticmethod
+    def key(endpoint: str, params: dict, credentials: dict) -> str:
+        """Key of a read: endpoint, query parameters and account (responses of mine=true calls differ per account).
+
+        The refresh token identifies the account across access token refreshes.
+
+        Args:
+            endpoint (str): Endpoint path relative to the api url.
+            params (dict): Query parameters.
+            credentials (dict): Authorization credentials of the request.
+
+        Returns:
+            str: Hex digest.
+        """
+
+        account = credentials.get("refresh_token") or credentials.get("access_token", "")
+        digest = hashlib.sha1(f"{account}\0{endpoint}".encode())
+        for name, value in sorted(params.items()):
+            digest.update(f"\0{name}\0{value}".encode())
+
+        return digest.hexdigest()
+
+
+    def get(self, key: str) -> CachedResponse:
+        """Returns an unexpired cached response.
+
+        Args:
+            key (str): Request key.
+
+        Returns:
+            CachedResponse: Cached response or None if there is none.
+        """
+
+        with self.lock:
+            cached = self.responses.get(key)
+            if cached is None:
+                return None
+
+            if cached.expires < time.monotonic():
+                self._drop(key)
+                return None
+
+            self.responses.move_to_end(key)
+
+            return cached
+
+
+    def put(self, key: str, content: bytes, headers: dict, etag: str) -> None:
+        """Stores a response body, or renews the expiry of an entry revalidated with the same etag.
+
+        Args:
+            key (str): Request key.
+            content (bytes): Response body.
+            headers (dict): Headers replayed on a hit, e.g. content-type.
+            etag (str): ETag header of the response.
+        """
+
+        if len(content) > self.max_bytes:
+            return
+
+        with self.lock:
+            self._drop(key)
+            self.responses[key] = CachedResponse(content, headers, etag, time.monotonic() + self.ttl)
+            self.size += len(content)
+
+            while self.size > self.max_bytes:
+                self._drop(next(iter(self.responses)))
+
+
+    def clear(self) -> None:
+        """Drops every entry."""
+
+        with self.lock:
+            self.responses.clear()
+            self.size = 0
+
+
+    def _drop(self, key: str) -> None:
+        cached = self.responses.pop(key, None)
+        if cached is not None:
+            self.size -= len(cached.content)
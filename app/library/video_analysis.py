@@ -1,34 +1,272 @@
 import pandas as pd
-from wordcloud import WordCloud, STOPWORDS
-import matplotlib.pyplot as plt
-import os
+import numpy as np
+import asyncio
+import io
 
-from app.machine_learning import predict
+from app.machine_learning import predict, predict_async, predict_iter, PredictionResult, DuplicateIndex
+from app.machine_learning.prediction_cache import normalize_text
+from app.config import DEDUP_THRESHOLD, WORD_CLOUD_WIDTH, WORD_CLOUD_HEIGHT, WORD_CLOUD_FORMAT
+from app.library.metrics import STAGE_SECONDS
+from app.library.word_cloud import WordFrequencies, frequencyHash, renderWordCloud
+from app.library.artifacts import artifact_store
+
+# media types of generated images
+MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
 
 class VideoAnalysis:
     """Performs video analysis i.e. comments classification and generating respective plots."""
     
     def __init__(self) -> None:
-        """Constructor for the class. Initializes comments and predictions dataframes"""
+        """Constructor for the class. Initializes comment columns and predictions result"""
+        
+        # fetched pages are kept as chunks of columns, concatenated once when the comments are read
+        self._id_chunks = []
+        self._text_chunks = []
+        self._comments_df = None
+        
+        self.predictions = PredictionResult.empty_result()
+        
+        # comment ids added / removed by the latest classifyComments call
+        self.added_ids = []
+        self.removed_ids = []
         
-        self.comments_df = pd.DataFrame(columns = ["id", "comment_text"])
-        self.predictions = pd.DataFrame()
+        # clusters of exact / near-duplicate comments, only their representatives are classified
+        self.duplicates = DuplicateIndex(DEDUP_THRESHOLD)
+        
+        # word counts kept up to date as pages arrive, frequency hash of the last word cloud and class counts of the last graph
+        self.word_frequencies = WordFrequencies()
+        self.word_cloud_key = None
+        self.class_counts = None
+        
+        # held by requests refreshing or reading an analysis shared between them
+        self.lock = asyncio.Lock()
         
     
     def appendComments(self, comment_dict: dict) -> None:
-        """Appends comments dict received from api call to the comments DataFrame.
+        """Appends comments dict received from api call to the comment columns.
+        
+        Pages are only collected here (no copy of the comments fetched before), so that ingest stays linear in comment count.
 
         Args:
-            comment_dict (dict): Dictionary containing comment id and comment text.
+            comment_dict (dict): Dictionary (or DataFrame) containing comment id and comment text.
         """
         
-        self.comments_df = pd.concat([self.comments_df, pd.DataFrame(comment_dict)], ignore_index = True)
+        with STAGE_SECONDS.time(stage = "append_comments"):
+            self._id_chunks.append(np.asarray(comment_dict["id"], dtype = object))
+            self._text_chunks.append(np.asarray(comment_dict["comment_text"], dtype = object))
+            self._comments_df = None
+            
+            self.word_frequencies.addComments(self._id_chunks[-1], self._text_chunks[-1])
+    
+    
+    def refreshComments(self) -> None:
+        """Clears comments before re-fetching them, previous predictions are kept so that only new comments get classified."""
+        
+        self._id_chunks = []
+        self._text_chunks = []
+        self._comments_df = None
+    
+    
+    def _consolidateChunks(self) -> None:
+        """Concatenates collected pages into a single chunk per column."""
+        
+        if len(self._id_chunks) != 1:
+            self._id_chunks = [np.concatenate(self._id_chunks) if self._id_chunks else np.empty(0, dtype = object)]
+            self._text_chunks = [np.concatenate(self._text_chunks) if self._text_chunks else np.empty(0, dtype = object)]
+    
+    
+    @property
+    def comment_ids(self) -> np.ndarray:
+        """Ids of all fetched comments, in fetch order."""
+        
+        self._consolidateChunks()
+        return self._id_chunks[0]
+    
+    
+    @property
+    def comment_texts(self) -> np.ndarray:
+        """Texts of all fetched comments, in fetch order."""
+        
+        self._consolidateChunks()
+        return self._text_chunks[0]
+    
+    
+    @property
+    def comments_df(self) -> pd.DataFrame:
+        """DataFrame of all fetched comments, built on first access after new pages arrived."""
+        
+        if self._comments_df is None:
+            self._comments_df = pd.DataFrame({"id": self.comment_ids, "comment_text": self.comment_texts})
+        
+        return self._comments_df
+    
+    
+    def getComments(self) -> list:
+        """Returns fetched comments as dicts (for display) straight from the columns, without building the DataFrame.
+
+        Returns:
+            list: Dicts with comment id and comment text.
+        """
+        
+        return [{"id": comment_id, "comment_text": text} for comment_id, text in zip(self.comment_ids, self.comment_texts)]
     
     
     def classifyComments(self) -> None:
-        """Classifies the comments for comments DataFrame."""
-         
-        self.predictions = predict(self.comments_df)
+        """Classifies the comments for comments DataFrame.
+        
+        Predictions are kept per comment id across refreshes, only comments not classified before go through the model
+        and predictions of comments no longer present are dropped. Copies of a comment share its prediction.
+        """
+        
+        new_comments = self._diffComments()
+        sources = self._knownSources()
+        
+        try:
+            new_predictions = predict(self._clusterComments(new_comments, sources))
+            self._mergePredictions(self._fanOutPredictions(new_comments, new_predictions, sources))
+        
+        except BaseException:
+            self._rollbackComments(new_comments["id"])
+            raise
+    
+    
+    async def classifyCommentsAsync(self) -> None:
+        """Same as classifyComments but runs through the shared micro-batching scheduler without blocking the event loop."""
+        
+        new_comments = self._diffComments()
+        sources = self._knownSources()
+        
+        try:
+            new_predictions = await predict_async(self._clusterComments(new_comments, sources))
+            self._mergePredictions(self._fanOutPredictions(new_comments, new_predictions, sources))
+        
+        except BaseException:
+            self._rollbackComments(new_comments["id"])
+            raise
+    
+    
+    async def streamComments(self, comment_itr, exclude_ids: list = ()) -> None:
+        """Appends and classifies pages of comments as they are fetched, each page is classified while the next one downloads.
+        
+        Like classifyComments only comments not classified before go through the model.
+
+        Args:
+            comment_itr (AsyncGenerator): Pages of comments as yielded by fetchVideoComments.
+            exclude_ids (list, optional): Comment ids to leave out (e.g. recently rejected ones). Defaults to ().
+        """
+        
+        known_ids = set(self.predictions.ids)
+        exclude_ids = set(exclude_ids)
+        new_ids = []
+        sources = {}
+        
+        async def new_pages():
+            async for comment_dict in comment_itr:
+                page = pd.DataFrame(comment_dict)
+                page = page[~page["id"].isin(exclude_ids)]
+                is_known = page["id"].isin(known_ids)
+                new_page = page[~is_known]
+                new_ids.extend(new_page["id"])
+                
+                # comments classified before are sources for copies of them arriving later
+                for comment_id, text in zip(page["id"][is_known], page["comment_text"][is_known]):
+                    sources.setdefault(normalize_text(text), comment_id)
+                
+                self.appendComments(page)
+                yield self._clusterComments(new_page, sources)
+        
+        try:
+            new_predictions = [page_predictions async for page_predictions in predict_iter(new_pages())]
+            
+            new_comments = self._diffComments()
+            self._mergePredictions(self._fanOutPredictions(new_comments, PredictionResult.concat(new_predictions), sources))
+        
+        except BaseException:
+            self._rollbackComments(new_ids)
+            raise
+    
+    
+    def _diffComments(self) -> pd.DataFrame:
+        """Compares fetched comments against previous predictions and returns comments not classified before."""
+        
+        known_ids = pd.Index(self.predictions.ids, dtype = object)
+        comment_ids = pd.Index(self.comment_ids, dtype = object)
+        
+        is_new = ~comment_ids.isin(known_ids)
+        new_comments = pd.DataFrame({"id": self.comment_ids[is_new], "comment_text": self.comment_texts[is_new]})
+        self.added_ids = new_comments["id"].to_list()
+        self.removed_ids = known_ids[~known_ids.isin(comment_ids)].to_list()
+        
+        return new_comments
+    
+    
+    def _knownSources(self) -> dict:
+        """Normalized text -> id of a fetched comment classified before, sources for copies among new comments."""
+        
+        is_known = pd.Index(self.comment_ids, dtype = object).isin(pd.Index(self.predictions.ids, dtype = object))
+        
+        sources = {}
+        for comment_id, text in zip(self.comment_ids[is_known], self.comment_texts[is_known]):
+            sources.setdefault(normalize_text(text), comment_id)
+        
+        return sources
+    
+    
+    def _clusterComments(self, comments: pd.DataFrame, sources: dict) -> pd.DataFrame:
+        """Adds comments to duplicate clusters (grouped for moderation) and returns the ones to classify.
+        
+        Near-duplicates are classified on their own, one changed word can flip the meaning. Only copies of a text
+        already classified share its prediction, the model can't tell them apart (see normalize_text).
+
+        Args:
+            comments (pd.DataFrame): New comments.
+            sources (dict): Normalized text -> id of the comment classified for it, updated in place.
+
+        Returns:
+            pd.DataFrame: First comment of every text not classified before.
+        """
+        
+        self.duplicates.add(comments["id"], comments["comment_text"])
+        
+        is_distinct = []
+        for comment_id, text in zip(comments["id"], comments["comment_text"]):
+            key = normalize_text(text)
+            is_distinct.append(key not in sources)
+            sources.setdefault(key, comment_id)
+        
+        return comments[np.asarray(is_distinct, dtype = bool)]
+    
+    
+    def _rollbackComments(self, ids) -> None:
+        """Takes comments whose predictions were never merged (failed fetch or model call) back out of the duplicate
+        clusters and word counts, so that the next refresh adds them again."""
+        
+        self.duplicates.discard(ids)
+        self.word_frequencies.removeComments(ids)
+    
+    
+    def _fanOutPredictions(self, comments: pd.DataFrame, new_predictions: PredictionResult, sources: dict) -> PredictionResult:
+        """Copies the prediction of every classified text to the copies of it among comments."""
+        
+        # sources were classified now or in an earlier call (and are still among previous predictions)
+        source = PredictionResult.concat([self.predictions, new_predictions])
+        position = {comment_id: row for row, comment_id in enumerate(source.ids)}
+        
+        ids = comments["id"].to_numpy(dtype = object)
+        rows = np.array([position[sources[normalize_text(text)]] for text in comments["comment_text"]], dtype = np.int64)
+        
+        return PredictionResult(ids, source.probs[rows], source.thresholds)
+    
+    
+    def _mergePredictions(self, new_predictions: PredictionResult) -> None:
+        """Merges predictions of new comments into previous ones, dropping comments no longer present."""
+        
+        # keep predictions aligned with comments order
+        predictions = PredictionResult.concat([self.predictions, new_predictions])
+        self.predictions = predictions.reindex(self.comment_ids)
+        
+        self.duplicates.discard(self.removed_ids)
+        self.word_frequencies.removeComments(self.removed_ids)
         
     
     def getToxicIds(self) -> list:
@@ -38,49 +276,100 @@ class VideoAnalysis:
             list: Comment Ids of toxic comments.
         """
         
-        toxic_ids = self.predictions[self.predictions.isin([1]).any(axis=1)]["id"].to_list()
-        return toxic_ids
+        return self.predictions.toxic_ids()
     
     
-    def createWordCloud(self, video_id: str) -> None:
-        """Creates word cloud for comments DataFrame.
+    def getDuplicateClusters(self, min_size: int = 2) -> list:
+        """Returns clusters of exact / near-duplicate comments (e.g. bot raids), largest first.
 
         Args:
-            video_id (str): Video id of a particular yt video for filenaming.
+            min_size (int, optional): Minimum no. of comments in a cluster. Defaults to 2.
+
+        Returns:
+            list: Dicts with representative comment id, its text, cluster size and member comment ids.
         """
         
-        text = self.comments_df.comment_text.values
+        return self.duplicates.clusters(min_size)
+    
+    
+    def getClusterIds(self, comment_id: str) -> list:
+        """Returns ids of all comments in the duplicate cluster of a comment.
+
+        Args:
+            comment_id (str): Id of any comment of the cluster.
+
+        Returns:
+            list: Comment ids of the cluster, empty for unknown comments.
+        """
         
-        comments_cloud = WordCloud(
-                                font_path = 'arial',
-                                stopwords = STOPWORDS,
-                                background_color = 'white',
-                                collocations = False,
-                                width = 2500,
-                                height = 1800).generate(" ".join(text))
+        representative = self.duplicates.representative.get(comment_id)
         
-        # Construct absolute path to app/static/images
-        base_dir = os.path.dirname(os.path.dirname(__file__)) # Go up from library to app
-        image_path = os.path.join(base_dir, "static", "images", f"word_cloud_{video_id}.png")
-        comments_cloud.to_file(image_path)
+        return list(self.duplicates.members[representative]) if representative is not None else []
+    
+    
+    @STAGE_SECONDS.time(stage = "word_cloud")
+    def createWordCloud(self, video_id: str, width: int = WORD_CLOUD_WIDTH, height: int = WORD_CLOUD_HEIGHT, image_format: str = WORD_CLOUD_FORMAT) -> str:
+        """Creates word cloud of the fetched comments from the word counts kept while appending them, and puts it in the artifact store.
         
+        Nothing is rendered when the frequency table is unchanged since the last call (and the artifact is still stored),
+        equal tables of other analyses are served from the render cache.
 
-    def createClassificationGraph(self, video_id: str) -> None:
-        """Creates bar graph for count of each class predicted."
+        Args:
+            video_id (str): Video id of a particular yt video, artifacts are stored per video.
+            width (int, optional): Image width in pixels. Defaults to WORD_CLOUD_WIDTH from config.
+            height (int, optional): Image height in pixels. Defaults to WORD_CLOUD_HEIGHT from config.
+            image_format (str, optional): png or svg. Defaults to WORD_CLOUD_FORMAT from config.
+        
+        Returns:
+            str: Etag (content hash) of the stored word cloud, part of its url.
+        """
+        
+        frequencies = self.word_frequencies.topWords()
+        
+        key = frequencyHash(frequencies, width, height, image_format)
+        artifact = artifact_store.get(video_id, "word_cloud")
+        if key == self.word_cloud_key and artifact is not None:
+            return artifact.etag
+        
+        key, image = renderWordCloud(frequencies, width, height, image_format)
+        artifact = artifact_store.put(video_id, "word_cloud", image, MEDIA_TYPES[image_format])
+        
+        self.word_cloud_key = key
+        
+        return artifact.etag
+        
+
+    @STAGE_SECONDS.time(stage = "classification_graph")
+    def createClassificationGraph(self, video_id: str) -> str:
+        """Creates bar graph for count of each class predicted and puts it in the artifact store.
+        
+        Drawn on its own Figure (not the shared pyplot state) so that concurrent analyses don't interfere, nothing is
+        drawn when class counts are unchanged since the last call.
 
         Args:
-            video_id (str): Video id of a particular yt video for filenaming.
+            video_id (str): Video id of a particular yt video, artifacts are stored per video.
+        
+        Returns:
+            str: Etag (content hash) of the stored graph, part of its url.
         """
         
-        columns = self.predictions.columns[1:]
-        class_counts = [self.predictions[self.predictions[column] == 1].shape[0] for column in columns]
+        from matplotlib.figure import Figure
+        
+        class_counts = self.predictions.class_counts()
+        artifact = artifact_store.get(video_id, "classification_graph")
+        if class_counts == self.class_counts and artifact is not None:
+            return artifact.etag
+        
+        figure = Figure()
+        axes = figure.subplots()
+        axes.bar(list(class_counts), list(class_counts.values()), color = "crimson", width = 0.8)
+        axes.set_xlabel("Class")
+        axes.set_ylabel("Comments count")
+        
+        buffer = io.BytesIO()
+        figure.savefig(buffer, format = "png", bbox_inches = 'tight', transparent = True)
+        artifact = artifact_store.put(video_id, "classification_graph", buffer.getvalue(), MEDIA_TYPES["png"])
         
-        plt.bar(columns, class_counts, color = "crimson", width = 0.8)
-        plt.xlabel("Class")
-        plt.ylabel("Comments count")
+        self.class_counts = class_counts
         
-        # Construct absolute path to app/static/images
-        base_dir = os.path.dirname(os.path.dirname(__file__)) # Go up from library to app
-        image_path = os.path.join(base_dir, "static", "images", f"classification_graph_{video_id}.png")
-        plt.savefig(image_path, bbox_inches = 'tight', transparent = True)
-        plt.close()
\ No newline at end of file
+        return artifact.etag
@@ -0,0 +1,183 @@
+import hashlib
+import io
+import re
+import threading
+from collections import Counter, OrderedDict
+
+from app.config import WORD_CLOUD_FONT, WORD_CLOUD_MAX_WORDS, WORD_CLOUD_CACHE_ITEMS
+
+# same word pattern WordCloud uses to split text
+WORD_PATTERN = re.compile(r"\w[\w']*")
+
+# rendered word clouds keyed by hash of frequency table and render settings
+render_cache = OrderedDict()
+render_cache_lock = threading.Lock()
+
+
+class WordFrequencies:
+    """Word counts of a set of comments, updated as comments are added and removed instead of re-tokenizing them all."""
+
+    def __init__(self) -> None:
+        """Constructor for the class. Initializes empty counts."""
+
+        self.counts = Counter()
+
+        # comment id -> words counted for it, so that removed comments can be subtracted
+        self.comment_words = {}
+        self.stopwords = None
+
+
+    def _words(self, text: str) -> list:
+        """Words of a comment as written, without stopwords, numbers and trailing 's (like WordCloud.process_text)."""
+
+        words = (word[:-2] if word.lower().endswith("'s") else word for word in WORD_PATTERN.findall(str(text)))
+
+        return [word for word in words if word.lower() not in self.stopwords and not word.isdigit()]
+
+
+    def addComments(self, ids, texts) -> None:
+        """Counts words of comments not counted before.
+
+        Args:
+            ids (array-like): Comment ids.
+            texts (array-like): Comment texts.
+        """
+
+        if self.stopwords is None:
+            # imported on first use, wordcloud pulls in matplotlib
+            from wordcloud import STOPWORDS
+
+            self.stopwords = frozenset(word.lower() for word in STOPWORDS)
+
+        for comment_id, text in zip(ids, texts):
+            if comment_id not in self.comment_words:
+                words = self._words(text)
+                self.comment_words[comment_id] = words
+                self.counts.update(words)
+
+
+    def removeComments(self, ids) -> None:
+        """Subtracts words of removed comments.
+
+        Args:
+            ids (array-like): Comment ids.
+        """
+
+        for comment_id in ids:
+            words = self.comment_words.pop(comment_id, None)
+            if words:
+                self.counts.subtract(words)
+
+        self.counts = +self.counts
+
+
+    def topWords(self, max_words: int = WORD_CLOUD_MAX_WORDS) -> dict:
+        """Most frequent words, ties broken alphabetically so that equal counts give an equal table.
+
+        Args:
+            max_words (int, optional): No. of words. Defaults to WORD_CLOUD_MAX_WORDS from config.
+
+        Returns:
+            dict: Word -> count.
+        """
+
+        return dict(sorted(foldWords(self.counts).items(), key = lambda item: (-item[1], item[0]))[:max_words])
+
+
+def foldWords(counts: Counter) -> dict:
+    """Merges counts of case variants and plurals the way WordCloud.process_text does (with normalize_plurals).
+
+    "videos" is counted as "video" when the singular occurs too, case variants ("Great", "great") are counted together
+    under the most frequent one, ties going to the first in sort order so that equal counts give an equal table.
+
+    Args:
+        counts (Counter): Word as written -> count.
+
+    Returns:
+        dict: Word -> count.
+    """
+
+    # lower cased word -> {case variant -> count}
+    variants = {}
+    for word, count in sorted(counts.items()):
+        variants.setdefault(word.lower(), {})[word] = count
+
+    for word_lower in list(variants):
+        if word_lower.endswith("s") and not word_lower.endswith("ss") and word_lower[:-1] in variants:
+            singular = variants[word_lower[:-1]]
+            for word, count in variants.pop(word_lower).items():
+                singular[word[:-1]] = singular.get(word[:-1], 0) + count
+
+    return {max(case_counts.items(), key = lambda item: item[1])[0]: sum(case_counts.values()) for case_counts in variants.values()}
+
+
+def frequencyHash(frequencies: dict, width: int, height: int, image_format: str) -> str:
+    """Hash identifying a render: frequency table and render settings.
+
+    Args:
+        frequencies (dict): Word -> count.
+        width (int): Image width in pixels.
+        height (int): Image height in pixels.
+        image_format (str): png or svg.
+
+    Returns:
+        str: Hex digest.
+    """
+
+    digest = hashlib.sha1(f"{width}x{height}.{image_format}".encode())
+    for word, count in frequencies.items():
+        digest.update(f"\0{word}\0{count}".encode())
+
+    return digest.hexdigest()
+
+
+def renderWordCloud(frequencies: dict, width: int, height: int, image_format: str = "png") -> tuple:
+    """Renders a word cloud from word frequencies, identical tables are served from the render cache.
+
+    Args:
+        frequencies (dict): Word -> count, e.g. WordFrequencies.topWords().
+        width (int): Image width in pixels.
+        height (int): Image height in pixels.
+        image_format (str, optional): png or svg. Defaults to "png".
+
+    Raises:
+        ValueError: If image format isn't supported.
+
+    Returns:
+        tuple: (frequency hash, image bytes).
+    """
+
+    if image_format not in ("png", "svg"):
+        raise ValueError(f"Unsupported word cloud format {image_format!r}, expected png or svg.")
+
+    key = frequencyHash(frequencies, width, height, image_format)
+
+    with render_cache_lock:
+        if key in render_cache:
+            render_cache.move_to_end(key)
+            return key, render_cache[key]
+
+    from wordcloud import WordCloud
+
+    # fixed random state, same frequencies always give the same layout
+    comments_cloud = WordCloud(
+                            font_path = WORD_CLOUD_FONT,
+                            background_color = 'white',
+                            width = width,
+                            height = height,
+                            max_words = len(frequencies),
+                            random_state = 0).generate_from_frequencies(frequencies)
+
+    if image_format == "svg":
+        image = comments_cloud.to_svg(embed_font = True).encode()
+    else:
+        buffer = io.BytesIO()
+        comments_cloud.to_image().save(buffer, format = "PNG", optimize = True)
+        image = buffer.getvalue()
+
+    with render_cache_lock:
+        render_cache[key] = image
+        while len(render_cache) > WORD_CLOUD_CACHE_ITEMS:
+            render_cache.popitem(last = False)
+
+    return key, image
@@ -1,57 +1,204 @@
 import os
+import asyncio
+import importlib.util
+from contextlib import asynccontextmanager
 
 import httpx
 
 from app.exceptions import *
+from app.config import YOUTUBE_MAX_CONNECTIONS, YOUTUBE_KEEPALIVE_SECONDS, YOUTUBE_TIMEOUT_SECONDS
+from app.config import YOUTUBE_CACHE_MB, YOUTUBE_CACHE_TTL_SECONDS
+from app.config import YOUTUBE_DAILY_QUOTA, YOUTUBE_QUOTA_RESERVE, YOUTUBE_REQUESTS_PER_SECOND, YOUTUBE_REQUEST_BURST
+from app.config import WEB_CONCURRENCY
+from app.library.metrics import STAGE_SECONDS, YOUTUBE_REQUESTS, YOUTUBE_SECONDS
+from app.library.response_cache import ResponseCache
+from app.library.quota import QuotaScheduler, INTERACTIVE
 
 # clint secret key for sending requests to yt api
 KEY = os.getenv("CLIENT_SECRET")
+CLIENT_ID = os.getenv("CLIENT_ID")
 
+API_URL = "https://www.googleapis.com/youtube/v3/"
+OAUTH_TOKEN_URL = "https://oauth2.googleapis.com/token"
 
-async def fetchChannelData(credentials: dict) -> dict:
-    """Fetches youtube channel data for authorized google account.
+# max. no. of comment ids per setModerationStatus call
+MODERATION_BATCH_SIZE = 50
+
+# max. no. of results per playlistItems page and of ids per videos lookup
+VIDEOS_PAGE_SIZE = 50
+
+# global http client instance shared by all api calls, created at app startup
+client = None
+
+# global cache of GET responses and their etags, repeated reads are sent as conditional requests
+response_cache = ResponseCache(YOUTUBE_CACHE_MB * 1024 * 1024, YOUTUBE_CACHE_TTL_SECONDS)
+
+# global quota scheduler instance every api call is admitted by, spending is tracked per process so every web worker
+# gets an even share of the project's daily quota
+quota_scheduler = QuotaScheduler(
+    YOUTUBE_DAILY_QUOTA // WEB_CONCURRENCY, YOUTUBE_QUOTA_RESERVE, YOUTUBE_REQUESTS_PER_SECOND, YOUTUBE_REQUEST_BURST
+)
+
+
+def newClient() -> httpx.AsyncClient:
+    """Creates an async client with connection pooling, keep-alive and HTTP/2 (when h2 is installed).
+
+    Returns:
+        httpx.AsyncClient: Client for YouTube Data API and OAuth calls.
+    """
+
+    return httpx.AsyncClient(
+        http2 = importlib.util.find_spec("h2") is not None,
+        timeout = YOUTUBE_TIMEOUT_SECONDS,
+        limits = httpx.Limits(
+            max_connections = YOUTUBE_MAX_CONNECTIONS,
+            max_keepalive_connections = YOUTUBE_MAX_CONNECTIONS,
+            keepalive_expiry = YOUTUBE_KEEPALIVE_SECONDS
+        )
+    )
+
+
+def startClient() -> None:
+    """Creates the shared client on the running event loop (call from an async startup hook)."""
+
+    global client
+
+    client = newClient()
+
+
+async def closeClient() -> None:
+    """Closes the shared client and its pooled connections."""
+
+    global client
+
+    if client is not None:
+        await client.aclose()
+        client = None
+
+
+@asynccontextmanager
+async def getClient():
+    """Yields the shared client, or a temporary one closed afterwards when it isn't started (e.g. Streamlit's asyncio.run calls)."""
+
+    if client is not None:
+        yield client
+        return
+
+    async with newClient() as temporary_client:
+        yield temporary_client
+
+
+async def requestApi(http_client: httpx.AsyncClient, method: str, endpoint: str, credentials: dict, params: dict,
+                     priority: int = INTERACTIVE) -> httpx.Response:
+    """Sends a request to a YouTube Data API endpoint and records its status and duration.
+
+    The request waits for admission by the quota scheduler, which charges the endpoint's unit cost to the daily
+    budget and refuses it when the budget left for its priority doesn't cover the cost.
+
+    GET responses are cached with their ETag. A later identical read sends If-None-Match and a 304 Not Modified is
+    answered with the cached body, so callers get a 2xx response (or a 404, which some endpoints use for missing
+    resources).
 
     Args:
+        http_client (httpx.AsyncClient): Client sending the request.
+        method (str): HTTP method.
+        endpoint (str): Endpoint path relative to the api url, e.g. commentThreads.
         credentials (dict): Authorization credentials for accessing channel data.
+        params (dict): Query parameters.
+        priority (int, optional): INTERACTIVE or BACKGROUND, background requests are shed first. Defaults to INTERACTIVE.
 
     Raises:
-        QuotaExceededError: If request quota is utilized.
+        QuotaExceededError: If request quota is utilized, the request was shed or rate limited.
         AccessTokenExpiredError: If access token in authorization header has expired.
-        EntityNotFoundError: If youtube channel for authorized account doesn't exist.
+        YouTubeApiError: If api responds with any other error status (5xx, 400, ...).
 
     Returns:
-        dict: Channel details of logged in user.
+        httpx.Response: Successful (or 404) response.
     """
-    
-    request_uri = "https://www.googleapis.com/youtube/v3/channels"
-    
+
     headers = {
         "Authorization": f"Bearer {credentials['access_token']}",
         "Accept": "application/json"
     }
-    
+
+    cache_key, cached = None, None
+    if method == "GET":
+        cache_key = response_cache.key(endpoint, params, credentials)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            headers["If-None-Match"] = cached.etag
+
+    await quota_scheduler.acquire(endpoint, priority)
+
+    with YOUTUBE_SECONDS.time(endpoint = endpoint):
+        response = await http_client.request(method, API_URL + endpoint, params = params, headers = headers)
+    YOUTUBE_REQUESTS.inc(endpoint = endpoint, status = response.status_code)
+
+    # fails when quota exceeds or access token expires
+    if response.status_code == 403:
+        if response.headers.get("content-type", "").startswith("application/json"):
+            reasons = [error.get("reason") for error in response.json().get("error", {}).get("errors", [])]
+            if "quotaExceeded" in reasons or "dailyLimitExceeded" in reasons:
+                quota_scheduler.exhaust()
+
+        raise QuotaExceededError("Request quota exceeded for the day.")
+
+    elif response.status_code == 401:
+        raise AccessTokenExpiredError("Current access token expired, get a fresh one.")
+
+    elif response.status_code == 429:
+        raise QuotaExceededError("Too many requests, rate limited by youtube.")
+
+    if cached is not None and response.status_code == 304:
+        response_cache.put(cache_key, cached.content, cached.headers, cached.etag)
+        return httpx.Response(200, content = cached.content, headers = cached.headers, request = response.request)
+
+    if not response.is_success and response.status_code != 404:
+        raise YouTubeApiError(response.status_code, f"{method} {endpoint} failed. HTTP {response.status_code}: {response.text}")
+
+    if cache_key is not None and response.status_code == 200 and "etag" in response.headers:
+        cached_headers = {"content-type": response.headers.get("content-type", "application/json"), "etag": response.headers["etag"]}
+        response_cache.put(cache_key, response.content, cached_headers, response.headers["etag"])
+
+    return response
+
+
+async def fetchChannelData(credentials: dict, priority: int = INTERACTIVE) -> dict:
+    """Fetches youtube channel data for authorized google account.
+
+    Args:
+        credentials (dict): Authorization credentials for accessing channel data.
+        priority (int, optional): INTERACTIVE or BACKGROUND, see requestApi. Defaults to INTERACTIVE.
+
+    Raises:
+        QuotaExceededError: If request quota is utilized.
+        AccessTokenExpiredError: If access token in authorization header has expired.
+        EntityNotFoundError: If youtube channel for authorized account doesn't exist.
+
+    Returns:
+        dict: Channel details of logged in user.
+    """
+
     params = {
         "mine": "true",
         "part": "snippet,contentDetails,statistics",
         "key": KEY
     }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(request_uri, params = params, headers = headers)
-    
-    # fails when quota exceeds or access token expires
-    if response.status_code == 403:
-        raise QuotaExceededError("Request quota exceeded for the day.")
-    
+    async with getClient() as http_client:
+        response = await requestApi(http_client, "GET", "channels", credentials, params, priority)
+
     channel_resource = response.json()
-    
+
     # if no channel / no videos / invalid id
     if "items" not in channel_resource or len(channel_resource["items"]) == 0:
         raise EntityNotFoundError("channel", "Authorized youtube account haven't uploaded videos.")
-    
+
     channel_item = channel_resource["items"][0]
-    
+
     channel_details = {
+        "id": channel_item["id"],
         "name": channel_item["snippet"]["title"],
+        "uploads_playlist_id": channel_item.get("contentDetails", {}).get("relatedPlaylists", {}).get("uploads"),
         "logo_url": channel_item["snippet"]["thumbnails"]["medium"]["url"],
         "stats": {
             "viewCount": channel_item["statistics"].get("viewCount", 0),
@@ -59,103 +206,247 @@ async def fetchChannelData(credentials: dict) -> dict:
             "videoCount": channel_item["statistics"].get("videoCount", 0)
         }
     }
-    
+
     return channel_details
 
 
-async def fetchVideoData(credentials: dict) -> dict:
-    """Fetches video data for authorized google account.
+async def fetchUploadsPlaylistId(http_client: httpx.AsyncClient, credentials: dict, priority: int = INTERACTIVE) -> str:
+    """Fetches id of the playlist containing all uploads of the authorized channel.
 
     Args:
+        http_client (httpx.AsyncClient): Client sending the request.
         credentials (dict): Authorization credentials for accessing channel data.
+        priority (int, optional): INTERACTIVE or BACKGROUND, see requestApi. Defaults to INTERACTIVE.
 
     Raises:
-        QuotaExceededError: If request quota is utilized.
-        AccessTokenExpiredError: If access token in authorization header has expired.
-        EntityNotFoundError: If videos for logged in channel doesn't exist.
+        EntityNotFoundError: If youtube channel for authorized account doesn't exist.
 
     Returns:
-        dict: Video data for latest 50 videos of the user.
+        str: Uploads playlist id.
     """
-    
-    request_uri = "https://www.googleapis.com/youtube/v3/search"
-    
-    headers = {
-        "Authorization": f"Bearer {credentials['access_token']}",
-        "Accept": "application/json"
-    }
 
     params = {
-        "part": "snippet",
-        "forMine": "true",
-        "maxResults": 50,    # get latest 50 videos from channel
-        "order": "date",
-        "type": "video",
+        "mine": "true",
+        "part": "contentDetails",
         "key": KEY
     }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(request_uri, params = params, headers = headers)
-    
-    # fails when quota exceeds or access token expires
-    if response.status_code == 403:
-        raise QuotaExceededError("Request quota exceeded for the day.")
-    
-    elif response.status_code == 401:
-        raise AccessTokenExpiredError("Current access token expired, get a fresh one.")
-    
-    video_resource = response.json()
-    
-    # if no videos uploaded
-    if "items" not in video_resource or len(video_resource["items"]) == 0:
-        raise EntityNotFoundError("video", "Authorized youtube account haven't uploaded videos.")
-    
-    # extract video ids from video resource
-    video_ids = ",".join(resource["id"]["videoId"] for resource in video_resource["items"])
-    
-    # get video data from obtained video ids
-    request_uri = "https://www.googleapis.com/youtube/v3/videos"
+    response = await requestApi(http_client, "GET", "channels", credentials, params, priority)
+
+    channel_resource = response.json()
+
+    if "items" not in channel_resource or len(channel_resource["items"]) == 0:
+        raise EntityNotFoundError("channel", "Authorized youtube account haven't uploaded videos.")
+
+    return channel_resource["items"][0]["contentDetails"]["relatedPlaylists"]["uploads"]
+
+
+async def fetchVideoDetails(http_client: httpx.AsyncClient, credentials: dict, video_ids: list, priority: int = INTERACTIVE) -> dict:
+    """Fetches details of up to VIDEOS_PAGE_SIZE videos in a single videos call.
+
+    Args:
+        http_client (httpx.AsyncClient): Client sending the request.
+        credentials (dict): Authorization credentials for accessing channel data.
+        video_ids (list): Video ids.
+        priority (int, optional): INTERACTIVE or BACKGROUND, see requestApi. Defaults to INTERACTIVE.
+
+    Raises:
+        YouTubeApiError: If api responds with an error status.
+
+    Returns:
+        dict: Video id -> video data, in order of video_ids (deleted or private videos are left out).
+    """
 
     params = {
-        "part": "snippet,contentDetails,statistics",
-        "id": video_ids,
+        "part": "snippet,statistics",
+        "id": ",".join(video_ids),
+        "maxResults": VIDEOS_PAGE_SIZE,
         "key": KEY
     }
-    
-    async with httpx.AsyncClient() as client:
-        response = await client.get(request_uri, params = params, headers = headers)
-    
-    # fails when quota exceeds or access token expires
-    if response.status_code == 403:
-        raise QuotaExceededError("Request quota exceeded for the day.")
-    
-    elif response.status_code == 401:
-        raise AccessTokenExpiredError("Current access token expired, get a fresh one.")
-    
-    video_details = response.json()
-    
+    response = await requestApi(http_client, "GET", "videos", credentials, params, priority)
+
+    if response.status_code == 404:
+        raise YouTubeApiError(404, f"Videos lookup failed. HTTP 404: {response.text}")
+
+    videos = {data["id"]: data for data in response.json().get("items", [])}
+
     # extract required video data
     video_data = {}
-    
-    for data in video_details["items"]:
-        video_data[data["id"]] = {
-            "id": data["id"],
+
+    for video_id in video_ids:
+        if video_id not in videos:
+            continue
+
+        data = videos[video_id]
+        statistics = data.get("statistics", {})
+
+        # like / comment counts are missing when hidden or disabled on a video
+        video_data[video_id] = {
+            "id": video_id,
             "title": data["snippet"]["title"],
-            "views": data["statistics"]["viewCount"],
-            "likes": data["statistics"]["likeCount"],
-            "comments": data["statistics"]["commentCount"],
+            "views": statistics.get("viewCount", 0),
+            "likes": statistics.get("likeCount", 0),
+            "comments": statistics.get("commentCount", 0),
             "description": data["snippet"]["description"][:100],
             "thumbnail_url": data["snippet"]["thumbnails"]["medium"]["url"]
         }
-    
+
     return video_data
 
 
-async def fetchVideoComments(credentials: dict, video_id: str):
+async def fetchPlaylistPage(http_client: httpx.AsyncClient, credentials: dict, playlist_id: str, page_token: str = "",
+                            priority: int = INTERACTIVE) -> dict:
+    """Fetches a page of up to VIDEOS_PAGE_SIZE video ids of a playlist.
+
+    Args:
+        http_client (httpx.AsyncClient): Client sending the request.
+        credentials (dict): Authorization credentials for accessing channel data.
+        playlist_id (str): Playlist id, e.g. the channel's uploads playlist.
+        page_token (str, optional): Token of the page, empty for the first one. Defaults to "".
+        priority (int, optional): INTERACTIVE or BACKGROUND, see requestApi. Defaults to INTERACTIVE.
+
+    Raises:
+        EntityNotFoundError: If the playlist doesn't exist (uploads playlist of a channel without videos).
+        YouTubeApiError: If api responds with an error status.
+
+    Returns:
+        dict: Video ids of the page, tokens of the previous and next page (None at either end).
+    """
+
+    params = {
+        "part": "contentDetails",
+        "playlistId": playlist_id,
+        "maxResults": VIDEOS_PAGE_SIZE,
+        "pageToken": page_token,
+        "key": KEY
+    }
+    response = await requestApi(http_client, "GET", "playlistItems", credentials, params, priority)
+
+    # uploads playlist of a channel without videos may not exist, a later page missing is an api error
+    if response.status_code == 404:
+        if page_token:
+            raise YouTubeApiError(404, f"Playlist page lookup failed. HTTP 404: {response.text}")
+
+        raise EntityNotFoundError("video", "Authorized youtube account haven't uploaded videos.")
+
+    playlist_page = response.json()
+
+    return {
+        "video_ids": [item["contentDetails"]["videoId"] for item in playlist_page.get("items", [])],
+        "prev_page_token": playlist_page.get("prevPageToken"),
+        "next_page_token": playlist_page.get("nextPageToken")
+    }
+
+
+async def fetchVideoPage(credentials: dict, uploads_playlist_id: str = None, page_token: str = "", priority: int = INTERACTIVE) -> dict:
+    """Fetches data of one page of VIDEOS_PAGE_SIZE videos uploaded by authorized google account, latest first.
+
+    Used where the list is kept in the (cookie) session, which can't hold every upload of a large channel.
+
+    Args:
+        credentials (dict): Authorization credentials for accessing channel data.
+        uploads_playlist_id (str, optional): Uploads playlist id from fetchChannelData, fetched when None. Defaults to None.
+        page_token (str, optional): Token of the page, empty for the latest videos. Defaults to "".
+        priority (int, optional): INTERACTIVE or BACKGROUND, see requestApi. Defaults to INTERACTIVE.
+
+    Raises:
+        QuotaExceededError: If request quota is utilized.
+        AccessTokenExpiredError: If access token in authorization header has expired.
+        EntityNotFoundError: If videos for logged in channel doesn't exist.
+        YouTubeApiError: If api responds with any other error.
+
+    Returns:
+        dict: Video id -> video data of the page ("video_data"), tokens of the previous and next page.
+    """
+
+    async with getClient() as http_client:
+        if not uploads_playlist_id:
+            uploads_playlist_id = await fetchUploadsPlaylistId(http_client, credentials, priority)
+
+        playlist_page = await fetchPlaylistPage(http_client, credentials, uploads_playlist_id, page_token, priority)
+
+        video_data = {}
+        if playlist_page["video_ids"]:
+            video_data = await fetchVideoDetails(http_client, credentials, playlist_page["video_ids"], priority)
+
+    # if no videos uploaded
+    if not page_token and not video_data and not playlist_page["next_page_token"]:
+        raise EntityNotFoundError("video", "Authorized youtube account haven't uploaded videos.")
+
+    return {
+        "video_data": video_data,
+        "prev_page_token": playlist_page["prev_page_token"],
+        "next_page_token": playlist_page["next_page_token"]
+    }
+
+
+async def fetchVideoData(credentials: dict, uploads_playlist_id: str = None, priority: int = INTERACTIVE) -> dict:
+    """Fetches data of all videos uploaded by authorized google account, latest first.
+
+    Video ids are listed page by page from the channel's uploads playlist (1 quota unit per page, unlike 100 of
+    search) and the details of each page are looked up concurrently while the next page is listed.
+
+    Args:
+        credentials (dict): Authorization credentials for accessing channel data.
+        uploads_playlist_id (str, optional): Uploads playlist id from fetchChannelData, fetched when None. Defaults to None.
+        priority (int, optional): INTERACTIVE or BACKGROUND, see requestApi. Defaults to INTERACTIVE.
+
+    Raises:
+        QuotaExceededError: If request quota is utilized.
+        AccessTokenExpiredError: If access token in authorization header has expired.
+        EntityNotFoundError: If videos for logged in channel doesn't exist.
+        YouTubeApiError: If api responds with any other error.
+
+    Returns:
+        dict: Video id -> video data for every video of the user.
+    """
+
+    async with getClient() as http_client:
+        if not uploads_playlist_id:
+            uploads_playlist_id = await fetchUploadsPlaylistId(http_client, credentials, priority)
+
+        lookups = []
+        page_token = ""
+
+        try:
+            while True:
+                playlist_page = await fetchPlaylistPage(http_client, credentials, uploads_playlist_id, page_token, priority)
+
+                if playlist_page["video_ids"]:
+                    lookups.append(asyncio.ensure_future(
+                        fetchVideoDetails(http_client, credentials, playlist_page["video_ids"], priority)
+                    ))
+
+                page_token = playlist_page["next_page_token"]
+                if not page_token:
+                    break
+
+            pages = await asyncio.gather(*lookups)
+
+        finally:
+            # don't leave lookups running when listing or another lookup failed
+            for lookup in lookups:
+                lookup.cancel()
+
+    video_data = {}
+    for page in pages:
+        video_data.update(page)
+
+    # if no videos uploaded
+    if not video_data:
+        raise EntityNotFoundError("video", "Authorized youtube account haven't uploaded videos.")
+
+    return video_data
+
+
+async def fetchVideoComments(credentials: dict, video_id: str, priority: int = INTERACTIVE):
     """Generator function fetches comments for given youtube video id.
 
+    All pages are fetched over the same pooled connection.
+
     Args:
         credentials (dict): Authorization credentials for accessing channel data.
         video_id (str): Video id corresponding to which fetch comments.
+        priority (int, optional): INTERACTIVE or BACKGROUND, see requestApi. Defaults to INTERACTIVE.
 
     Raises:
         QuotaExceededError: If request quota is utilized.
@@ -165,168 +456,135 @@ async def fetchVideoComments(credentials: dict, video_id: str):
     Returns:
         AsyncGenerator: An async generator object which can be iterated over to get dict containing comments data for specified video.
     """
-    
+
     pageToken = ""
-    
-    request_uri = "https://www.googleapis.com/youtube/v3/commentThreads"
-    
-    headers = {
-        "Authorization": f"Bearer {credentials['access_token']}",
-        "Accept": "application/json"
-    }
-    
-    # yt api allows fetching only 100 comments at a time hence repeat to fetch all comments
-    while True:
-        params = {
-            "part": "snippet",
-            "maxResults": 100,
-            "pageToken": pageToken,
-            "videoId": video_id,
-            "textFormat": "plainText",
-            "moderationStatus": "published",  # ✅ Only visible comments
-            "key": KEY
-        }
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(request_uri, params = params, headers = headers)
-        
-        # fails when quota exceeds or access token expires
-        if response.status_code == 403:
-            raise QuotaExceededError("Request quota exceeded for the day.")
-        
-        elif response.status_code == 401:
-            raise AccessTokenExpiredError("Current access token expired, get a fresh one.")
-        
-        comment_threads = response.json()
-        
-        # if there are no comments posted
-        if "items" not in comment_threads or len(comment_threads["items"]) == 0:
-            raise EntityNotFoundError("comment_thread", "Selected video doesn't have any comments")
-        
-        comment_dict = {"id": [], "comment_text": []}
-        for comment in comment_threads["items"]:
-            comment_dict["id"].append(comment['snippet']['topLevelComment']['id'])
-            comment_dict["comment_text"].append(comment['snippet']['topLevelComment']['snippet']['textDisplay'])
-        
-        # send data to analysis view and go to next iteration if possible
-        yield comment_dict
-        
-        if "nextPageToken" in comment_threads:
-            pageToken = comment_threads["nextPageToken"]
-        else:
-            break
-        
-        
-# app/library/youtube_sync.py
-import os
-import requests
-from typing import List
 
-# import your exception types (fallback to Exception if not defined)
-try:
-    from app.exceptions import AccessTokenExpiredError, QuotaExceededError
-except Exception:
-    AccessTokenExpiredError = Exception
-    QuotaExceededError = Exception
+    async with getClient() as http_client:
 
-_OAUTH_TOKEN_URL = "https://oauth2.googleapis.com/token"
-_CLIENT_ID = os.getenv("CLIENT_ID")
-_CLIENT_SECRET = os.getenv("CLIENT_SECRET")
+        # yt api allows fetching only 100 comments at a time hence repeat to fetch all comments
+        while True:
+            params = {
+                "part": "snippet",
+                "maxResults": 100,
+                "pageToken": pageToken,
+                "videoId": video_id,
+                "textFormat": "plainText",
+                "moderationStatus": "published",  # ✅ Only visible comments
+                "key": KEY
+            }
 
+            with STAGE_SECONDS.time(stage = "fetch_comments"):
+                response = await requestApi(http_client, "GET", "commentThreads", credentials, params, priority)
 
-async def rejectComments(credentials: dict, toxic_ids: List[str]) -> None:
-    """
-    Set moderation status of toxic comment ids to 'rejected'.
-    Wrapper around sync implementation for backward compatibility.
-    """
-    # Run sync function in thread pool to avoid blocking event loop
-    import asyncio
-    loop = asyncio.get_running_loop()
-    await loop.run_in_executor(None, lambda: reject_comments_sync(credentials, toxic_ids))
+            comment_threads = response.json()
 
-def reject_comments_sync(credentials: dict, toxic_ids: List[str]) -> None:
-    """
-    Set moderation status of toxic comment ids to 'rejected' (synchronous).
-    Updates credentials['access_token'] in-place if refresh occurs.
+            # if there are no comments posted
+            if "items" not in comment_threads or len(comment_threads["items"]) == 0:
+                raise EntityNotFoundError("comment_thread", "Selected video doesn't have any comments")
+
+            comment_dict = {"id": [], "comment_text": []}
+            for comment in comment_threads["items"]:
+                comment_dict["id"].append(comment['snippet']['topLevelComment']['id'])
+                comment_dict["comment_text"].append(comment['snippet']['topLevelComment']['snippet']['textDisplay'])
+
+            # send data to analysis view and go to next iteration if possible
+            yield comment_dict
+
+            if "nextPageToken" in comment_threads:
+                pageToken = comment_threads["nextPageToken"]
+            else:
+                break
+
+
+async def refreshAccessToken(http_client: httpx.AsyncClient, credentials: dict) -> None:
+    """Gets a fresh access token with the refresh token, credentials are updated in-place so the caller can persist them.
+
+    Args:
+        http_client (httpx.AsyncClient): Client sending the request.
+        credentials (dict): Authorization credentials containing the refresh token.
 
     Raises:
-      - QuotaExceededError for 403
-      - AccessTokenExpiredError for 401 and refresh failures
-      - Exception for other unexpected failures (includes API response text)
+        AccessTokenExpiredError: If there is no refresh token or refreshing fails.
     """
-    if not toxic_ids:
-        return
 
-    request_uri = "https://www.googleapis.com/youtube/v3/comments/setModerationStatus"
-    params = {
-        "id": ",".join(str(i) for i in toxic_ids),
-        "moderationStatus": "rejected",
+    if not credentials.get("refresh_token"):
+        raise AccessTokenExpiredError("Current access token expired and no refresh token available.")
+
+    if not CLIENT_ID or not KEY:
+        raise AccessTokenExpiredError("CLIENT_ID/CLIENT_SECRET missing; cannot refresh token.")
+
+    token_payload = {
+        "grant_type": "refresh_token",
+        "refresh_token": credentials["refresh_token"],
+        "client_id": CLIENT_ID,
+        "client_secret": KEY,
     }
 
-    def _do_request(access_token: str):
-        headers = {"Authorization": f"Bearer {access_token}", "Accept": "application/json"}
-        resp = requests.post(request_uri, params=params, headers=headers, timeout=30)
-        return resp
+    response = await http_client.post(OAUTH_TOKEN_URL, data = token_payload)
+    if response.status_code != 200 or "access_token" not in response.json():
+        raise AccessTokenExpiredError(f"Token refresh failed: {response.status_code} - {response.text}")
+
+    token_json = response.json()
+    credentials["access_token"] = token_json["access_token"]
+    for field in ("expires_in", "scope"):
+        if field in token_json:
+            credentials[field] = token_json[field]
 
-    access_token = credentials.get("access_token")
-    if not access_token:
-        raise AccessTokenExpiredError("No access_token in credentials.")
 
-    print(f"DEBUG: Rejecting IDs: {toxic_ids}")
-    # 1) Try with current access token
-    resp = _do_request(access_token)
-    print(f"DEBUG: Reject Response ({resp.status_code}): {resp.text}")
+async def rejectComments(credentials: dict, toxic_ids: list, priority: int = INTERACTIVE) -> None:
+    """Sets moderation status of toxic comment ids to 'rejected'.
 
-    if resp.status_code in (200, 204):
+    Ids are sent in batches of MODERATION_BATCH_SIZE, concurrently over the pooled client. When the access token
+    expires, it is refreshed once (credentials are updated in-place) and only the batches that failed are sent again.
+
+    Args:
+        credentials (dict): Authorization credentials for accessing channel data.
+        toxic_ids (list): Comment ids to reject.
+        priority (int, optional): INTERACTIVE or BACKGROUND, see requestApi. Defaults to INTERACTIVE.
+
+    Raises:
+        QuotaExceededError: If request quota is utilized.
+        AccessTokenExpiredError: If access token expired and couldn't be refreshed.
+        YouTubeApiError: If api responds with any other error.
+    """
+
+    if not toxic_ids:
         return
 
-    if resp.status_code == 403:
-        # 403 could be quota or insufficient permission
-        raise QuotaExceededError(f"403 Forbidden: {resp.text}")
+    if not credentials.get("access_token"):
+        raise AccessTokenExpiredError("No access_token in credentials.")
 
-    if resp.status_code == 401:
-        # Try refresh if refresh_token is available
-        refresh_token = credentials.get("refresh_token")
-        if not refresh_token:
-            raise AccessTokenExpiredError(f"401 Unauthorized and no refresh_token available. Response: {resp.text}")
+    batches = [toxic_ids[start:start + MODERATION_BATCH_SIZE] for start in range(0, len(toxic_ids), MODERATION_BATCH_SIZE)]
 
-        if not _CLIENT_ID or not _CLIENT_SECRET:
-            raise AccessTokenExpiredError("CLIENT_ID/CLIENT_SECRET missing; cannot refresh token.")
+    async def rejectBatches(http_client: httpx.AsyncClient, batches: list) -> list:
+        """Sends the batches concurrently and returns the ones that failed with an expired token."""
 
-        token_payload = {
-            "grant_type": "refresh_token",
-            "refresh_token": refresh_token,
-            "client_id": _CLIENT_ID,
-            "client_secret": _CLIENT_SECRET,
-        }
+        async def rejectBatch(comment_ids: list) -> None:
+            params = {
+                "id": ",".join(str(comment_id) for comment_id in comment_ids),
+                "moderationStatus": "rejected",
+            }
+            response = await requestApi(http_client, "POST", "comments/setModerationStatus", credentials, params, priority)
 
-        token_resp = requests.post(_OAUTH_TOKEN_URL, data=token_payload, timeout=30)
-        if token_resp.status_code != 200:
-            raise AccessTokenExpiredError(f"Token refresh failed: {token_resp.status_code} - {token_resp.text}")
+            if response.status_code == 404:
+                raise YouTubeApiError(404, f"Failed to set moderation. HTTP 404: {response.text}")
 
-        token_json = token_resp.json()
-        new_access_token = token_json.get("access_token")
-        if not new_access_token:
-            raise AccessTokenExpiredError(f"Refresh response missing access_token: {token_resp.text}")
+        # every batch runs to completion, so that the expired ones are known and none is left running
+        results = await asyncio.gather(*(rejectBatch(batch) for batch in batches), return_exceptions = True)
 
-        # Update credentials dict in-place so caller (session/db) can persist it if needed
-        credentials["access_token"] = new_access_token
-        if "expires_in" in token_json:
-            credentials["expires_in"] = token_json["expires_in"]
-        if "scope" in token_json:
-            credentials["scope"] = token_json["scope"]
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, AccessTokenExpiredError):
+                raise result
 
-        # 2) Retry moderation with refreshed token
-        retry_resp = _do_request(new_access_token)
-        if retry_resp.status_code in (200, 204):
-            return
+        return [batch for batch, result in zip(batches, results) if isinstance(result, AccessTokenExpiredError)]
 
-        if retry_resp.status_code == 403:
-            raise QuotaExceededError(f"403 after refresh: {retry_resp.text}")
-        if retry_resp.status_code == 401:
-            raise AccessTokenExpiredError(f"401 after refresh: {retry_resp.text}")
+    async with getClient() as http_client:
+        expired = await rejectBatches(http_client, batches)
 
-        raise Exception(f"Failed to set moderation after refresh. HTTP {retry_resp.status_code}: {retry_resp.text}")
+        if expired:
+            # batches accepted with the old token cost 50 units each, don't send them twice
+            await refreshAccessToken(http_client, credentials)
+            expired = await rejectBatches(http_client, expired)
 
-    # other unexpected errors
-    raise Exception(f"Failed to set moderation. HTTP {resp.status_code}: {resp.text}")
+        if expired:
+            raise AccessTokenExpiredError("Access token expired again after refreshing it.")
@@ -1,11 +1,44 @@
 """Machine learning modules helping to predict classes."""
 
+import importlib
 import os
 
 # paths
 pretrained_path = os.path.join(os.path.dirname(__file__), "model_hub/pretrained/bert-base-uncased")
 fine_tuned_path = os.path.join(os.path.dirname(__file__), "model_hub/fine_tuned/toxic_model.pth")
+fine_tuned_safetensors_path = os.path.join(os.path.dirname(__file__), "model_hub/fine_tuned/toxic_model.safetensors")
+onnx_path = os.path.join(os.path.dirname(__file__), "model_hub/fine_tuned/toxic_model.onnx")
+first_stage_path = os.path.join(os.path.dirname(__file__), "model_hub/fine_tuned/first_stage.npz")
 
-# useful functions for easy access
-from .data_loader import load_tokeninzer
-from .make_predictions import predict, load_model
\ No newline at end of file
+# useful functions for easy access, their modules (and numpy, pandas, tokenizers, torch behind them)
+# are imported on first use so that importing the package stays cheap
+_exports = {
+    "load_tokeninzer": "data_loader",
+    "PredictionResult": "results",
+    "DuplicateIndex": "dedup",
+    "predict": "make_predictions",
+    "predict_async": "make_predictions",
+    "predict_iter": "make_predictions",
+    "load_model": "make_predictions",
+    "set_load_error": "make_predictions",
+    "get_engine": "make_predictions",
+    "check_precision": "make_predictions",
+    "cascade_report": "make_predictions",
+    "start_scheduler": "make_predictions",
+    "stop_scheduler": "make_predictions",
+    "start_worker_pool": "make_predictions",
+    "stop_worker_pool": "make_predictions",
+}
+
+__all__ = list(_exports)
+
+
+def __getattr__(name: str):
+    if name in _exports:
+        return getattr(importlib.import_module(f".{_exports[name]}", __name__), name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list:
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,147 @@
+import numpy as np
+
+from .data_loader import encode_comments, batch_encodings, BATCH_SIZE
+from app.config import LABELS
+from app.library.metrics import STAGE_SECONDS, BATCHES, CACHE_HITS, CACHE_MISSES
+
+# (batch size, sequence length) pairs run once at startup, covering the common bucket shapes
+WARMUP_SHAPES = [(BATCH_SIZE, 16), (BATCH_SIZE, 32), (BATCH_SIZE, 64), (1, 16)]
+
+
+class BaseEngine:
+    """Backend independent part of an inference engine: tokenization, bucketing, thresholds and warmup.
+
+    Subclasses implement `_run_batch` for a specific runtime (PyTorch, ONNX Runtime).
+    """
+
+    def __init__(self, batch_size: int = BATCH_SIZE, threshold: float = 0.5, precision: str = "fp32") -> None:
+        """Constructor for the class.
+
+        Args:
+            batch_size (int, optional): Maximum no. of comments in a forward pass. Defaults to BATCH_SIZE.
+            threshold (float or np.ndarray, optional): Probability (per class) above which a class is activated. Defaults to 0.5.
+            precision (str, optional): Precision mode of the model. Defaults to "fp32".
+        """
+
+        self.batch_size = batch_size
+        self.threshold = threshold
+        self.precision = precision
+
+        # optional PredictionCache, only cache misses reach the model
+        self.cache = None
+
+    def _run_batch(self, ids: np.ndarray, mask: np.ndarray, token_type_ids: np.ndarray) -> np.ndarray:
+        """Runs a single forward pass on int64 arrays of shape (batch, sequence) and returns class probabilities."""
+
+        raise NotImplementedError
+
+    def warmup(self, shapes: list = WARMUP_SHAPES) -> None:
+        """Runs forward passes on dummy inputs so kernels, allocator pools and thread pools are initialized before first request.
+
+        Args:
+            shapes (list, optional): (batch size, sequence length) pairs to run. Defaults to WARMUP_SHAPES.
+        """
+
+        for batch_size, seq_len in shapes:
+            ids = np.zeros((batch_size, seq_len), dtype=np.int64)
+            self._run_batch(ids, np.ones_like(ids), np.zeros_like(ids))
+
+    def predict_proba(self, texts: list) -> np.ndarray:
+        """Predicts class probabilities of the comments, serving repeated comments from the prediction cache if attached.
+
+        Args:
+            texts (list): Comment texts.
+
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), len(LABELS)), rows in the order of texts.
+        """
+
+        if self.cache is None:
+            return self._predict_proba(texts)
+
+        probs, missed = self.lookup_cache(texts)
+
+        if missed:
+            self.fill_cache(probs, missed, self._predict_proba([texts[positions[0]] for _, positions in missed]))
+
+        return probs
+
+    def lookup_cache(self, texts: list) -> tuple:
+        """Splits comments into rows served from the prediction cache and unique comments that still need the model.
+
+        Copies of the same comment within a call are grouped so that they run through the model once.
+
+        Args:
+            texts (list): Comment texts.
+
+        Returns:
+            tuple: (float32 probability matrix with cached rows filled, list of (cache key, positions) for every unique miss).
+        """
+
+        if self.cache is None:
+            return np.zeros((len(texts), len(LABELS)), dtype=np.float32), [(None, [position]) for position in range(len(texts))]
+
+        keys = [self.cache.key(text) for text in texts]
+        probs, misses = self.cache.lookup(keys)
+
+        missed = {}
+        for position in misses:
+            missed.setdefault(keys[position], []).append(position)
+
+        CACHE_HITS.inc(len(texts) - len(misses))
+        CACHE_MISSES.inc(len(missed))
+
+        return probs, list(missed.items())
+
+    def fill_cache(self, probs: np.ndarray, missed: list, missed_probs: np.ndarray) -> None:
+        """Fans model outputs of the unique misses out to their positions and stores them in the prediction cache.
+
+        Args:
+            probs (np.ndarray): Probability matrix returned by lookup_cache, filled in place.
+            missed (list): (cache key, positions) pairs returned by lookup_cache.
+            missed_probs (np.ndarray): Model outputs in the order of missed.
+        """
+
+        for (_, positions), row in zip(missed, missed_probs):
+            probs[positions] = row
+
+        if self.cache is not None:
+            self.cache.store([key for key, _ in missed], missed_probs)
+
+    def _predict_proba(self, texts: list) -> np.ndarray:
+        """Runs the model on every comment, see predict_proba."""
+
+        return self.run_encoded(encode_comments(texts))
+
+    def run_encoded(self, input_ids: list, batch_size: int = None) -> np.ndarray:
+        """Runs the model on already tokenized comments.
+
+        Args:
+            input_ids (list): Unpadded token ids as returned by encode_comments.
+            batch_size (int, optional): Maximum no. of comments in a forward pass. Defaults to the engine's batch_size.
+
+        Returns:
+            np.ndarray: float32 array of shape (len(input_ids), len(LABELS)), rows in the order of input_ids.
+        """
+
+        probs = np.zeros((len(input_ids), len(LABELS)), dtype=np.float32)
+
+        for batch in batch_encodings(input_ids, batch_size or self.batch_size):
+            with STAGE_SECONDS.time(stage="forward"):
+                probs[batch['index']] = self._run_batch(batch['ids'], batch['mask'], batch['token_type_ids'])
+
+            BATCHES.inc()
+
+        return probs
+
+    def predict(self, texts: list) -> np.ndarray:
+        """Predicts classes of the comments.
+
+        Args:
+            texts (list): Comment texts.
+
+        Returns:
+            np.ndarray: Boolean array of shape (len(texts), len(LABELS)), True where a class is activated.
+        """
+
+        return self.predict_proba(texts) >= self.threshold
@@ -0,0 +1,174 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .base_engine import BaseEngine
+from .data_loader import encode_comments
+
+
+class BatchScheduler:
+    """Micro-batching queue in front of an inference engine.
+
+    Tokenized comments of all in-flight requests are collected into rounds bounded by `max_batch_size` comments and
+    `max_wait_ms`. Each round is bucketed by length and run on a single inference thread, every request gets its
+    rows back through a future.
+    """
+
+    def __init__(self, engine: BaseEngine, max_batch_size: int = 256, max_wait_ms: float = 10, forward_batch_size: int = 32) -> None:
+        """Constructor for the class.
+
+        Args:
+            engine (BaseEngine): Engine running the model.
+            max_batch_size (int, optional): Maximum no. of comments collected into a round. Defaults to 256.
+            max_wait_ms (float, optional): Maximum time a round waits for more requests after its first one. Defaults to 10.
+            forward_batch_size (int, optional): Maximum no. of comments in a forward pass within a round. Defaults to 32.
+        """
+
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.forward_batch_size = forward_batch_size
+
+        # one inference thread, rounds run one after another instead of contending for the same cores
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+
+        self.queue = None
+        self.task = None
+
+        # chunks of the round being collected / run, and the chunk left over for the next round
+        self.round = []
+        self.carry = None
+
+    def start(self) -> None:
+        """Starts the scheduling loop on the running event loop."""
+
+        self.queue = asyncio.Queue()
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stops the scheduling loop, pending requests fail with RuntimeError."""
+
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+        pending = self.round + ([self.carry] if self.carry is not None else [])
+        while self.queue is not None and not self.queue.empty():
+            pending.append(self.queue.get_nowait())
+
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Batch scheduler stopped."))
+
+        self.round = []
+        self.carry = None
+
+        self.executor.shutdown(wait=False)
+
+    async def submit(self, texts: list) -> np.ndarray:
+        """Predicts class probabilities of the comments through the shared batching queue.
+
+        Args:
+            texts (list): Comment texts.
+
+        Raises:
+            RuntimeError: If scheduler isn't started.
+
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), len(LABELS)), rows in the order of texts.
+        """
+
+        if self.task is None:
+            raise RuntimeError("Batch scheduler not started. Call start() first.")
+
+        loop = asyncio.get_running_loop()
+
+        # the disk tier of the prediction cache is SQLite, kept off the event loop
+        probs, missed = await loop.run_in_executor(None, self.engine.lookup_cache, texts)
+        if not missed:
+            return probs
+
+        input_ids = await loop.run_in_executor(None, encode_comments, [texts[positions[0]] for _, positions in missed])
+
+        # split large requests so that small ones can share rounds with them instead of waiting behind
+        futures = []
+        for start in range(0, len(input_ids), self.max_batch_size):
+            future = loop.create_future()
+            self.queue.put_nowait((input_ids[start:start + self.max_batch_size], future))
+            futures.append(future)
+
+        missed_probs = np.concatenate(await asyncio.gather(*futures))
+        await loop.run_in_executor(None, self.engine.fill_cache, probs, missed, missed_probs)
+
+        return probs
+
+    async def _next_round(self) -> list:
+        """Collects queued chunks until the round is full or its wait time is over."""
+
+        loop = asyncio.get_running_loop()
+
+        # collected on the instance so that stop() fails them too
+        if self.carry is not None:
+            self.round, self.carry = [self.carry], None
+        else:
+            self.round = [await self.queue.get()]
+
+        items = self.round
+
+        size = len(items[0][0])
+        deadline = loop.time() + self.max_wait
+
+        while size < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+
+            if size + len(item[0]) > self.max_batch_size:
+                self.carry = item
+                break
+
+            items.append(item)
+            size += len(item[0])
+
+        return items
+
+    async def _run(self) -> None:
+        """Scheduling loop, runs rounds on the inference thread and hands results back to the requests."""
+
+        loop = asyncio.get_running_loop()
+
+        while True:
+            items = await self._next_round()
+
+            # requests cancelled meanwhile (client went away) don't need inference
+            items = [(chunk, future) for chunk, future in items if not future.done()]
+            if not items:
+                continue
+
+            merged = [ids for chunk, _ in items for ids in chunk]
+
+            try:
+                probs = await loop.run_in_executor(self.executor, self.engine.run_encoded, merged, self.forward_batch_size)
+            except Exception as error:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+
+            offset = 0
+            for chunk, future in items:
+                if not future.done():
+                    future.set_result(probs[offset:offset + len(chunk)])
+                offset += len(chunk)
+
+            self.round = []
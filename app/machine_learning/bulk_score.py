@@ -0,0 +1,180 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .base_engine import LABELS
+
+CHECKPOINT_FILE = "_checkpoint.json"
+
+
+def read_chunks(path: str, chunk_size: int, skip_chunks: int = 0):
+    """Streams an export in chunks of rows without loading it whole.
+
+    Args:
+        path (str): .csv, .jsonl (or .json with one object per line) or .parquet file.
+        chunk_size (int): Rows per chunk.
+        skip_chunks (int, optional): Chunks already scored, skipped without being yielded. Defaults to 0.
+
+    Raises:
+        ValueError: If file format isn't supported.
+
+    Yields:
+        pd.DataFrame: Rows of every remaining chunk.
+    """
+
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == ".csv":
+        # skipped rows of a csv aren't even parsed
+        reader = pd.read_csv(path, chunksize=chunk_size, skiprows=range(1, skip_chunks * chunk_size + 1))
+        skip_chunks = 0
+
+    elif extension in (".jsonl", ".json"):
+        reader = pd.read_json(path, lines=True, chunksize=chunk_size)
+
+    elif extension == ".parquet":
+        reader = (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size))
+
+    else:
+        raise ValueError(f"Unsupported input format {extension!r}, expected .csv, .jsonl or .parquet.")
+
+    for index, chunk in enumerate(reader):
+        if index >= skip_chunks:
+            yield chunk
+
+
+def load_checkpoint(output_dir: str, run: dict) -> tuple:
+    """Returns the progress of a previous run with the same arguments.
+
+    Args:
+        output_dir (str): Output directory of the run.
+        run (dict): Input file and chunking identifying the run.
+
+    Raises:
+        ValueError: If output directory holds a run of another input or chunking.
+
+    Returns:
+        tuple: (finished chunks, scored rows), zeros for a new run.
+    """
+
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return 0, 0
+
+    with open(path) as file:
+        checkpoint = json.load(file)
+
+    if checkpoint["run"] != run:
+        raise ValueError(f"{output_dir} holds scores of another input or chunk size, use a new output directory.")
+
+    return checkpoint["chunks"], checkpoint["rows"]
+
+
+def save_checkpoint(output_dir: str, run: dict, chunks: int, rows: int) -> None:
+    """Records finished chunks, written to a temporary file and renamed so a kill never leaves it half written."""
+
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+
+    with open(path + ".tmp", "w") as file:
+        json.dump({"run": run, "chunks": chunks, "rows": rows}, file)
+
+    os.replace(path + ".tmp", path)
+
+
+def to_table(result) -> pa.Table:
+    """Columnar output of a chunk: comment id, one probability column per class and the packed label bitmask."""
+
+    columns = {"id": pa.array(result.ids.astype(str))}
+    columns.update({label: pa.array(result.probs[:, index]) for index, label in enumerate(LABELS)})
+    columns["labels"] = pa.array(result.labels)
+
+    return pa.table(columns)
+
+
+def score_file(input_path: str, output_dir: str, chunk_size: int = 50_000, id_column: str = "id", text_column: str = "comment_text") -> int:
+    """Scores an export chunk by chunk with the loaded model, writing every chunk to its own Parquet part file.
+
+    Finished chunks are recorded in a checkpoint, a killed run started again with the same arguments resumes after
+    the last finished chunk instead of starting over.
+
+    Args:
+        input_path (str): .csv, .jsonl or .parquet export.
+        output_dir (str): Directory receiving part-NNNNN.parquet files and the checkpoint.
+        chunk_size (int, optional): Rows per chunk / part file. Defaults to 50_000.
+        id_column (str, optional): Column with comment ids, row numbers are used when it's missing. Defaults to "id".
+        text_column (str, optional): Column with comment texts. Defaults to "comment_text".
+
+    Returns:
+        int: Total no. of rows scored (including previous runs).
+    """
+
+    from .make_predictions import predict
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    stat = os.stat(input_path)
+    run = {"input": os.path.abspath(input_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "chunk_size": chunk_size}
+
+    done, rows = load_checkpoint(output_dir, run)
+    if done:
+        print(f"Resuming after {done} chunks ({rows} rows).")
+
+    for index, chunk in enumerate(read_chunks(input_path, chunk_size, skip_chunks=done), start=done):
+        start = time.perf_counter()
+
+        ids = chunk[id_column] if id_column in chunk else pd.RangeIndex(rows, rows + len(chunk))
+        comments = pd.DataFrame({"id": np.asarray(ids), "comment_text": chunk[text_column].fillna("").astype(str).to_numpy()})
+
+        # part file is renamed into place before the checkpoint moves past it
+        part_path = os.path.join(output_dir, f"part-{index:05d}.parquet")
+        pq.write_table(to_table(predict(comments)), part_path + ".tmp")
+        os.replace(part_path + ".tmp", part_path)
+
+        rows += len(chunk)
+        save_checkpoint(output_dir, run, index + 1, rows)
+
+        elapsed = time.perf_counter() - start
+        print(f"chunk {index}: {len(chunk)} rows in {elapsed:.1f}s ({len(chunk) / elapsed:.0f} comments/s), {rows} total")
+
+    return rows
+
+
+if __name__ == "__main__":
+    from .data_loader import load_tokeninzer
+    from .make_predictions import load_model, get_engine, start_worker_pool, stop_worker_pool
+    from app.config import MODEL_PRECISION, MODEL_BACKEND
+
+    parser = argparse.ArgumentParser(description="Score a comment export (csv, jsonl or parquet) into parquet part files.")
+    parser.add_argument("input", help=".csv, .jsonl or .parquet file")
+    parser.add_argument("output", help="directory for parquet part files and the checkpoint")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="rows per chunk / part file")
+    parser.add_argument("--id-column", default="id")
+    parser.add_argument("--text-column", default="comment_text")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="worker processes (torch backend)")
+    parser.add_argument("--precision", default=MODEL_PRECISION, help="fp32, int8 or bf16")
+    parser.add_argument("--backend", default=MODEL_BACKEND, help="torch or onnx")
+    parser.add_argument("--no-cache", action="store_true", help="skip the prediction cache, exports are rarely seen twice")
+    args = parser.parse_args()
+
+    load_tokeninzer()
+    load_model(args.precision, args.backend)
+
+    if args.no_cache:
+        get_engine().cache = None
+
+    # the onnx runtime parallelizes a single session itself
+    if args.backend == "torch" and args.processes > 1:
+        start_worker_pool(args.processes)
+
+    try:
+        total = score_file(args.input, args.output, args.chunk_size, args.id_column, args.text_column)
+        print(f"Scored {total} comments into {args.output}")
+
+    finally:
+        stop_worker_pool()
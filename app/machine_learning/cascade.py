@@ -0,0 +1,282 @@
+import re
+import threading
+import zlib
+
+import numpy as np
+
+from .base_engine import LABELS
+
+# comments without any word character once urls are removed can't be toxic to the model
+URL_PATTERN = re.compile(r"(?:https?://|www\.)\S+", re.IGNORECASE)
+WORD_PATTERN = re.compile(r"\w")
+
+# no. of hashed feature buckets of the first stage
+N_FEATURES = 1 << 18
+
+
+def rule_label(text: str) -> str:
+    """Fast path for comments the model always considers clean.
+
+    Args:
+        text (str): Comment text.
+
+    Returns:
+        str: "empty", "url" (only links), "emoji" (only emoji / punctuation) or None if no rule applies.
+    """
+
+    text = str(text)
+    if not text.strip():
+        return "empty"
+
+    without_urls = URL_PATTERN.sub(" ", text)
+    if WORD_PATTERN.search(without_urls):
+        return None
+
+    return "url" if without_urls.strip() == "" else "emoji"
+
+
+def featurize(texts: list) -> tuple:
+    """Hashes word uni/bi-grams and character trigrams of comments into a sparse (CSR) matrix with L2 normalized rows.
+
+    Args:
+        texts (list): Comment texts.
+
+    Returns:
+        tuple: (indptr, indices, values) of the CSR matrix with N_FEATURES columns.
+    """
+
+    indptr = [0]
+    indices = []
+    values = []
+
+    for text in texts:
+        words = " ".join(str(text).split()).lower()
+        tokens = words.split()
+
+        grams = tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+        padded = f" {words} "
+        grams += [f"#{padded[start:start + 3]}" for start in range(len(padded) - 2)]
+
+        buckets = np.fromiter((zlib.crc32(gram.encode()) % N_FEATURES for gram in grams), dtype=np.int64, count=len(grams))
+        buckets, counts = np.unique(buckets, return_counts=True)
+        counts = counts.astype(np.float32)
+
+        indices.append(buckets)
+        values.append(counts / (np.linalg.norm(counts) or 1.0))
+        indptr.append(indptr[-1] + len(buckets))
+
+    return (
+        np.asarray(indptr, dtype=np.int64),
+        np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64),
+        np.concatenate(values) if values else np.zeros(0, dtype=np.float32),
+    )
+
+
+class FirstStage:
+    """Hashed n-gram logistic regression distilled from the fine-tuned model's own outputs."""
+
+    def __init__(self, weights: np.ndarray = None, bias: np.ndarray = None) -> None:
+        """Constructor for the class.
+
+        Args:
+            weights (np.ndarray, optional): Weights of shape (N_FEATURES, len(LABELS)). Defaults to zeros.
+            bias (np.ndarray, optional): Bias of shape (len(LABELS),). Defaults to zeros.
+        """
+
+        self.weights = weights if weights is not None else np.zeros((N_FEATURES, len(LABELS)), dtype=np.float32)
+        self.bias = bias if bias is not None else np.zeros(len(LABELS), dtype=np.float32)
+
+    @classmethod
+    def load(cls, path: str) -> "FirstStage":
+        """Loads weights saved with `save`."""
+
+        with np.load(path) as data:
+            return cls(data["weights"], data["bias"])
+
+    def save(self, path: str) -> None:
+        """Saves weights as a compressed .npz file."""
+
+        np.savez_compressed(path, weights=self.weights, bias=self.bias)
+
+    def _logits(self, indptr: np.ndarray, indices: np.ndarray, values: np.ndarray) -> np.ndarray:
+        rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        logits = np.tile(self.bias, (len(indptr) - 1, 1))
+        np.add.at(logits, rows, self.weights[indices] * values[:, None])
+
+        return logits
+
+    def predict_proba(self, texts: list) -> np.ndarray:
+        """Predicts class probabilities of the comments.
+
+        Args:
+            texts (list): Comment texts.
+
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), len(LABELS)).
+        """
+
+        return (1.0 / (1.0 + np.exp(-self._logits(*featurize(texts))))).astype(np.float32)
+
+    def fit(self, texts: list, targets: np.ndarray, epochs: int = 5, learning_rate: float = 0.5, batch_size: int = 256, seed: int = 0) -> None:
+        """Trains on soft targets (the fine-tuned model's probabilities) with mini-batch SGD on the logistic loss.
+
+        Args:
+            texts (list): Comment texts.
+            targets (np.ndarray): Target probabilities of shape (len(texts), len(LABELS)).
+            epochs (int, optional): Passes over the data. Defaults to 5.
+            learning_rate (float, optional): SGD step size. Defaults to 0.5.
+            batch_size (int, optional): Comments per SGD step. Defaults to 256.
+            seed (int, optional): Shuffling seed. Defaults to 0.
+        """
+
+        rng = np.random.default_rng(seed)
+        targets = np.asarray(targets, dtype=np.float32)
+        texts = list(texts)
+
+        for _ in range(epochs):
+            order = rng.permutation(len(texts))
+
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                indptr, indices, values = featurize([texts[position] for position in batch])
+
+                probs = 1.0 / (1.0 + np.exp(-self._logits(indptr, indices, values)))
+                error = (probs - targets[batch]) / len(batch)
+
+                rows = np.repeat(np.arange(len(batch)), np.diff(indptr))
+                np.add.at(self.weights, indices, -learning_rate * error[rows] * values[:, None])
+                self.bias -= learning_rate * error.sum(axis=0)
+
+
+class Cascade:
+    """Two stage classifier: rule fast paths and the first stage settle confident comments, only ambiguous ones reach the model."""
+
+    def __init__(self, first_stage: FirstStage = None, low: float = 0.05, high: float = 0.95) -> None:
+        """Constructor for the class.
+
+        Args:
+            first_stage (FirstStage, optional): Trained first stage, None applies the rule fast paths only. Defaults to None.
+            low (float, optional): First stage probabilities below this are confident negatives. Defaults to 0.05.
+            high (float, optional): First stage probabilities above this are confident positives. Defaults to 0.95.
+        """
+
+        self.first_stage = first_stage
+        self.low = low
+        self.high = high
+
+        # comments settled by each stage since start, split() runs in several threads at once
+        self.counts = {"empty": 0, "url": 0, "emoji": 0, "first_stage": 0, "model": 0}
+        self.lock = threading.Lock()
+
+    def split(self, texts: list) -> tuple:
+        """Settles comments the rules or the first stage are confident about.
+
+        Args:
+            texts (list): Comment texts.
+
+        Returns:
+            tuple: (float32 probability matrix with settled rows filled, positions of ambiguous comments for the model).
+        """
+
+        probs = np.zeros((len(texts), len(LABELS)), dtype=np.float32)
+        pending = []
+        counts = dict.fromkeys(self.counts, 0)
+
+        for position, text in enumerate(texts):
+            rule = rule_label(text)
+            if rule is None:
+                pending.append(position)
+            else:
+                counts[rule] += 1
+
+        if self.first_stage is not None and pending:
+            first_probs = self.first_stage.predict_proba([texts[position] for position in pending])
+            confident = ((first_probs < self.low) | (first_probs > self.high)).all(axis=1)
+
+            pending = np.asarray(pending)
+            probs[pending[confident]] = first_probs[confident]
+            counts["first_stage"] += int(confident.sum())
+            pending = pending[~confident].tolist()
+
+        counts["model"] += len(pending)
+
+        with self.lock:
+            for stage, count in counts.items():
+                self.counts[stage] += count
+
+        return probs, pending
+
+    def predict_proba(self, texts: list, second_stage) -> np.ndarray:
+        """Predicts class probabilities, running only ambiguous comments through the second stage.
+
+        Args:
+            texts (list): Comment texts.
+            second_stage (callable): Model prediction function taking texts and returning probabilities.
+
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), len(LABELS)).
+        """
+
+        probs, pending = self.split(texts)
+        if pending:
+            probs[pending] = second_stage([texts[position] for position in pending])
+
+        return probs
+
+    def report(self) -> dict:
+        """Fraction of comments handled by each stage, i.e. how much model work the cascade saved.
+
+        Returns:
+            dict: Per stage counts, total and per stage fractions.
+        """
+
+        with self.lock:
+            counts = dict(self.counts)
+
+        total = sum(counts.values())
+        return {
+            "counts": counts,
+            "total": total,
+            "fractions": {stage: (count / total if total else 0.0) for stage, count in counts.items()},
+        }
+
+
+def train_first_stage(texts: list, path: str, epochs: int = 5) -> FirstStage:
+    """Labels comments with the loaded fine-tuned model and distills a first stage from its outputs.
+
+    Args:
+        texts (list): Unlabelled comment texts (e.g. a historical export).
+        path (str): File to save the first stage to.
+        epochs (int, optional): Passes over the data. Defaults to 5.
+
+    Returns:
+        FirstStage: Trained first stage.
+    """
+
+    from .make_predictions import get_engine
+
+    first_stage = FirstStage()
+    first_stage.fit(texts, get_engine().predict_proba(texts), epochs=epochs)
+    first_stage.save(path)
+
+    return first_stage
+
+
+if __name__ == "__main__":
+    import argparse
+    import pandas as pd
+
+    from . import first_stage_path
+    from .data_loader import load_tokeninzer
+    from .make_predictions import load_model
+
+    parser = argparse.ArgumentParser(description="Distill the cascade's first stage from the fine-tuned model.")
+    parser.add_argument("comments", help="CSV file with a comment_text column")
+    parser.add_argument("--output", default=first_stage_path, help="where to save the first stage")
+    parser.add_argument("--epochs", type=int, default=5)
+    args = parser.parse_args()
+
+    load_tokeninzer()
+    load_model()
+    train_first_stage(pd.read_csv(args.comments).comment_text.fillna("").tolist(), args.output, args.epochs)
+    print("Saved first stage to:", args.output)
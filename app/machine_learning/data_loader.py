@@ -1,12 +1,16 @@
 from pathlib import Path
-from transformers import BertTokenizer
-from torch.utils.data import DataLoader
-from .data_class import DetoxDataset
+import numpy as np
+from tokenizers import BertWordPieceTokenizer
+
+from app.library.metrics import STAGE_SECONDS
 
 # parameters for data loader
 MAX_LEN = 200
 BATCH_SIZE = 8
 
+# no. of comments encoded by a single call to the tokenizer
+TOKENIZE_CHUNK = 1024
+
 # build correct local path (relative to this file)
 BASE_DIR = Path(__file__).resolve().parent
 PRETRAINED_DIR = BASE_DIR / "model_hub" / "pretrained" / "bert-base-uncased"
@@ -16,29 +20,86 @@ tokenizer = None
 
 
 def load_tokeninzer() -> None:
-    """Loads BERT Tokenizer from local folder only."""
+    """Loads fast (rust backed) BERT Tokenizer from local folder only.
+
+    The tokenizer is built with the `tokenizers` library directly from vocab.txt (same pipeline as
+    transformers' BertTokenizerFast for bert-base-uncased), which keeps torch out of the import graph.
+    """
     global tokenizer
 
     if not PRETRAINED_DIR.exists():
         raise RuntimeError(f"BERT folder not found at: {PRETRAINED_DIR}")
 
-    tokenizer = BertTokenizer.from_pretrained(
-        PRETRAINED_DIR,
-        local_files_only=True
+    tokenizer = BertWordPieceTokenizer(
+        str(PRETRAINED_DIR / "vocab.txt"),
+        lowercase=True
     )
+    tokenizer.enable_truncation(max_length=MAX_LEN)
+
+
+def encode_comments(comments: list) -> list:
+    """Tokenizes comments in batched calls to the fast tokenizer.
 
+    Whitespace normalization, lower casing and truncation to MAX_LEN happen inside the tokenizer.
 
-def data_loader(data) -> DataLoader:
-    """Creates and returns a DataLoader for inference."""
+    Args:
+        comments (list): Comment texts.
+
+    Returns:
+        list: Unpadded token ids (with special tokens) for every comment.
+    """
     if tokenizer is None:
         raise RuntimeError("Tokenizer not loaded. Call load_tokeninzer() first.")
 
-    inference_set = DetoxDataset(data, tokenizer, MAX_LEN)
+    comments = [str(comment) for comment in comments]
+    input_ids = []
+
+    with STAGE_SECONDS.time(stage="tokenize"):
+        for start in range(0, len(comments), TOKENIZE_CHUNK):
+            encodings = tokenizer.encode_batch(comments[start:start + TOKENIZE_CHUNK])
+            input_ids.extend(encoding.ids for encoding in encodings)
+
+    return input_ids
+
+
+def batch_encodings(input_ids: list, batch_size: int = BATCH_SIZE):
+    """Groups encoded comments into length buckets and pads every batch only to its longest comment.
+
+    Args:
+        input_ids (list): Unpadded token ids as returned by encode_comments.
+        batch_size (int, optional): Maximum no. of comments in a batch. Defaults to BATCH_SIZE.
+
+    Yields:
+        dict: index (positions of the batch rows in input_ids), ids, mask and token_type_ids as int64 NumPy arrays.
+    """
+
+    pad_id = tokenizer.token_to_id("[PAD]") if tokenizer is not None else 0
+
+    lengths = np.fromiter((len(ids) for ids in input_ids), dtype=np.int64, count=len(input_ids))
+    order = np.argsort(lengths, kind="stable")
+
+    for start in range(0, len(order), batch_size):
+        index = order[start:start + batch_size]
+        batch_lengths = lengths[index]
+
+        ids = np.full((len(index), batch_lengths.max()), pad_id, dtype=np.int64)
+        for row, position in enumerate(index):
+            ids[row, :batch_lengths[row]] = input_ids[position]
+
+        mask = (np.arange(ids.shape[1]) < batch_lengths[:, None]).astype(np.int64)
+
+        yield {
+            'index': index,
+            'ids': ids,
+            'mask': mask,
+            'token_type_ids': np.zeros_like(ids)
+        }
+
+
+def data_loader(data):
+    """Tokenizes comments of the DataFrame and returns an iterator over padded inference batches.
 
-    inference_params = {
-        'batch_size': BATCH_SIZE,
-        'shuffle': False,
-        'num_workers': 0
-    }
+    Batches don't follow the order of `data`, use the `index` of every batch to put predictions back in place.
+    """
 
-    return DataLoader(inference_set, **inference_params)
\ No newline at end of file
+    return batch_encodings(encode_comments(data.comment_text.tolist()))
@@ -0,0 +1,217 @@
+import hashlib
+import zlib
+
+import numpy as np
+
+from .prediction_cache import normalize_text
+
+# universal hashing modulus of the MinHash permutations (keeps a * x + b inside int64)
+PRIME = (1 << 31) - 1
+
+
+def shingles(text: str, size: int = 5) -> np.ndarray:
+    """Hashes overlapping character shingles of the normalized comment text.
+
+    Args:
+        text (str): Normalized comment text.
+        size (int, optional): Characters per shingle. Defaults to 5.
+
+    Returns:
+        np.ndarray: int64 shingle hashes, a single one for texts shorter than a shingle.
+    """
+
+    grams = {text[start:start + size] for start in range(max(len(text) - size + 1, 1))}
+    return np.fromiter((zlib.crc32(gram.encode()) % PRIME for gram in grams), dtype=np.int64, count=len(grams))
+
+
+def jaccard(first: np.ndarray, second: np.ndarray) -> float:
+    """Exact Jaccard similarity of two sets of shingle hashes."""
+
+    return len(np.intersect1d(first, second)) / len(np.union1d(first, second))
+
+
+class DuplicateIndex:
+    """Incremental index clustering exact duplicates (normalized text hash) and near-duplicates (MinHash / LSH over
+    character shingles) of comments.
+
+    The first comment of every cluster is its representative. Clusters group copies for moderation (e.g. rejecting a
+    bot raid at once), a near-duplicate can differ from its representative in the one word that matters ("wonderful"
+    / "worthless") so members are still classified on their own.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: int = 16, shingle_size: int = 5, min_length: int = 24, seed: int = 0) -> None:
+        """Constructor for the class.
+
+        Args:
+            threshold (float, optional): Minimum Jaccard similarity of shingles to join a cluster. Defaults to 0.8.
+            num_perm (int, optional): No. of MinHash permutations. Defaults to 64.
+            bands (int, optional): No. of LSH bands, num_perm must be divisible by it. Defaults to 16.
+            shingle_size (int, optional): Characters per shingle. Defaults to 5.
+            min_length (int, optional): Shorter (normalized) comments are only collapsed with exact copies, a few
+                changed characters there often change the meaning. Defaults to 24.
+            seed (int, optional): Seed of the MinHash permutations. Defaults to 0.
+        """
+
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands.")
+
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.min_length = min_length
+
+        rng = np.random.default_rng(seed)
+        self.coef_a = rng.integers(1, PRIME, size=(num_perm, 1), dtype=np.int64)
+        self.coef_b = rng.integers(0, PRIME, size=(num_perm, 1), dtype=np.int64)
+
+        # comment id -> representative id, representative id -> member ids (representative first)
+        self.representative = {}
+        self.members = {}
+
+        # normalized text hash -> representative id (and back), LSH bucket -> representative ids
+        self.exact = {}
+        self.text_hashes = {}
+        self.buckets = {}
+
+        # representative id -> MinHash signature (None for short comments), normalized text
+        self.signatures = {}
+        self.texts = {}
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of the normalized comment text."""
+
+        hashes = (self.coef_a * shingles(text, self.shingle_size) + self.coef_b) % PRIME
+        return hashes.min(axis=1)
+
+    def _bucket_keys(self, signature: np.ndarray) -> list:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def add(self, ids, texts) -> list:
+        """Assigns comments to clusters, comments matching no cluster start a new one.
+
+        Args:
+            ids (array-like): Comment ids.
+            texts (array-like): Comment texts.
+
+        Returns:
+            list: Representative id of every comment, equal to its own id for new clusters.
+        """
+
+        representatives = []
+
+        for comment_id, text in zip(ids, texts):
+            if comment_id in self.representative:
+                representatives.append(self.representative[comment_id])
+                continue
+
+            text = normalize_text(text)
+            text_hash = hashlib.blake2b(text.encode(), digest_size=8).digest()
+            representative = self.exact.get(text_hash)
+
+            if representative is None:
+                signature, bucket_keys = None, []
+                if len(text) >= self.min_length:
+                    signature = self.signature(text)
+                    bucket_keys = self._bucket_keys(signature)
+                    representative = self._nearest(text, bucket_keys)
+
+                if representative is None:
+                    representative = comment_id
+                    self.signatures[comment_id] = signature
+                    self.texts[comment_id] = text
+                    self.members[comment_id] = []
+
+                    for key in bucket_keys:
+                        self.buckets.setdefault(key, []).append(comment_id)
+
+                self.exact[text_hash] = representative
+                self.text_hashes.setdefault(representative, []).append(text_hash)
+
+            self.representative[comment_id] = representative
+            self.members[representative].append(comment_id)
+            representatives.append(representative)
+
+        return representatives
+
+    def _nearest(self, text: str, bucket_keys: list) -> str:
+        """Representative sharing an LSH bucket whose exact similarity passes the threshold, if any."""
+
+        best, best_similarity = None, self.threshold
+        seen = set()
+        text_shingles = shingles(text, self.shingle_size)
+
+        for key in bucket_keys:
+            for candidate in self.buckets.get(key, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+
+                # LSH buckets only preselect, a MinHash estimate from 64 permutations is too coarse to decide on
+                similarity = jaccard(text_shingles, shingles(self.texts[candidate], self.shingle_size))
+                if similarity >= best_similarity:
+                    best, best_similarity = candidate, similarity
+
+        return best
+
+    def discard(self, ids) -> None:
+        """Removes comments (e.g. rejected or deleted ones), a removed representative hands its cluster to the next member.
+
+        Args:
+            ids (array-like): Comment ids.
+        """
+
+        for comment_id in ids:
+            representative = self.representative.pop(comment_id, None)
+            if representative is None:
+                continue
+
+            members = self.members.pop(representative)
+            members.remove(comment_id)
+            if comment_id != representative:
+                self.members[representative] = members
+                continue
+
+            signature = self.signatures.pop(representative)
+            text = self.texts.pop(representative)
+            successor = members[0] if members else None
+
+            for key in (self._bucket_keys(signature) if signature is not None else []):
+                bucket = self.buckets[key]
+                bucket[bucket.index(representative)] = successor
+                if successor is None:
+                    bucket.remove(None)
+                if not bucket:
+                    del self.buckets[key]
+
+            text_hashes = self.text_hashes.pop(representative)
+            for text_hash in text_hashes:
+                if successor is None:
+                    del self.exact[text_hash]
+                else:
+                    self.exact[text_hash] = successor
+
+            if successor is not None:
+                self.text_hashes[successor] = text_hashes
+                self.signatures[successor] = signature
+                self.texts[successor] = text
+                self.members[successor] = members
+                for member in members:
+                    self.representative[member] = successor
+
+    def clusters(self, min_size: int = 2) -> list:
+        """Clusters with at least min_size members, largest first.
+
+        Args:
+            min_size (int, optional): Minimum no. of members. Defaults to 2.
+
+        Returns:
+            list: Dicts with the representative id, its normalized text, size and member ids.
+        """
+
+        clusters = [
+            {"id": representative, "comment_text": self.texts[representative], "size": len(members), "member_ids": list(members)}
+            for representative, members in self.members.items() if len(members) >= min_size
+        ]
+
+        return sorted(clusters, key=lambda cluster: cluster["size"], reverse=True)
@@ -0,0 +1,112 @@
+import os
+
+import numpy as np
+import torch
+from transformers.modeling_utils import no_init_weights
+
+from .base_engine import BaseEngine
+from .data_loader import BATCH_SIZE
+from .model_class import DetoxClass
+from .precision import apply_precision
+from .weights import convert_weights, load_weights
+from . import fine_tuned_path, fine_tuned_safetensors_path
+
+
+def set_thread_counts(intra_op_threads: int = 0, inter_op_threads: int = 0) -> None:
+    """Pins torch intra-op and inter-op thread pool sizes. Zero leaves torch defaults untouched.
+
+    Args:
+        intra_op_threads (int, optional): Threads used inside a single operator (matmul, softmax). Defaults to 0.
+        inter_op_threads (int, optional): Threads used to run independent operators in parallel. Defaults to 0.
+    """
+
+    if intra_op_threads > 0:
+        torch.set_num_threads(intra_op_threads)
+
+    if inter_op_threads > 0:
+        try:
+            torch.set_num_interop_threads(inter_op_threads)
+        except RuntimeError:
+            # inter-op pool can only be sized once, before any parallel work started
+            pass
+
+
+def load_detox_model(device: str = 'cpu') -> DetoxClass:
+    """Builds DetoxClass from config.json and loads fine-tuned weights into it.
+
+    Weights are read once, from the pre-remapped safetensors file via a memory map, and assigned to the model
+    without copies. The file is converted from the .pth checkpoint on first use
+    (or ahead of time with `python -m app.machine_learning.weights`).
+
+    Args:
+        device (str, optional): Device to move the model to. Defaults to 'cpu'.
+
+    Returns:
+        DetoxClass: Fine-tuned model in evaluation mode.
+    """
+
+    # (re)convert when missing or older than the checkpoint
+    if not os.path.exists(fine_tuned_safetensors_path) or (
+        os.path.exists(fine_tuned_path) and os.path.getmtime(fine_tuned_path) > os.path.getmtime(fine_tuned_safetensors_path)
+    ):
+        convert_weights(fine_tuned_path, fine_tuned_safetensors_path)
+
+    # parameters are only allocated (not randomly initialized), they get replaced by the loaded weights
+    with no_init_weights():
+        model = DetoxClass()
+
+    model.load_state_dict(load_weights(fine_tuned_safetensors_path), assign=True)
+    model.to(device)
+    model.eval()
+
+    return model
+
+
+def build_engine(precision: str = "fp32") -> "InferenceEngine":
+    """Loads fine-tuned model and wraps it in a PyTorch inference engine at given precision.
+
+    Args:
+        precision (str, optional): One of "fp32", "int8" (dynamic quantization of Linear layers) or "bf16" (autocast). Defaults to "fp32".
+
+    Returns:
+        InferenceEngine: Engine owning the fine-tuned model.
+    """
+
+    # loads model to GPU if available else on CPU
+    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+
+    model, precision = apply_precision(load_detox_model(device), precision, device)
+
+    return InferenceEngine(model, device, precision=precision)
+
+
+class InferenceEngine(BaseEngine):
+    """Owns the fine-tuned DetoxClass model and runs gradient free inference on it with PyTorch."""
+
+    def __init__(self, model: torch.nn.Module, device: str = 'cpu', batch_size: int = BATCH_SIZE, threshold: float = 0.5, precision: str = "fp32") -> None:
+        """Constructor for the class. Moves model to device and switches it to evaluation mode once.
+
+        Args:
+            model (torch.nn.Module): Fine-tuned DetoxClass model with weights loaded (already quantized for int8).
+            device (str, optional): Device to run inference on. Defaults to 'cpu'.
+            batch_size (int, optional): Maximum no. of comments in a forward pass. Defaults to BATCH_SIZE.
+            threshold (float, optional): Probability above which a class is activated. Defaults to 0.5.
+            precision (str, optional): Precision mode of the model, bf16 runs forward pass under autocast. Defaults to "fp32".
+        """
+
+        super().__init__(batch_size, threshold, precision)
+
+        self.device = device
+        self.model = model.to(device)
+        self.model.eval()
+
+    def _run_batch(self, ids: np.ndarray, mask: np.ndarray, token_type_ids: np.ndarray) -> np.ndarray:
+        """Runs a single forward pass and returns class probabilities."""
+
+        ids = torch.from_numpy(ids).to(self.device)
+        mask = torch.from_numpy(mask).to(self.device)
+        token_type_ids = torch.from_numpy(token_type_ids).to(self.device)
+
+        with torch.inference_mode(), torch.autocast("cpu", dtype=torch.bfloat16, enabled=self.precision == "bf16"):
+            outputs = self.model(ids, mask, token_type_ids)
+            return torch.sigmoid(outputs).float().cpu().numpy()
@@ -1,83 +1,295 @@
-import torch
+import asyncio
+import os
+import threading
+from collections import deque
 import numpy as np
 import pandas as pd
-from .model_class import DetoxClass
-from .data_loader import data_loader
-from . import fine_tuned_path
+from .base_engine import BaseEngine, LABELS
+from .batching import BatchScheduler
+from .cascade import Cascade, FirstStage
+from .results import PredictionResult
+from .prediction_cache import PredictionCache, model_version
+from . import fine_tuned_path, onnx_path, first_stage_path
+from app.library.metrics import COMMENTS_PROCESSED
+from app.config import (
+    INTRA_OP_THREADS, INTER_OP_THREADS, MODEL_PRECISION, MODEL_BACKEND,
+    PREDICTION_CACHE_PATH, PREDICTION_CACHE_ITEMS, PREDICTION_CACHE_MB,
+    BATCH_MAX_COMMENTS, BATCH_MAX_WAIT_MS, BATCH_FORWARD_SIZE, WORKER_PROCESSES, CLASS_THRESHOLDS,
+    MODEL_LOAD_TIMEOUT, CASCADE_ENABLED, CASCADE_BAND
+)
 
+# global inference engine instance
+engine = None
 
-def load_model() -> None:
-    """Loads fine-tuned model for prediction."""
-    
-    global device, model
-    
-    model = DetoxClass()
+# set once load_model finished (or failed), the model may be loaded by a background warm-up
+model_loaded = threading.Event()
+
+# exception of a failed load, requests then fail right away instead of waiting for the model
+model_load_error = None
+
+# global micro-batching scheduler, shared by concurrent requests
+scheduler = None
+
+# global multi-process worker pool, None runs inference in this process
+worker_pool = None
+
+# global cascade settling easy comments before the model, None sends every comment to the model
+cascade = None
+
+
+def load_model(precision: str = MODEL_PRECISION, backend: str = MODEL_BACKEND) -> None:
+    """Loads fine-tuned model for prediction and warms up the inference engine.
+
+    Backend modules are imported here so that workers running the onnx backend never import torch.
+
+    Args:
+        precision (str, optional): Precision mode of the torch backend: fp32, int8 or bf16. Defaults to MODEL_PRECISION from config.
+        backend (str, optional): Runtime executing the model: torch or onnx. Defaults to MODEL_BACKEND from config.
+    """
     
-    # loads model to GPU if available else on CPU
-    device = 'cpu' 
-    if torch.cuda.is_available():
-        device = 'cuda'
-        state_dict = torch.load(fine_tuned_path)
+    global engine, cascade, model_load_error
+
+    if backend == "onnx":
+        from .onnx_backend import OnnxEngine
+
+        engine = OnnxEngine(intra_op_threads=INTRA_OP_THREADS, inter_op_threads=INTER_OP_THREADS)
+
     else:
-        state_dict = torch.load(fine_tuned_path, map_location=device)
-        
-    # Rename keys to match DetoxClass definition
-    new_state_dict = {}
-    for key, value in state_dict.items():
-        new_key = key
-        if key.startswith("bert."):
-            new_key = key.replace("bert.", "l1.", 1)
-        elif key.startswith("classifier."):
-            new_key = key.replace("classifier.", "l3.", 1)
-        new_state_dict[new_key] = value
-        
-    model.load_state_dict(new_state_dict)
-    model.to(device)
-
-
-def predict(data: pd.DataFrame) -> pd.DataFrame:
+        from .inference_engine import build_engine, set_thread_counts
+
+        set_thread_counts(INTRA_OP_THREADS, INTER_OP_THREADS)
+        engine = build_engine(precision)
+
+    engine.threshold = np.asarray(CLASS_THRESHOLDS, dtype = np.float32)
+
+    # cache entries are tied to the exact weights, runtime and precision producing them
+    weights_path = onnx_path if backend == "onnx" else fine_tuned_path
+    engine.cache = PredictionCache(
+        model_version(backend, engine.precision, weights_path=weights_path),
+        path=PREDICTION_CACHE_PATH or None,
+        memory_items=PREDICTION_CACHE_ITEMS,
+        disk_bytes=PREDICTION_CACHE_MB * 1024 * 1024
+    )
+
+    if CASCADE_ENABLED:
+        first_stage = FirstStage.load(first_stage_path) if os.path.exists(first_stage_path) else None
+        cascade = Cascade(first_stage, *CASCADE_BAND)
+
+    engine.warmup()
+    model_load_error = None
+    model_loaded.set()
+
+
+def set_load_error(error: BaseException) -> None:
+    """Records that loading the model failed, requests waiting for it (and later ones) fail instead of timing out.
+
+    Args:
+        error (BaseException): Exception raised while loading.
+    """
+
+    global model_load_error
+
+    model_load_error = error
+    model_loaded.set()
+
+
+def check_precision(texts: list, precision: str) -> dict:
+    """Measures what a reduced precision mode gives up against fp32 on a held-out sample of comments.
+
+    Args:
+        texts (list): Held-out comment texts.
+        precision (str): Precision mode to evaluate.
+
+    Returns:
+        dict: Accuracy delta, throughput and weight size report, see precision.accuracy_delta.
+    """
+
+    from .inference_engine import build_engine
+    from .precision import accuracy_delta
+
+    return accuracy_delta(build_engine("fp32"), build_engine(precision), texts)
+
+
+def get_engine() -> BaseEngine:
+    """Returns the loaded inference engine.
+
+    Raises:
+        RuntimeError: If model is not loaded yet.
+
+    Returns:
+        BaseEngine: Engine owning the fine-tuned model.
+    """
+
+    if engine is None:
+        raise RuntimeError("Model not loaded. Call load_model() first.")
+
+    return engine
+
+
+def cascade_report() -> dict:
+    """Returns the fraction of comments handled by each cascade stage, see Cascade.report.
+
+    Returns:
+        dict: Per stage counts and fractions, empty if the cascade is disabled.
+    """
+
+    return cascade.report() if cascade is not None else {}
+
+
+def start_worker_pool(processes: int = WORKER_PROCESSES) -> None:
+    """Starts worker processes each loading the model (weights file mapped, not copied), predictions are then sharded across them.
+
+    Args:
+        processes (int, optional): No. of worker processes, 0 keeps inference in this process. Defaults to WORKER_PROCESSES from config.
+    """
+
+    global worker_pool
+
+    if processes > 0:
+        from .worker_pool import WorkerPool
+
+        worker_pool = WorkerPool(get_engine(), processes)
+
+
+def stop_worker_pool() -> None:
+    """Stops the worker processes."""
+
+    global worker_pool
+
+    if worker_pool is not None:
+        worker_pool.close()
+        worker_pool = None
+
+
+def start_scheduler() -> None:
+    """Starts the micro-batching scheduler on the running event loop (call from an async startup hook)."""
+
+    global scheduler
+
+    scheduler = BatchScheduler(get_engine(), BATCH_MAX_COMMENTS, BATCH_MAX_WAIT_MS, BATCH_FORWARD_SIZE)
+    scheduler.start()
+
+
+async def stop_scheduler() -> None:
+    """Stops the micro-batching scheduler."""
+
+    global scheduler
+
+    if scheduler is not None:
+        await scheduler.stop()
+        scheduler = None
+
+
+def to_result(data: pd.DataFrame, probs: np.ndarray) -> PredictionResult:
+    """Wraps class probabilities of the comments in a columnar result with the engine's per class thresholds.
+
+    Args:
+        data (pd.DataFrame): DataFrame containing comments.
+        probs (np.ndarray): Class probabilities in the order of data.
+
+    Returns:
+        PredictionResult: Predictions for comments.
+    """
+
+    return PredictionResult(data.id.to_numpy(), probs, get_engine().threshold)
+
+
+def predict(data: pd.DataFrame) -> PredictionResult:
     """Predics classes of the comments.
 
     Args:
         data (pd.DataFrame): DataFrame containing comments.
 
     Returns:
-        pandas DataFrame: DataFrame containing predicted class for comments.
+        PredictionResult: Probabilities and packed labels for comments.
     """
 
-    # get data loader
-    inference_loader = data_loader(data)
-    
-    # set model to evaluation (inference) mode
-    model.eval()
-    comment_id = []
-    preds = []
-    
-    # iterate over every batch of dataset using data loader and make predictions
-    for _, data in enumerate(inference_loader, 0):
+    runner = worker_pool or get_engine()
+    texts = data.comment_text.tolist()
+    COMMENTS_PROCESSED.inc(len(texts))
 
-        comment_id.extend(data['comment_id'])
+    if cascade is None:
+        return to_result(data, runner.predict_proba(texts))
 
-        ids = data['ids'].to(device, dtype = torch.long)
-        mask = data['mask'].to(device, dtype = torch.long)
-        token_type_ids = data['token_type_ids'].to(device, dtype = torch.long)
+    return to_result(data, cascade.predict_proba(texts, runner.predict_proba))
 
-        outputs = model(ids, mask, token_type_ids)
-        preds.extend(torch.sigmoid(outputs).cpu().detach().numpy().tolist())
 
-    # activate a class if logit value crosses threshold
-    preds = np.array(preds) >= 0.5
-    
-    predictions = {
-        'id': comment_id,
-        'labels': [pred for pred in preds]
-    }
-
-    # convert dict to pandas DataFrame
-    predictions = pd.DataFrame.from_dict(predictions)
-    labels = ['Toxic', 'Severe Toxic', 'Obscene', 'Threat', 'Insult', 'Identity Hate']
-    predictions[labels] = pd.DataFrame(predictions.labels.tolist(), index = predictions.index)
-    predictions.drop(columns=['labels'], axis=1, inplace=True)
-    predictions.replace({False: 0, True: 1}, inplace=True)
-
-    return predictions
\ No newline at end of file
+async def predict_async(data: pd.DataFrame) -> PredictionResult:
+    """Predicts classes of the comments without blocking the event loop.
+
+    Goes through the worker pool when started (sharding the comments across processes), else through the
+    micro-batching scheduler when started, so concurrent requests share forward passes.
+
+    Args:
+        data (pd.DataFrame): DataFrame containing comments.
+
+    Raises:
+        RuntimeError: If loading the model failed.
+
+    Returns:
+        PredictionResult: Probabilities and packed labels for comments.
+    """
+
+    # requests arriving during background warm-up wait for the model instead of failing
+    if not model_loaded.is_set():
+        await asyncio.to_thread(model_loaded.wait, MODEL_LOAD_TIMEOUT)
+
+    if model_load_error is not None:
+        raise RuntimeError("Model failed to load, see the startup log.") from model_load_error
+
+    texts = data.comment_text.tolist()
+    engine = get_engine()
+    COMMENTS_PROCESSED.inc(len(texts))
+
+    if not texts:
+        return to_result(data, np.zeros((0, len(LABELS)), dtype = np.float32))
+
+    # featurizing and scoring comments in the cascade is python work, it runs in a thread next to the model call
+    if worker_pool is not None or scheduler is None:
+        runner = worker_pool or engine
+
+        if cascade is None:
+            return to_result(data, await asyncio.to_thread(runner.predict_proba, texts))
+
+        return to_result(data, await asyncio.to_thread(cascade.predict_proba, texts, runner.predict_proba))
+
+    # comments settled by the cascade never reach the scheduler
+    if cascade is None:
+        return to_result(data, await scheduler.submit(texts))
+
+    probs, pending = await asyncio.to_thread(cascade.split, texts)
+    if pending:
+        probs[pending] = await scheduler.submit([texts[position] for position in pending])
+
+    return to_result(data, probs)
+
+
+async def predict_iter(pages, max_in_flight: int = 4):
+    """Streams predictions for pages of comments while later pages are still being produced (e.g. downloaded).
+
+    Every page is handed to predict_async as soon as it arrives, fetching the next page overlaps with its inference.
+
+    Args:
+        pages (AsyncIterable): Async iterable of DataFrames containing comments.
+        max_in_flight (int, optional): Maximum no. of pages being classified at once, bounds memory. Defaults to 4.
+
+    Yields:
+        PredictionResult: Predictions of every page, in the order of pages.
+    """
+
+    in_flight = deque()
+
+    try:
+        async for page in pages:
+            in_flight.append(asyncio.ensure_future(predict_async(page)))
+
+            # hand out results that are already done, wait only when too many pages are queued
+            while in_flight and (in_flight[0].done() or len(in_flight) >= max_in_flight):
+                yield await in_flight.popleft()
+
+        while in_flight:
+            yield await in_flight.popleft()
+
+    finally:
+        for task in in_flight:
+            task.cancel()
@@ -1,18 +1,27 @@
-from transformers import BertModel
+from transformers import BertConfig, BertModel
 from torch.nn import Module, Dropout, Linear
 import os
 
 class DetoxClass(Module):
-    def __init__(self):
+    def __init__(self, pretrained: bool = False):
+        """Constructor for the model.
+
+        Args:
+            pretrained (bool, optional): Initialize BERT from pretrained weights (for training). By default only
+                config.json is read, the fine-tuned weights are loaded afterwards. Defaults to False.
+        """
         super().__init__()
 
         BASE_DIR = os.path.dirname(__file__)
         LOCAL_BERT = os.path.join(BASE_DIR, "model_hub", "pretrained", "bert-base-uncased")
 
-        self.l1 = BertModel.from_pretrained(
-            LOCAL_BERT,
-            local_files_only=True   # 🔥 prevents trying to download from internet
-        )
+        if pretrained:
+            self.l1 = BertModel.from_pretrained(
+                LOCAL_BERT,
+                local_files_only=True   # 🔥 prevents trying to download from internet
+            )
+        else:
+            self.l1 = BertModel(BertConfig.from_pretrained(LOCAL_BERT, local_files_only=True))
 
         self.l2 = Dropout(0.3)
         self.l3 = Linear(768, 6)
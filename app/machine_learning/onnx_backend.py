@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+import onnxruntime as ort
+
+from .base_engine import BaseEngine
+from .data_loader import BATCH_SIZE
+from . import onnx_path
+
+
+def export_onnx(path: str = onnx_path, opset_version: int = 17) -> str:
+    """Exports fine-tuned DetoxClass (after key remapping) to an ONNX graph with dynamic batch and sequence axes.
+
+    Needs torch, only run it on a build machine, inference workers only need onnxruntime.
+
+    Args:
+        path (str, optional): Output file. Defaults to onnx_path.
+        opset_version (int, optional): ONNX opset to target. Defaults to 17.
+
+    Returns:
+        str: Path of the exported graph.
+    """
+
+    import torch
+    from .inference_engine import load_detox_model
+
+    model = load_detox_model('cpu')
+
+    dummy = torch.ones((2, 16), dtype=torch.long)
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in ("ids", "mask", "token_type_ids")}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    torch.onnx.export(
+        model,
+        (dummy, dummy, torch.zeros_like(dummy)),
+        path,
+        input_names=["ids", "mask", "token_type_ids"],
+        output_names=["logits"],
+        dynamic_axes=dynamic_axes,
+        opset_version=opset_version,
+        dynamo=False    # torchscript exporter, traces BERT's attention mask handling faithfully
+    )
+
+    return path
+
+
+class OnnxEngine(BaseEngine):
+    """Runs the exported toxicity classifier with ONNX Runtime (fused attention, graph optimizations), without importing torch."""
+
+    def __init__(self, path: str = onnx_path, batch_size: int = BATCH_SIZE, threshold: float = 0.5, intra_op_threads: int = 0, inter_op_threads: int = 0) -> None:
+        """Constructor for the class. Creates an optimized CPU inference session.
+
+        Args:
+            path (str, optional): Exported ONNX graph. Defaults to onnx_path.
+            batch_size (int, optional): Maximum no. of comments in a forward pass. Defaults to BATCH_SIZE.
+            threshold (float, optional): Probability above which a class is activated. Defaults to 0.5.
+            intra_op_threads (int, optional): Threads used inside a single operator (0 keeps onnxruntime default). Defaults to 0.
+            inter_op_threads (int, optional): Threads used to run independent operators in parallel (0 keeps onnxruntime default). Defaults to 0.
+
+        Raises:
+            RuntimeError: If graph hasn't been exported yet.
+        """
+
+        if not os.path.exists(path):
+            raise RuntimeError(f"ONNX model not found at: {path}. Run `python -m app.machine_learning.onnx_backend` to export it.")
+
+        super().__init__(batch_size, threshold)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+
+        self.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+
+    def _run_batch(self, ids: np.ndarray, mask: np.ndarray, token_type_ids: np.ndarray) -> np.ndarray:
+        """Runs a single forward pass and returns class probabilities."""
+
+        (logits,) = self.session.run(None, {"ids": ids, "mask": mask, "token_type_ids": token_type_ids})
+        return (1.0 / (1.0 + np.exp(-logits))).astype(np.float32)
+
+
+if __name__ == "__main__":
+    print("Exported ONNX model to:", export_onnx())
@@ -0,0 +1,109 @@
+import io
+import time
+import warnings
+
+import numpy as np
+import torch
+
+from .base_engine import LABELS
+
+# supported reduced precision modes for CPU inference
+PRECISIONS = ("fp32", "int8", "bf16")
+
+
+def bf16_supported() -> bool:
+    """Checks whether the CPU has native bfloat16 instructions (AVX512-BF16 or AMX).
+
+    Returns:
+        bool: True if bfloat16 autocast is worth enabling.
+    """
+
+    try:
+        return torch.cpu._is_avx512_bf16_supported() or torch.cpu._is_amx_tile_supported()
+    except AttributeError:
+        return False
+
+
+def apply_precision(model: torch.nn.Module, precision: str, device: str = 'cpu') -> tuple:
+    """Prepares model for inference at given precision.
+
+    int8 applies dynamic quantization to every Linear layer (weights stored as int8, activations quantized on the fly).
+    bf16 keeps fp32 weights, the engine runs the forward pass under bfloat16 autocast.
+
+    Args:
+        model (torch.nn.Module): Fine-tuned model with fp32 weights loaded.
+        precision (str): One of PRECISIONS.
+        device (str, optional): Device the model will run on. Defaults to 'cpu'.
+
+    Raises:
+        ValueError: If precision is unknown.
+
+    Returns:
+        tuple: (model, precision) where precision is the mode actually applied.
+    """
+
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}.")
+
+    if precision != "fp32" and device != 'cpu':
+        warnings.warn(f"{precision} inference is only supported on CPU, using fp32.")
+        return model, "fp32"
+
+    if precision == "int8":
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    elif precision == "bf16" and not bf16_supported():
+        warnings.warn("CPU doesn't support bfloat16 natively, using fp32.")
+        return model, "fp32"
+
+    return model, precision
+
+
+def model_size(model: torch.nn.Module) -> int:
+    """Serialized size of model weights (includes packed quantized weights).
+
+    Returns:
+        int: Size in bytes.
+    """
+
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.getbuffer().nbytes
+
+
+def accuracy_delta(reference, candidate, texts: list) -> dict:
+    """Compares predictions of a reduced precision engine against the fp32 engine on a held-out sample.
+
+    Args:
+        reference (InferenceEngine): fp32 engine.
+        candidate (InferenceEngine): Reduced precision engine.
+        texts (list): Held-out comment texts.
+
+    Returns:
+        dict: Probability error, label agreement (overall and per class), throughput and weight size of both engines.
+    """
+
+    start = time.perf_counter()
+    reference_probs = reference.predict_proba(texts)
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    candidate_probs = candidate.predict_proba(texts)
+    candidate_time = time.perf_counter() - start
+
+    error = np.abs(reference_probs - candidate_probs)
+    agreement = (reference_probs >= reference.threshold) == (candidate_probs >= candidate.threshold)
+
+    return {
+        "precision": candidate.precision,
+        "samples": len(texts),
+        "max_abs_error": float(error.max(initial=0.0)),
+        "mean_abs_error": float(error.mean()) if len(texts) else 0.0,
+        "label_agreement": float(agreement.all(axis=1).mean()) if len(texts) else 1.0,
+        "class_agreement": dict(zip(LABELS, agreement.mean(axis=0).tolist())) if len(texts) else {},
+        "flipped_comments": int((~agreement).any(axis=1).sum()),
+        "fp32_comments_per_sec": len(texts) / reference_time if reference_time else 0.0,
+        "comments_per_sec": len(texts) / candidate_time if candidate_time else 0.0,
+        "fp32_weight_bytes": model_size(reference.model),
+        "weight_bytes": model_size(candidate.model),
+    }
@@ -0,0 +1,193 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from .base_engine import LABELS
+
+
+def normalize_text(text: str) -> str:
+    """Normalizes comment text so trivially different copies share a cache entry.
+
+    The model is uncased and its tokenizer collapses whitespace, so this normalization never changes a prediction.
+
+    Args:
+        text (str): Comment text.
+
+    Returns:
+        str: Lower cased text with whitespace collapsed.
+    """
+
+    return " ".join(str(text).split()).lower()
+
+
+def model_version(*parts, weights_path: str = None) -> str:
+    """Builds a version string identifying a model, cache entries of other versions are never served.
+
+    Args:
+        *parts: Anything else changing predictions (backend, precision).
+        weights_path (str, optional): Weights file, identified by its name, size and modification time. Defaults to None.
+
+    Returns:
+        str: Short version string.
+    """
+
+    parts = [str(part) for part in parts]
+
+    if weights_path and os.path.exists(weights_path):
+        stat = os.stat(weights_path)
+        parts.append(f"{os.path.basename(weights_path)}:{stat.st_size}:{stat.st_mtime_ns}")
+
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+
+
+class PredictionCache:
+    """Two tier (in-process LRU + on-disk SQLite) cache of class probabilities keyed by normalized comment text and model version."""
+
+    def __init__(self, version: str, path: str = None, memory_items: int = 100_000, disk_bytes: int = 256 * 1024 * 1024) -> None:
+        """Constructor for the class.
+
+        Args:
+            version (str): Model version, part of every key.
+            path (str, optional): SQLite file of the disk tier, None disables it. Defaults to None.
+            memory_items (int, optional): Maximum entries kept in the in-process LRU tier. Defaults to 100_000.
+            disk_bytes (int, optional): Size above which least recently used disk entries are evicted. Defaults to 256MB.
+        """
+
+        self.version = version
+        self.memory_items = memory_items
+        self.disk_bytes = disk_bytes
+
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        self.db = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+            self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS predictions (key BLOB PRIMARY KEY, probs BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS predictions_last_used ON predictions (last_used)")
+
+    def key(self, text: str) -> bytes:
+        """Content address of a comment for the current model version."""
+
+        return hashlib.sha1(f"{self.version}\0{normalize_text(text)}".encode()).digest()
+
+    def lookup(self, keys: list) -> tuple:
+        """Looks keys up, memory tier first then disk tier. Disk hits are promoted to memory.
+
+        Args:
+            keys (list): Keys built with `key`.
+
+        Returns:
+            tuple: (float32 probability matrix with rows of hits filled, list of positions that missed).
+        """
+
+        probs = np.zeros((len(keys), len(LABELS)), dtype=np.float32)
+        pending = {}
+
+        with self.lock:
+            for position, key in enumerate(keys):
+                row = self.memory.get(key)
+                if row is None:
+                    pending.setdefault(key, []).append(position)
+                else:
+                    self.memory.move_to_end(key)
+                    probs[position] = row
+
+            if pending and self.db is not None:
+                found = self._disk_get(list(pending))
+                for key, row in found.items():
+                    probs[pending.pop(key)] = row
+                    self._memory_put(key, row)
+
+            misses = sorted(position for positions in pending.values() for position in positions)
+
+            self.hits += len(keys) - len(misses)
+            self.misses += len(misses)
+
+        return probs, misses
+
+    def store(self, keys: list, probs: np.ndarray) -> None:
+        """Stores probabilities in both tiers.
+
+        Args:
+            keys (list): Keys built with `key`.
+            probs (np.ndarray): float32 probability rows in the order of keys.
+        """
+
+        probs = np.asarray(probs, dtype=np.float32)
+
+        with self.lock:
+            for key, row in zip(keys, probs):
+                self._memory_put(key, row.copy())
+
+            if self.db is not None:
+                now = time.time()
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO predictions (key, probs, last_used) VALUES (?, ?, ?)",
+                    [(key, row.tobytes(), now) for key, row in zip(keys, probs)]
+                )
+                self._disk_evict()
+
+    def _memory_put(self, key: bytes, row: np.ndarray) -> None:
+        self.memory[key] = row
+        self.memory.move_to_end(key)
+
+        while len(self.memory) > self.memory_items:
+            self.memory.popitem(last=False)
+
+    def _disk_get(self, keys: list) -> dict:
+        found = {}
+
+        # stay below sqlite's bound variable limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.db.execute(f"SELECT key, probs FROM predictions WHERE key IN ({placeholders})", chunk).fetchall()
+            found.update((key, np.frombuffer(blob, dtype=np.float32)) for key, blob in rows)
+
+        if found:
+            self.db.executemany("UPDATE predictions SET last_used = ? WHERE key = ?", [(time.time(), key) for key in found])
+
+        return found
+
+    def _disk_evict(self) -> None:
+        """Drops least recently used rows until the used pages of the database fit into disk_bytes."""
+
+        page_size = self.db.execute("PRAGMA page_size").fetchone()[0]
+        page_count = self.db.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = self.db.execute("PRAGMA freelist_count").fetchone()[0]
+
+        used_bytes = (page_count - free_pages) * page_size
+        if used_bytes <= self.disk_bytes:
+            return
+
+        rows = self.db.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+        # evict proportionally to the overshoot plus 10% headroom, freed pages get reused by later inserts
+        evict = max(1, int(rows * (1 - self.disk_bytes / used_bytes)) + rows // 10)
+        self.db.execute(
+            "DELETE FROM predictions WHERE key IN (SELECT key FROM predictions ORDER BY last_used LIMIT ?)", (evict,)
+        )
+
+    def stats(self) -> dict:
+        """Hit/miss counters since the cache was created.
+
+        Returns:
+            dict: hits, misses and entries held in memory.
+        """
+
+        return {"hits": self.hits, "misses": self.misses, "memory_entries": len(self.memory)}
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+from .base_engine import LABELS
+
+# bit of every class in the packed label mask
+CLASS_BITS = (1 << np.arange(len(LABELS))).astype(np.uint8)
+
+
+class PredictionResult:
+    """Columnar predictions of a set of comments.
+
+    Holds comment ids, a float32 probability matrix and a packed per-comment label bitmask (bit k set when class k
+    crosses its threshold), so that toxic ids and class counts are single NumPy operations.
+    """
+
+    def __init__(self, ids, probs: np.ndarray, thresholds=0.5) -> None:
+        """Constructor for the class.
+
+        Args:
+            ids (array-like): Comment ids.
+            probs (np.ndarray): Class probabilities of shape (len(ids), len(LABELS)).
+            thresholds (float or array-like, optional): Per class probability above which a class is activated. Defaults to 0.5.
+        """
+
+        self.ids = np.asarray(ids, dtype=object)
+        self.probs = np.asarray(probs, dtype=np.float32).reshape(len(self.ids), len(LABELS))
+        self.thresholds = np.broadcast_to(np.asarray(thresholds, dtype=np.float32), (len(LABELS),)).copy()
+
+        self.labels = np.packbits(self.probs >= self.thresholds, axis=1, bitorder="little").ravel()
+
+    @classmethod
+    def empty_result(cls, thresholds=0.5) -> "PredictionResult":
+        """Result without any comment."""
+
+        return cls([], np.zeros((0, len(LABELS)), dtype=np.float32), thresholds)
+
+    @classmethod
+    def concat(cls, results: list) -> "PredictionResult":
+        """Joins results row-wise, thresholds of the first non-empty result are kept.
+
+        Args:
+            results (list): PredictionResult objects.
+
+        Returns:
+            PredictionResult: Rows of all results in order.
+        """
+
+        if not results:
+            return cls.empty_result()
+
+        thresholds = next((result.thresholds for result in results if not result.empty), results[0].thresholds)
+
+        return cls(
+            np.concatenate([result.ids for result in results]),
+            np.concatenate([result.probs for result in results]),
+            thresholds
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.ids) == 0
+
+    def take(self, positions) -> "PredictionResult":
+        """Selects rows by position (or boolean mask)."""
+
+        return PredictionResult(self.ids[positions], self.probs[positions], self.thresholds)
+
+    def reindex(self, ids) -> "PredictionResult":
+        """Selects rows in the order of given ids, ids without a prediction are skipped and duplicates keep their first row.
+
+        Args:
+            ids (array-like): Comment ids.
+
+        Returns:
+            PredictionResult: Rows of given ids.
+        """
+
+        position = {}
+        for row, comment_id in enumerate(self.ids):
+            position.setdefault(comment_id, row)
+
+        return self.take(np.array([position[comment_id] for comment_id in ids if comment_id in position], dtype=np.int64))
+
+    def class_mask(self, label: str) -> np.ndarray:
+        """Boolean mask of comments in a class."""
+
+        return (self.labels & CLASS_BITS[LABELS.index(label)]) != 0
+
+    def toxic_ids(self) -> list:
+        """Comment ids with at least one class activated."""
+
+        return self.ids[self.labels != 0].tolist()
+
+    def class_counts(self) -> dict:
+        """No. of comments in every class."""
+
+        counts = np.unpackbits(self.labels[:, None], axis=1, count=len(LABELS), bitorder="little").sum(axis=0)
+        return dict(zip(LABELS, counts.tolist()))
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame with comment ids and one 0/1 column per class, for display."""
+
+        frame = pd.DataFrame(
+            np.unpackbits(self.labels[:, None], axis=1, count=len(LABELS), bitorder="little"), columns=LABELS
+        )
+        frame.insert(0, "id", self.ids)
+
+        return frame
@@ -0,0 +1,75 @@
+import os
+
+import torch
+from safetensors.torch import load_file, save_file
+
+from . import fine_tuned_path, fine_tuned_safetensors_path
+
+
+def remap_keys(state_dict: dict) -> dict:
+    """Renames keys of the fine-tuned checkpoint (bert. / classifier.) to match DetoxClass definition (l1. / l3.).
+
+    Args:
+        state_dict (dict): Checkpoint state dict.
+
+    Returns:
+        dict: State dict with DetoxClass keys.
+    """
+
+    new_state_dict = {}
+    for key, value in state_dict.items():
+        new_key = key
+        if key.startswith("bert."):
+            new_key = key.replace("bert.", "l1.", 1)
+        elif key.startswith("classifier."):
+            new_key = key.replace("classifier.", "l3.", 1)
+        new_state_dict[new_key] = value
+
+    return new_state_dict
+
+
+def convert_weights(source: str = fine_tuned_path, target: str = fine_tuned_safetensors_path) -> str:
+    """Converts the fine-tuned .pth checkpoint into a pre-remapped safetensors file (one time step).
+
+    The file is written next to the target and renamed into place, so that workers converting at the same time never
+    map a half written file.
+
+    Args:
+        source (str, optional): Fine-tuned checkpoint. Defaults to fine_tuned_path.
+        target (str, optional): Output file. Defaults to fine_tuned_safetensors_path.
+
+    Returns:
+        str: Path of the safetensors file.
+    """
+
+    state_dict = remap_keys(torch.load(source, map_location='cpu'))
+
+    temporary = f"{target}.{os.getpid()}.tmp"
+    try:
+        save_file({key: value.contiguous() for key, value in state_dict.items()}, temporary)
+        os.replace(temporary, target)
+
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+    return target
+
+
+def load_weights(path: str = fine_tuned_safetensors_path) -> dict:
+    """Loads a safetensors file as tensors backed by a memory map of it, without reading or copying the weights.
+
+    Pages are read lazily on first access and stay shared with the page cache (and with other processes mapping the file).
+
+    Args:
+        path (str, optional): safetensors file. Defaults to fine_tuned_safetensors_path.
+
+    Returns:
+        dict: State dict of tensors backed by the file mapping.
+    """
+
+    return load_file(path)
+
+
+if __name__ == "__main__":
+    print("Converted fine-tuned weights to:", convert_weights())
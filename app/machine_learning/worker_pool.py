@@ -0,0 +1,126 @@
+import math
+import multiprocessing
+import os
+
+import numpy as np
+import torch
+
+from .inference_engine import InferenceEngine
+from app.library.metrics import registry
+
+# engine of a worker process, built by its initializer
+_engine = None
+
+# smallest shard worth sending to a worker
+MIN_SHARD_SIZE = 64
+
+
+def _init_worker(threads: int, precision: str) -> None:
+    """Initializer run once in every worker process: sizes torch threads, then loads tokenizer and model."""
+
+    global _engine
+
+    from .data_loader import load_tokeninzer
+    from .inference_engine import build_engine
+
+    torch.set_num_threads(threads)
+
+    load_tokeninzer()
+    _engine = build_engine(precision)
+
+
+def _predict_shard(texts: list) -> tuple:
+    """Runs the worker's engine on a shard of comments inside a worker process.
+
+    Returns:
+        tuple: (probabilities, metrics observed while running the shard, merged into the parent's metrics).
+    """
+
+    registry.reset()
+    probs = _engine._predict_proba(texts)
+
+    return probs, registry.snapshot()
+
+
+class WorkerPool:
+    """Pool of worker processes each running its own DetoxClass model.
+
+    Workers are started through a forkserver rather than forked from the web process, whose torch thread pools,
+    executors and batching thread would leave locks held in the children. Every worker maps the same safetensors
+    weights file, so fp32 weights are shared through the page cache instead of being read N times. Tokenization
+    and the forward pass of different shards then run in parallel, outside of the parent's GIL.
+    """
+
+    def __init__(self, engine: InferenceEngine, processes: int = None, threads_per_worker: int = None) -> None:
+        """Constructor for the class. Starts the worker processes, each loads the model at the engine's precision.
+
+        Args:
+            engine (InferenceEngine): Loaded PyTorch engine, its prediction cache stays in the parent.
+            processes (int, optional): No. of worker processes. Defaults to no. of CPUs.
+            threads_per_worker (int, optional): torch intra-op threads of every worker. Defaults to CPUs / processes.
+
+        Raises:
+            TypeError: If engine isn't a PyTorch engine.
+            RuntimeError: If platform can't start processes through a forkserver.
+        """
+
+        if not isinstance(engine, InferenceEngine):
+            raise TypeError("Worker pool loads PyTorch weights in every worker and needs an InferenceEngine.")
+
+        if "forkserver" not in multiprocessing.get_all_start_methods():
+            raise RuntimeError("Worker pool needs the 'forkserver' start method.")
+
+        self.engine = engine
+        self.processes = processes or os.cpu_count() or 1
+        threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // self.processes)
+
+        # the forkserver imports torch and the model code once, workers are forked from it single-threaded
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+
+        self.pool = context.Pool(
+            self.processes, initializer=_init_worker, initargs=(threads_per_worker, engine.precision)
+        )
+
+    def predict_proba(self, texts: list) -> np.ndarray:
+        """Predicts class probabilities of the comments, sharding cache misses across workers and merging them in order.
+
+        Args:
+            texts (list): Comment texts.
+
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), len(LABELS)), rows in the order of texts.
+        """
+
+        probs, missed = self.engine.lookup_cache(texts)
+        if not missed:
+            return probs
+
+        unique_texts = [texts[positions[0]] for _, positions in missed]
+
+        shard_size = max(MIN_SHARD_SIZE, math.ceil(len(unique_texts) / self.processes))
+        shards = [unique_texts[start:start + shard_size] for start in range(0, len(unique_texts), shard_size)]
+
+        shard_probs = []
+        for probs_shard, metrics_shard in self.pool.map(_predict_shard, shards):
+            shard_probs.append(probs_shard)
+            registry.merge(metrics_shard)
+
+        self.engine.fill_cache(probs, missed, np.concatenate(shard_probs))
+
+        return probs
+
+    def predict(self, texts: list) -> np.ndarray:
+        """Predicts classes of the comments, see predict_proba.
+
+        Returns:
+            np.ndarray: Boolean array of shape (len(texts), len(LABELS)), True where a class is activated.
+        """
+
+        return self.predict_proba(texts) >= self.engine.threshold
+
+    def close(self) -> None:
+        """Stops the worker processes."""
+
+        self.pool.terminate()
+        self.pool.join()
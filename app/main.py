@@ -1,30 +1,106 @@
 import os
+import sys
+import asyncio
+import logging
 from dotenv import load_dotenv
 
+# load env before app modules read their configuration
+load_dotenv()
+
 from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
 
 from app.config import templates
+from app.library.metrics import registry
+from app.library import youtube
 from app.auth import auth_router
 from app.views import home_view, analysis_view
 
-from app.machine_learning import load_tokeninzer, load_model
+import app.machine_learning as ml
 
 
-load_dotenv()
 os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI()
 app.mount("/static", StaticFiles(directory=os.path.join(os.path.dirname(__file__), "static")), name="static")
 app.add_middleware(SessionMiddleware, secret_key = os.getenv("SESSION_SECRET"))
 
 
+def load_ml_stack():
+    """Imports ML modules (on first attribute access) and loads tokenizer and model."""
+    
+    ml.load_tokeninzer()
+    ml.load_model()
+
+
+async def warm_up_model():
+    """Loads the ML stack in a background thread, routes not needing it are served meanwhile.
+    
+    A failed load (or start of the workers) is logged and recorded, analyses then fail right away and /health reports it.
+    """
+    
+    try:
+        await asyncio.to_thread(load_ml_stack)
+        ml.start_worker_pool()
+        ml.start_scheduler()
+    
+    except Exception as error:
+        logger.exception("Loading the model failed, video analyses are unavailable.")
+        app.state.model_error = error
+        
+        # nothing to record if the prediction module itself failed to import, importing it again fails the same way
+        if "app.machine_learning.make_predictions" in sys.modules:
+            ml.set_load_error(error)
+
+
 @app.on_event("startup")
-def startup_event():
+async def startup_event():
+    
+    youtube.startClient()
+    app.state.model_error = None
+    app.state.warmup_task = asyncio.create_task(warm_up_model())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    
+    app.state.warmup_task.cancel()
+    await youtube.closeClient()
+    
+    if "app.machine_learning.make_predictions" in sys.modules:
+        await ml.stop_scheduler()
+        ml.stop_worker_pool()
+
+
+@app.get("/health", tags=["Health"])
+def health():
+    warmup_task = app.state.warmup_task
+    model_error = app.state.model_error
+    model_loaded = warmup_task.done() and not warmup_task.cancelled() and model_error is None
+    
+    # quota left in the budget of the worker answering, its share of the project quota
+    health = {
+        "status": "ok",
+        "model_loaded": model_loaded,
+        "youtube_quota_remaining": youtube.quota_scheduler.remaining(),
+        "youtube_quota_budget": youtube.quota_scheduler.daily_budget
+    }
+    if model_error is not None:
+        return JSONResponse({**health, "status": "error", "model_error": repr(model_error)}, status_code = 503)
+    
+    return health
+
+
+@app.get("/metrics", tags=["Health"])
+def metrics():
+    # rolls the quota day over so the remaining quota gauge is current
+    youtube.quota_scheduler.remaining()
     
-    load_tokeninzer()
-    load_model()
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/", tags=["Landing Page"])
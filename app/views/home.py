@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Request
 from fastapi.responses import RedirectResponse, HTMLResponse
 
-from app.library.youtube import fetchChannelData, fetchVideoData
+from app.library.youtube import fetchChannelData, fetchVideoPage
 
 from app.exceptions import *
 
@@ -39,26 +39,35 @@ def compute_total_views(video_data: dict) -> int:
 
 
 @home_view.get("")
-async def home(request: Request):
+async def home(request: Request, page_token: str = ""):
     
     if "credentials" not in request.session:
         return RedirectResponse(request.url_for("oauth2callback"))
     
     try:
+        credentials = request.session["credentials"]
+        
         if "channel_data" not in request.session:
-            credentials = request.session["credentials"]
             channel_details = await fetchChannelData(credentials)
-
-            video_data = await fetchVideoData(credentials)
-
-            total_views = compute_total_views(video_data)
-
-            request.session["channel_data"] = {
-                "channel_details": channel_details,
-                "video_data": video_data,
-                "total_views": total_views,
-            }
-
+            request.session["channel_data"] = {"channel_details": channel_details, "video_data": {}}
+        
+        # only the displayed page of videos is kept in the (cookie) session, other pages are fetched when opened
+        channel_data = request.session["channel_data"]
+        if channel_data.get("page_token") != page_token:
+            video_page = await fetchVideoPage(credentials, channel_data["channel_details"].get("uploads_playlist_id"), page_token)
+            
+            channel_data["video_data"] = video_page["video_data"]
+            channel_data["page_token"] = page_token
+            channel_data["prev_page_token"] = video_page["prev_page_token"]
+            channel_data["next_page_token"] = video_page["next_page_token"]
+            
+            # views of the latest videos
+            if not page_token:
+                channel_data["total_views"] = compute_total_views(video_page["video_data"])
+
+    except (QuotaExceededError, YouTubeApiError): 
+        return HTMLResponse("Cannot connect to youtube right now. Please comeback in a while.")
+    
     except AccessTokenExpiredError:
         request.session["redirect_url"] = str(request.url)
         return RedirectResponse(request.url_for("refresh_access_token"))
@@ -70,8 +79,8 @@ async def home(request: Request):
             )
         
         elif entity_error.entity == "video":
-            request.session.setdefault("channel_data", {})
             request.session["channel_data"]["video_data"] = {}
+            request.session["channel_data"]["page_token"] = page_token
             request.session["channel_data"]["total_views"] = 0
     
     channel_details = request.session["channel_data"]["channel_details"]
@@ -87,6 +96,8 @@ async def home(request: Request):
         "channel_details": channel_details,
         "video_data": video_data,
         "total_views": total_views,
+        "prev_page_token": request.session["channel_data"].get("prev_page_token"),
+        "next_page_token": request.session["channel_data"].get("next_page_token"),
     }
     
     return templates.TemplateResponse("home.html", context=context_dict)
@@ -1,10 +1,11 @@
-import os
+import re
+from collections import OrderedDict
 
 from fastapi import APIRouter, Request, Response, Body
 from fastapi.responses import RedirectResponse, HTMLResponse
 
 from app.library.youtube import fetchVideoComments, rejectComments
-from app.library.video_analysis import VideoAnalysis
+from app.library.artifacts import artifact_store
 
 from app.exceptions import *
 
@@ -13,46 +14,96 @@ from app.config import templates
 
 analysis_view = APIRouter()
 
+# content hash naming an artifact version in its url
+ARTIFACT_ETAG = re.compile(r"[0-9a-f]{20}")
+
+# analyses of recently viewed videos per (channel id, video id), so that a refresh only classifies comments added since
+MAX_STORED_ANALYSES = 32
+analysis_store = OrderedDict()
+
+
+def getStoredAnalysis(channel_id: str, video_id: str) -> "VideoAnalysis":
+    """Returns the previous analysis of a video of a channel or a new one.
+    
+    The analysis is shared by concurrent requests of the channel, hold its lock while refreshing or reading it.
+
+    Args:
+        channel_id (str): Channel id of the session.
+        video_id (str): Video id of a particular yt video.
+
+    Returns:
+        VideoAnalysis: Analysis object to append fresh comments to.
+    """
+    
+    # imported on first analysis, keeps pandas and the ML package out of app startup
+    from app.library.video_analysis import VideoAnalysis
+    
+    analysis_obj = analysis_store.pop((channel_id, video_id), None) or VideoAnalysis()
+    
+    analysis_store[(channel_id, video_id)] = analysis_obj
+    while len(analysis_store) > MAX_STORED_ANALYSES:
+        analysis_store.popitem(last = False)
+    
+    return analysis_obj
+
+
 @analysis_view.get("/{video_id}")
 async def video_analysis(request: Request, video_id: str):
     
     if "channel_data" not in request.session:
         return RedirectResponse(request.url_for("home"))
-    analysis_obj = VideoAnalysis()
     
-    try:
-        comment_itr = fetchVideoComments(request.session["credentials"], video_id)        
-        async for comment_dict in comment_itr:
-            analysis_obj.appendComments(comment_dict)
-        
-    except QuotaExceededError: 
-        return HTMLResponse("Cannot connect to youtube right now. Please comeback in a while.")
+    # sessions from before channel ids were stored fetch their channel data again
+    channel_id = request.session["channel_data"]["channel_details"].get("id")
+    if channel_id is None:
+        return RedirectResponse(request.url_for("refresh_home"))
     
-    except AccessTokenExpiredError: 
-        request.session["redirect_url"] = str(request.url)
-        return RedirectResponse(request.url_for("refresh_access_token"))
+    # only videos of the displayed page of the channel's videos are in the session (e.g. not a bookmarked one)
+    if video_id not in request.session["channel_data"]["video_data"]:
+        return RedirectResponse(request.url_for("home"))
     
-    except EntityNotFoundError: 
-        has_comments = False
+    analysis_obj = getStoredAnalysis(channel_id, video_id)
     
-    else:
-        has_comments = True
+    # one refresh of an analysis at a time, a concurrent request waits and gets the refreshed analysis
+    async with analysis_obj.lock:
+        analysis_obj.refreshComments()
+        
+        try:
+            # comments are classified page by page while later pages download, recently deleted
+            # comments are left out (handle eventual consistency)
+            comment_itr = fetchVideoComments(request.session["credentials"], video_id)
+            await analysis_obj.streamComments(comment_itr, exclude_ids = request.session.get("deleted_ids", []))
+            
+        except (QuotaExceededError, YouTubeApiError): 
+            return HTMLResponse("Cannot connect to youtube right now. Please comeback in a while.")
         
-        # Filter out comments that were recently deleted (handle eventual consistency)
-        deleted_ids = request.session.get("deleted_ids", [])
-        if deleted_ids:
-            # Filter the dataframe directly
-            analysis_obj.comments_df = analysis_obj.comments_df[~analysis_obj.comments_df["id"].isin(deleted_ids)]
-
-        analysis_obj.classifyComments()
-        analysis_obj.createWordCloud(video_id)
-        analysis_obj.createClassificationGraph(video_id)
+        except AccessTokenExpiredError: 
+            request.session["redirect_url"] = str(request.url)
+            return RedirectResponse(request.url_for("refresh_access_token"))
         
-        toxic_ids = analysis_obj.getToxicIds()
-        request.session["channel_data"]["video_data"][video_id]["toxic_ids"] = toxic_ids
+        except EntityNotFoundError: 
+            has_comments = False
+            comments = []
+            clusters = []
+            artifacts = {}
         
-        # Convert to list of dicts (already filtered)
-        comments = analysis_obj.comments_df.to_dict("records")
+        else:
+            has_comments = True
+            
+            # charts are linked by content hash, any worker sharing the artifact directory can serve them
+            artifacts = {
+                "word_cloud": analysis_obj.createWordCloud(video_id),
+                "classification_graph": analysis_obj.createClassificationGraph(video_id)
+            }
+            
+            toxic_ids = analysis_obj.getToxicIds()
+            request.session["channel_data"]["video_data"][video_id]["toxic_ids"] = toxic_ids
+            
+            # list of dicts (already filtered), read from the comment columns
+            comments = analysis_obj.getComments()
+            
+            # exact / near-duplicate comment floods, rejectable as a whole
+            clusters = analysis_obj.getDuplicateClusters()
     
     context_dict = {
         "request": request,
@@ -60,24 +111,39 @@ async def video_analysis(request: Request, video_id: str):
         "video": request.session["channel_data"]["video_data"][video_id],
         "video_id": video_id,
         "has_comments": has_comments,
-        "comments": comments
+        "comments": comments,
+        "clusters": clusters,
+        "artifacts": artifacts
     }
     
     return templates.TemplateResponse("video_analysis.html", context = context_dict)
 
 
+@analysis_view.get("/artifacts/{video_id}/{name}/{etag}")
+async def get_artifact(request: Request, video_id: str, name: str, etag: str):
+    
+    if "channel_data" not in request.session:
+        return Response(status_code = 403)
+    
+    if not ARTIFACT_ETAG.fullmatch(etag):
+        return Response(status_code = 404)
+    
+    artifact = artifact_store.get(video_id, name, etag)
+    if artifact is None:
+        return Response(status_code = 404)
+    
+    # the url names the content, it never changes
+    headers = {"ETag": f'"{artifact.etag}"', "Cache-Control": "private, max-age=31536000, immutable"}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code = 304, headers = headers)
+    
+    return Response(artifact.content, media_type = artifact.media_type, headers = headers)
+
+
 @analysis_view.delete("/delete-graphs/{video_id}")
 async def delete_graphs(video_id: str):
     
-    base_dir = os.path.dirname(os.path.dirname(__file__))
-    word_cloud_path = os.path.join(base_dir, "static", "images", f"word_cloud_{video_id}.png")
-    classification_graph_path = os.path.join(base_dir, "static", "images", f"classification_graph_{video_id}.png")
-
-    if os.path.exists(word_cloud_path):
-        os.remove(word_cloud_path)
-        
-    if os.path.exists(classification_graph_path):
-        os.remove(classification_graph_path)
+    artifact_store.delete(video_id)
         
     return Response(status_code = 200)
         
@@ -85,6 +151,9 @@ async def delete_graphs(video_id: str):
 @analysis_view.get("/reject-comments/{video_id}")
 async def reject_comments(request: Request, video_id: str):
     
+    if video_id not in request.session.get("channel_data", {}).get("video_data", {}):
+        return RedirectResponse(request.url_for("home"))
+    
     if "toxic_ids" not in request.session["channel_data"]["video_data"][video_id]:
         return RedirectResponse(request.url_for("video_analysis", video_id = video_id))
     
@@ -98,7 +167,7 @@ async def reject_comments(request: Request, video_id: str):
             request.session["deleted_ids"] = []
         request.session["deleted_ids"].extend(toxic_ids)
     
-    except QuotaExceededError: 
+    except (QuotaExceededError, YouTubeApiError): 
         return HTMLResponse("Cannot connect to youtube right now. Please comeback in a while..")
     
     except AccessTokenExpiredError: 
@@ -108,6 +177,41 @@ async def reject_comments(request: Request, video_id: str):
     
     return RedirectResponse(request.url_for("video_analysis", video_id = video_id))
 
+
+@analysis_view.post("/reject-cluster/{video_id}")
+async def reject_cluster(
+    request: Request,
+    video_id: str,
+    comment_ids: list[str] = Body(...)
+):
+    # member ids come with the request (rendered into the page), so any web worker can serve it without the analysis
+    if "channel_data" not in request.session:
+        return Response(status_code = 403)
+    
+    # only videos of the session's channel
+    if video_id not in request.session["channel_data"]["video_data"] or not comment_ids:
+        return Response(status_code = 404)
+    
+    try:
+        await rejectComments(request.session["credentials"], comment_ids)
+    
+    except (QuotaExceededError, YouTubeApiError): 
+        return {"status": "error", "message": "Cannot connect to youtube right now. Please comeback in a while.."}
+    
+    except AccessTokenExpiredError: 
+        return {"status": "error", "message": "Your session expired, please log in again."}
+    
+    # Add to deleted_ids list
+    if "deleted_ids" not in request.session:
+        request.session["deleted_ids"] = []
+    request.session["deleted_ids"].extend(comment_ids)
+    
+    return {
+        "status": "success", 
+        "message": f"{len(comment_ids)} comments rejected successfully."
+    }
+
+
 @analysis_view.post("/delete-selected-comments/{video_id}")
 async def delete_selected_comments(
     request: Request,
@@ -120,7 +224,14 @@ async def delete_selected_comments(
     if not comment_ids:
         return {"status": "error", "message": "No comments selected."}
     
-    await rejectComments(request.session["credentials"], comment_ids)
+    try:
+        await rejectComments(request.session["credentials"], comment_ids)
+    
+    except (QuotaExceededError, YouTubeApiError): 
+        return {"status": "error", "message": "Cannot connect to youtube right now. Please comeback in a while.."}
+    
+    except AccessTokenExpiredError: 
+        return {"status": "error", "message": "Your session expired, please log in again."}
     
     # Add to deleted_ids list
     if "deleted_ids" not in request.session:
@@ -0,0 +1,73 @@
+"""Startup benchmark: reports import time of every module pulled in by importing a target module.
+
+Usage:
+    python benchmarks/import_time.py [--module app.main] [--top 25] [--json]
+
+Runs the import in a fresh interpreter with `-X importtime` so numbers match a cold worker boot.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module: str) -> list:
+    """Imports module in a fresh interpreter and parses `-X importtime` output.
+
+    Args:
+        module (str): Module to import.
+
+    Returns:
+        list: Dicts with module name, self and cumulative import time (microseconds) and nesting depth, in import order.
+    """
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+        })
+
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import time per module.")
+    parser.add_argument("--module", default="app.main", help="module to import (default: app.main)")
+    parser.add_argument("--top", type=int, default=25, help="no. of slowest modules to list")
+    parser.add_argument("--json", action="store_true", help="print machine-readable output")
+    args = parser.parse_args()
+
+    timings = measure(args.module)
+    total_us = next(timing["cumulative_us"] for timing in timings if timing["module"] == args.module)
+    slowest = sorted(timings, key=lambda timing: timing["cumulative_us"], reverse=True)[:args.top]
+
+    if args.json:
+        print(json.dumps({"module": args.module, "total_us": total_us, "modules": slowest}, indent=2))
+        return
+
+    print(f"import {args.module}: {total_us / 1000:.1f} ms")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for timing in slowest:
+        print(f"{timing['cumulative_us'] / 1000:>14.1f} {timing['self_us'] / 1000:>9.1f}  {'  ' * timing['depth']}{timing['module']}")
+
+
+if __name__ == "__main__":
+    main()
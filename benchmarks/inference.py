@@ -0,0 +1,244 @@
+"""Inference benchmark: drives load_tokeninzer(), load_model() and predict() over synthetic comment corpora.
+
+Usage:
+    python benchmarks/inference.py [--batch-sizes 8,32] [--max-lens 128,200] [--threads 1,4] [--output results.json]
+    python benchmarks/inference.py --output results.json --compare baseline.json [--tolerance 0.1]
+
+Every configuration runs in a fresh interpreter so thread settings and peak RSS are measured in isolation. The
+prediction cache and the cascade are switched off, every comment goes through the model.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# comment length (in words) distributions of the synthetic corpora
+DISTRIBUTIONS = {
+    # youtube-like: mostly a few words with a long tail
+    "mixed": lambda rng, n: np.clip(rng.lognormal(2.3, 1.0, n), 1, 400),
+    "short": lambda rng, n: np.clip(rng.lognormal(1.5, 0.5, n), 1, 30),
+    "long": lambda rng, n: rng.uniform(150, 250, n),
+}
+
+# configuration fields identifying a result, compare mode matches results on them
+CONFIG_KEYS = ["distribution", "batch_size", "max_len", "threads", "backend", "precision"]
+
+# metrics compared against the baseline and whether higher is better
+METRICS = {"comments_per_s": True, "p50_ms": False, "p99_ms": False, "peak_rss_mb": False}
+
+
+def make_corpus(distribution: str, n_comments: int, seed: int = 0) -> list:
+    """Builds synthetic comments of real vocabulary words with lengths drawn from a distribution.
+
+    Args:
+        distribution (str): Key of DISTRIBUTIONS.
+        n_comments (int): No. of comments.
+        seed (int, optional): Random seed, same seed gives the same corpus. Defaults to 0.
+
+    Returns:
+        list: Comment texts.
+    """
+
+    from app.machine_learning.data_loader import PRETRAINED_DIR
+
+    with open(PRETRAINED_DIR / "vocab.txt", encoding="utf-8") as file:
+        words = [word for word in file.read().split() if word.isalpha() and word.isascii()]
+
+    rng = np.random.default_rng(seed)
+    lengths = DISTRIBUTIONS[distribution](rng, n_comments).astype(int)
+
+    return [" ".join(rng.choice(words, length)) for length in lengths]
+
+
+def run_config(config: dict, n_comments: int, request_size: int, seed: int) -> dict:
+    """Loads tokenizer and model with a configuration and measures predict() over a synthetic corpus.
+
+    Args:
+        config (dict): Values of CONFIG_KEYS, threads are applied through TORCH_INTRA_OP_THREADS by the caller.
+        n_comments (int): No. of comments scored.
+        request_size (int): No. of comments per predict() call.
+        seed (int): Corpus seed.
+
+    Returns:
+        dict: Configuration with comments/s, p50 / p99 latency of forward batches (ms) and peak RSS (MB).
+    """
+
+    import pandas as pd
+
+    from app.machine_learning import data_loader, make_predictions
+
+    data_loader.MAX_LEN = config["max_len"]
+    data_loader.load_tokeninzer()
+    make_predictions.load_model(config["precision"], config["backend"])
+
+    engine = make_predictions.get_engine()
+    engine.batch_size = config["batch_size"]
+    engine.cache = None
+    make_predictions.cascade = None
+
+    # time every forward batch of the engine
+    batch_seconds = []
+    run_batch = engine._run_batch
+
+    def timed_run_batch(*args):
+        start = time.perf_counter()
+        probs = run_batch(*args)
+        batch_seconds.append(time.perf_counter() - start)
+
+        return probs
+
+    engine._run_batch = timed_run_batch
+
+    texts = make_corpus(config["distribution"], n_comments, seed)
+    requests = [
+        pd.DataFrame({"id": np.arange(start, start + len(chunk)), "comment_text": chunk})
+        for start, chunk in ((start, texts[start:start + request_size]) for start in range(0, len(texts), request_size))
+    ]
+
+    make_predictions.predict(requests[0])
+    batch_seconds.clear()
+
+    start = time.perf_counter()
+    for request in requests:
+        make_predictions.predict(request)
+    elapsed = time.perf_counter() - start
+
+    batch_ms = np.asarray(batch_seconds) * 1000
+
+    return {
+        **config,
+        "comments": n_comments,
+        "comments_per_s": n_comments / elapsed,
+        "p50_ms": float(np.percentile(batch_ms, 50)),
+        "p99_ms": float(np.percentile(batch_ms, 99)),
+        # ru_maxrss is in kilobytes on linux, bytes on macOS
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024),
+    }
+
+
+def run_isolated(config: dict, n_comments: int, request_size: int, seed: int) -> dict:
+    """Runs a configuration in a fresh interpreter, see run_config."""
+
+    env = dict(os.environ, TORCH_INTRA_OP_THREADS=str(config["threads"]))
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--single", json.dumps(config),
+         "--comments", str(n_comments), "--request-size", str(request_size), "--seed", str(seed)],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Benchmark of {config} failed:\n{result.stderr}")
+
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compare(results: list, baseline: list, tolerance: float) -> list:
+    """Flags metrics worse than the baseline by more than tolerance.
+
+    Args:
+        results (list): Results of this run.
+        baseline (list): Results of the stored baseline.
+        tolerance (float): Allowed relative change, e.g. 0.1 for 10%.
+
+    Returns:
+        list: Dicts with configuration, metric, baseline and current value of every regression.
+    """
+
+    def key(result):
+        return tuple(result[name] for name in CONFIG_KEYS)
+
+    baseline = {key(result): result for result in baseline}
+    regressions = []
+
+    for result in results:
+        reference = baseline.get(key(result))
+        if reference is None:
+            continue
+
+        for metric, higher_is_better in METRICS.items():
+            change = (result[metric] - reference[metric]) / reference[metric]
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append({
+                    "config": {name: result[name] for name in CONFIG_KEYS},
+                    "metric": metric,
+                    "baseline": reference[metric],
+                    "current": result[metric],
+                    "change": change,
+                })
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark predict() throughput, latency and memory.")
+    parser.add_argument("--distributions", default="mixed", help=f"comma separated of {', '.join(DISTRIBUTIONS)}")
+    parser.add_argument("--batch-sizes", default="8,32", help="comma separated forward batch sizes")
+    parser.add_argument("--max-lens", default="200", help="comma separated tokenizer truncation lengths")
+    parser.add_argument("--threads", default=str(os.cpu_count() or 1), help="comma separated intra-op thread counts")
+    parser.add_argument("--backend", default="torch", help="torch or onnx")
+    parser.add_argument("--precision", default="fp32", help="fp32, int8 or bf16")
+    parser.add_argument("--comments", type=int, default=2000, help="comments scored per configuration")
+    parser.add_argument("--request-size", type=int, default=256, help="comments per predict() call")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as json to this file")
+    parser.add_argument("--compare", help="baseline json to flag regressions against (exit code 1 on regression)")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed relative change before flagging")
+    parser.add_argument("--single", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        sys.path.insert(0, PROJECT_ROOT)
+        print(json.dumps(run_config(json.loads(args.single), args.comments, args.request_size, args.seed)))
+        return
+
+    configs = [
+        {"distribution": distribution, "batch_size": int(batch_size), "max_len": int(max_len),
+         "threads": int(threads), "backend": args.backend, "precision": args.precision}
+        for distribution in args.distributions.split(",")
+        for batch_size in args.batch_sizes.split(",")
+        for max_len in args.max_lens.split(",")
+        for threads in args.threads.split(",")
+    ]
+
+    print(f"{'distribution':>12} {'batch':>6} {'max_len':>8} {'threads':>8} {'comments/s':>11} {'p50 ms':>8} {'p99 ms':>8} {'rss MB':>8}")
+
+    results = []
+    for config in configs:
+        result = run_isolated(config, args.comments, args.request_size, args.seed)
+        results.append(result)
+
+        print(f"{result['distribution']:>12} {result['batch_size']:>6} {result['max_len']:>8} {result['threads']:>8} "
+              f"{result['comments_per_s']:>11.1f} {result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f} {result['peak_rss_mb']:>8.0f}")
+
+    if args.output:
+        report = {
+            "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+            "results": results,
+        }
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file)["results"], args.tolerance)
+
+        for regression in regressions:
+            print(f"REGRESSION {regression['metric']} {regression['config']}: "
+                  f"{regression['baseline']:.1f} -> {regression['current']:.1f} ({regression['change']:+.0%})")
+
+        if regressions:
+            sys.exit(1)
+
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Pytest configuration, keeps the repository root importable (``app`` package) when running ``pytest`` from it."""
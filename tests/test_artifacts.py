@@ -0,0 +1,45 @@
+from app.library.artifacts import ArtifactStore
+
+
+def test_new_version_replaces_the_previous_one():
+    store = ArtifactStore(1024)
+
+    first = store.put("video", "word_cloud", b"first", "image/png")
+    second = store.put("video", "word_cloud", b"second", "image/png")
+
+    assert store.get("video", "word_cloud") == second
+    assert store.get("video", "word_cloud", first.etag) is None
+
+
+def test_evicted_artifacts_are_dropped_without_a_spill_directory():
+    store = ArtifactStore(8)
+
+    graph = store.put("video", "graph", b"12345", "image/png")
+    store.put("video", "word_cloud", b"67890", "image/png")
+
+    assert store.get("video", "graph", graph.etag) is None
+    assert store.get("video", "word_cloud").content == b"67890"
+
+
+def test_workers_sharing_a_spill_directory_serve_each_others_artifacts(tmp_path):
+    worker, other_worker = ArtifactStore(1024, str(tmp_path)), ArtifactStore(1024, str(tmp_path))
+
+    first = worker.put("video-1", "word_cloud", b"first", "image/svg+xml")
+    assert other_worker.get("video-1", "word_cloud", first.etag) == first
+
+    # a newer version written by another worker replaces the old file
+    second = other_worker.put("video-1", "word_cloud", b"second", "image/svg+xml")
+    assert worker.get("video-1", "word_cloud", second.etag) == second
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_delete_removes_files_of_the_video_only(tmp_path):
+    store = ArtifactStore(1024, str(tmp_path))
+    store.put("video", "graph", b"graph", "image/png")
+    kept = store.put("video-2", "graph", b"other", "image/png")
+
+    ArtifactStore(1024, str(tmp_path)).delete("video")
+    store.delete("video")
+
+    assert [path.name for path in tmp_path.iterdir()] == [f"video-2-graph-{kept.etag}"]
+    assert store.get("video", "graph") is None
@@ -0,0 +1,77 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from app.machine_learning import batching
+from app.machine_learning.base_engine import LABELS
+from app.machine_learning.batching import BatchScheduler
+
+
+class FakeEngine:
+    """Engine without cache whose forward pass returns each comment's first token id as probabilities."""
+
+    def __init__(self, release: threading.Event = None) -> None:
+        self.release = release
+        self.threads = []
+        self.rounds = []
+
+    def lookup_cache(self, texts):
+        self.threads.append(threading.current_thread().name)
+        return np.zeros((len(texts), len(LABELS)), dtype=np.float32), [(text, [position]) for position, text in enumerate(texts)]
+
+    def fill_cache(self, probs, missed, missed_probs):
+        self.threads.append(threading.current_thread().name)
+        for row, (_, positions) in zip(missed_probs, missed):
+            probs[positions] = row
+
+    def run_encoded(self, input_ids, batch_size=None):
+        if self.release is not None:
+            self.release.wait(5)
+        self.rounds.append(len(input_ids))
+        return np.repeat(np.array([[ids[0]] for ids in input_ids], dtype=np.float32), len(LABELS), axis=1)
+
+
+@pytest.fixture(autouse=True)
+def encode_lengths(monkeypatch):
+    monkeypatch.setattr(batching, "encode_comments", lambda texts: [[len(text)] for text in texts])
+
+
+def test_concurrent_requests_share_a_round():
+    async def run():
+        engine = FakeEngine()
+        scheduler = BatchScheduler(engine, max_batch_size=64, max_wait_ms=50)
+        scheduler.start()
+
+        results = await asyncio.gather(scheduler.submit(["a", "bb"]), scheduler.submit(["ccc"]))
+        await scheduler.stop()
+
+        return engine, results
+
+    engine, (first, second) = asyncio.run(run())
+
+    assert first[:, 0].tolist() == [1, 2]
+    assert second[:, 0].tolist() == [3]
+    assert engine.rounds == [3]
+    assert threading.main_thread().name not in engine.threads
+
+
+def test_stop_fails_pending_requests():
+    async def run():
+        release = threading.Event()
+        scheduler = BatchScheduler(FakeEngine(release), max_batch_size=1, max_wait_ms=1)
+        scheduler.start()
+
+        # first request runs (blocked in the forward pass), second one stays queued
+        requests = [asyncio.ensure_future(scheduler.submit(["a"])), asyncio.ensure_future(scheduler.submit(["b"]))]
+        await asyncio.sleep(0.05)
+
+        await scheduler.stop()
+        release.set()
+
+        return await asyncio.wait_for(asyncio.gather(*requests, return_exceptions=True), 1)
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
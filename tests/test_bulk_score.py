@@ -0,0 +1,87 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from app.machine_learning import bulk_score, make_predictions
+from app.machine_learning.base_engine import LABELS
+from app.machine_learning.results import PredictionResult
+
+
+class FakePredict:
+    """Scores comments by text length, optionally failing on a given call to simulate a killed run."""
+
+    def __init__(self, fail_on: int = None) -> None:
+        self.fail_on = fail_on
+        self.calls = []
+
+    def __call__(self, comments):
+        self.calls.append(comments["id"].tolist())
+        if len(self.calls) == self.fail_on:
+            raise KeyboardInterrupt
+
+        lengths = comments["comment_text"].str.len().to_numpy(dtype=np.float32)
+        return PredictionResult(comments["id"].to_numpy(dtype=object), np.repeat(lengths[:, None] / 100, len(LABELS), axis=1))
+
+
+@pytest.fixture
+def export(tmp_path):
+    path = tmp_path / "comments.csv"
+    pd.DataFrame({"id": [f"c{row}" for row in range(7)], "comment_text": ["x" * row for row in range(7)]}).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize("extension", [".csv", ".jsonl", ".parquet"])
+def test_read_chunks_skips_finished_chunks(tmp_path, extension):
+    frame = pd.DataFrame({"id": list("abcde"), "comment_text": list("vwxyz")})
+    path = str(tmp_path / f"comments{extension}")
+    if extension == ".csv":
+        frame.to_csv(path, index=False)
+    elif extension == ".jsonl":
+        frame.to_json(path, orient="records", lines=True)
+    else:
+        frame.to_parquet(path)
+
+    chunks = list(bulk_score.read_chunks(path, chunk_size=2, skip_chunks=1))
+
+    assert [chunk["id"].tolist() for chunk in chunks] == [["c", "d"], ["e"]]
+
+
+def test_unsupported_format_is_refused(tmp_path):
+    with pytest.raises(ValueError):
+        next(bulk_score.read_chunks(str(tmp_path / "comments.xlsx"), chunk_size=2))
+
+
+def test_killed_run_resumes_after_last_finished_chunk(tmp_path, export, monkeypatch):
+    output = str(tmp_path / "scores")
+
+    killed = FakePredict(fail_on=3)
+    monkeypatch.setattr(make_predictions, "predict", killed)
+    with pytest.raises(KeyboardInterrupt):
+        bulk_score.score_file(export, output, chunk_size=3)
+
+    with open(f"{output}/{bulk_score.CHECKPOINT_FILE}") as file:
+        assert json.load(file)["chunks"] == 2
+
+    resumed = FakePredict()
+    monkeypatch.setattr(make_predictions, "predict", resumed)
+
+    assert bulk_score.score_file(export, output, chunk_size=3) == 7
+    assert resumed.calls == [["c6"]]
+
+    scores = pq.read_table(output).to_pandas()
+    assert scores["id"].tolist() == [f"c{row}" for row in range(7)]
+    assert scores[LABELS[0]].tolist() == pytest.approx([row / 100 for row in range(7)])
+    assert scores["labels"].tolist() == [0] * 7
+
+
+def test_checkpoint_of_another_run_is_refused(tmp_path, export, monkeypatch):
+    output = str(tmp_path / "scores")
+    monkeypatch.setattr(make_predictions, "predict", FakePredict())
+
+    bulk_score.score_file(export, output, chunk_size=3)
+
+    with pytest.raises(ValueError):
+        bulk_score.score_file(export, output, chunk_size=4)
@@ -0,0 +1,100 @@
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.machine_learning.base_engine import LABELS
+from app.machine_learning.cascade import Cascade, FirstStage, N_FEATURES, featurize, rule_label
+
+
+@pytest.mark.parametrize("text, rule", [
+    ("", "empty"),
+    ("   ", "empty"),
+    ("https://example.com www.example.org", "url"),
+    ("🔥🔥 !!", "emoji"),
+    ("nice video", None),
+    ("see https://example.com", None),
+])
+def test_rule_label(text, rule):
+    assert rule_label(text) == rule
+
+
+def test_featurize_rows_are_normalized_and_case_insensitive():
+    indptr, indices, values = featurize(["Hello  World", "hello world", "x"])
+
+    assert len(indptr) == 4
+    assert indices.max() < N_FEATURES
+    for row in range(3):
+        assert np.linalg.norm(values[indptr[row]:indptr[row + 1]]) == pytest.approx(1.0)
+    assert indices[indptr[0]:indptr[1]].tolist() == indices[indptr[1]:indptr[2]].tolist()
+
+
+def test_first_stage_learns_and_round_trips(tmp_path):
+    texts = ["you are an idiot", "idiot idiot", "stupid idiot person", "great video", "thanks for sharing", "love this"] * 20
+    targets = np.zeros((len(texts), len(LABELS)), dtype=np.float32)
+    targets[[index for index, text in enumerate(texts) if "idiot" in text], 0] = 1.0
+
+    first_stage = FirstStage()
+    first_stage.fit(texts, targets, epochs=20)
+    probs = first_stage.predict_proba(["what an idiot", "great video thanks"])
+
+    assert probs[0, 0] > 0.5 > probs[1, 0]
+
+    first_stage.save(tmp_path / "first_stage.npz")
+    assert np.array_equal(FirstStage.load(tmp_path / "first_stage.npz").predict_proba(["idiot"]), first_stage.predict_proba(["idiot"]))
+
+
+class ConstantStage:
+    """First stage returning fixed probabilities per text."""
+
+    def __init__(self, probs: dict) -> None:
+        self.probs = probs
+
+    def predict_proba(self, texts):
+        return np.array([[self.probs[text]] * len(LABELS) for text in texts], dtype=np.float32)
+
+
+def test_only_ambiguous_comments_reach_the_second_stage():
+    cascade = Cascade(ConstantStage({"clean": 0.01, "toxic": 0.99, "unsure": 0.5}), low=0.05, high=0.95)
+    second_stage_texts = []
+
+    def second_stage(texts):
+        second_stage_texts.extend(texts)
+        return np.full((len(texts), len(LABELS)), 0.7, dtype=np.float32)
+
+    probs = cascade.predict_proba(["", "clean", "unsure", "toxic", "http://x.io"], second_stage)
+
+    assert second_stage_texts == ["unsure"]
+    assert probs[:, 0].tolist() == pytest.approx([0.0, 0.01, 0.7, 0.99, 0.0])
+    assert cascade.report()["counts"] == {"empty": 1, "url": 1, "emoji": 0, "first_stage": 2, "model": 1}
+
+
+def test_counts_are_exact_under_concurrent_splits():
+    cascade = Cascade()
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(cascade.split, [["", "text"] * 500] * 16))
+
+    assert cascade.report()["counts"]["empty"] == 8000
+    assert cascade.report()["counts"]["model"] == 8000
+
+
+@pytest.mark.parametrize("band", ["0.9,0.1", "0.5", "0.05,0.5,0.95", "-0.1,0.9", "0.1,1.5"])
+def test_invalid_cascade_band_is_refused(band):
+    result = subprocess.run(
+        [sys.executable, "-c", "import app.config"], env={**os.environ, "CASCADE_BAND": band}, capture_output=True, text=True
+    )
+
+    assert result.returncode != 0 and "CASCADE_BAND" in result.stderr
+
+
+def test_cascade_is_off_by_default():
+    env = {name: value for name, value in os.environ.items() if name != "CASCADE_ENABLED"}
+    result = subprocess.run(
+        [sys.executable, "-c", "import app.config; print(app.config.CASCADE_ENABLED)"], env=env, capture_output=True, text=True
+    )
+
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,67 @@
+import numpy as np
+
+from app.machine_learning.base_engine import BaseEngine, LABELS
+from app.machine_learning import data_loader
+from app.machine_learning.data_loader import batch_encodings
+
+
+# comment at position i is i + 1 tokens of id i + 1, lengths out of order
+INPUT_IDS = [[position + 1] * (position + 1) for position in (4, 0, 6, 2, 1, 5, 3)]
+
+
+class FirstTokenEngine(BaseEngine):
+    """Engine whose forward pass returns the first token id of each row as probabilities."""
+
+    def __init__(self) -> None:
+        super().__init__(batch_size=3)
+        self.shapes = []
+
+    def _run_batch(self, ids, mask, token_type_ids):
+        self.shapes.append(ids.shape)
+        return np.repeat(ids[:, :1].astype(np.float32), len(LABELS), axis=1)
+
+
+def test_batches_hold_comments_of_similar_length_padded_to_their_longest():
+    batches = list(batch_encodings(INPUT_IDS, batch_size=3))
+
+    assert [batch["ids"].shape for batch in batches] == [(3, 3), (3, 6), (1, 7)]
+
+    for batch in batches:
+        lengths = [len(INPUT_IDS[position]) for position in batch["index"]]
+        assert lengths == sorted(lengths)
+        assert batch["mask"].sum(axis=1).tolist() == lengths
+        assert not batch["ids"][batch["mask"] == 0].any()
+        assert not batch["token_type_ids"].any()
+
+    assert sorted(np.concatenate([batch["index"] for batch in batches]).tolist()) == list(range(len(INPUT_IDS)))
+
+
+def test_equal_lengths_keep_their_order():
+    index = next(batch_encodings([[1, 2], [3], [4, 5], [6]], batch_size=4))["index"]
+
+    assert index.tolist() == [1, 3, 0, 2]
+
+
+def test_predictions_come_back_in_input_order():
+    engine = FirstTokenEngine()
+
+    probs = engine.run_encoded(INPUT_IDS)
+
+    assert probs[:, 0].tolist() == [ids[0] for ids in INPUT_IDS]
+    assert engine.shapes == [(3, 3), (3, 6), (1, 7)]
+
+
+def test_fast_tokenizer_matches_the_reference_tokenizer(monkeypatch):
+    from transformers import BertTokenizer
+
+    monkeypatch.setattr(data_loader, "tokenizer", None)
+    monkeypatch.setattr(data_loader, "TOKENIZE_CHUNK", 2)
+    data_loader.load_tokeninzer()
+
+    comments = ["Nice  VIDEO!!", "  spaced\tout\ncomment ", "Café naïve 🤬 you're an idiot", "", "word " * 300, 42]
+    reference = BertTokenizer.from_pretrained(str(data_loader.PRETRAINED_DIR))
+
+    expected = [reference(str(comment), truncation=True, max_length=data_loader.MAX_LEN)["input_ids"] for comment in comments]
+
+    assert data_loader.encode_comments(comments) == expected
+    assert len(expected[4]) == data_loader.MAX_LEN
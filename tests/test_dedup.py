@@ -0,0 +1,70 @@
+from app.machine_learning.dedup import DuplicateIndex, shingles
+
+RAID = "Check out my channel for free giveaways, link in bio!!"
+
+
+def test_short_texts_hash_to_a_single_shingle():
+    assert len(shingles("hey")) == 1
+    assert len(shingles("abcdefg", size=5)) == 3
+
+
+def test_exact_duplicates_share_a_representative():
+    index = DuplicateIndex()
+
+    assert index.add(["a", "b", "c"], ["Nice video", "nice   VIDEO", "Thanks"]) == ["a", "a", "c"]
+    assert index.members["a"] == ["a", "b"]
+
+
+def test_near_duplicates_are_clustered_and_unrelated_comments_are_not():
+    index = DuplicateIndex()
+
+    representatives = index.add(
+        ["a", "b", "c"],
+        [RAID, RAID.replace("!!", "!!!"), "I learned a lot about compilers from this lecture, thank you."],
+    )
+
+    assert representatives == ["a", "a", "c"]
+    assert index.clusters() == [{"id": "a", "comment_text": index.texts["a"], "size": 2, "member_ids": ["a", "b"]}]
+
+
+def test_short_comments_are_only_collapsed_with_exact_copies():
+    index = DuplicateIndex()
+
+    assert index.add(["a", "b"], ["you are great", "you are late"]) == ["a", "b"]
+
+
+def test_adding_a_known_comment_returns_its_cluster():
+    index = DuplicateIndex()
+    index.add(["a", "b"], [RAID, RAID])
+
+    assert index.add(["b"], ["anything"]) == ["a"]
+    assert index.members["a"] == ["a", "b"]
+
+
+def test_discarded_representative_hands_cluster_to_next_member():
+    index = DuplicateIndex()
+    index.add(["a", "b", "c"], [RAID, RAID, RAID + " :)"])
+
+    index.discard(["a"])
+
+    assert index.representative == {"b": "b", "c": "b"}
+    assert index.members == {"b": ["b", "c"]}
+    assert index.add(["d"], [RAID]) == ["b"]
+
+
+def test_discarding_last_member_clears_the_cluster():
+    index = DuplicateIndex()
+    index.add(["a"], [RAID])
+
+    index.discard(["a", "unknown"])
+
+    assert not (index.representative or index.members or index.exact or index.buckets or index.signatures)
+    assert index.add(["b"], [RAID]) == ["b"]
+
+
+def test_candidates_are_confirmed_with_exact_similarity():
+    index = DuplicateIndex()
+
+    assert index.add(
+        ["a", "b"], ["you are such a wonderful person, thank you", "you are such a worthless person, thank you"]
+    ) == ["a", "b"]
@@ -0,0 +1,32 @@
+from benchmarks import inference
+
+
+def result(comments_per_s, p99_ms, batch_size=8):
+    config = {"distribution": "mixed", "batch_size": batch_size, "max_len": 200, "threads": 1, "backend": "torch", "precision": "fp32"}
+    return {**config, "comments_per_s": comments_per_s, "p50_ms": 10.0, "p99_ms": p99_ms, "peak_rss_mb": 500.0}
+
+
+def test_corpus_is_reproducible_and_follows_its_distribution():
+    corpus = inference.make_corpus("short", 200, seed=3)
+
+    assert corpus == inference.make_corpus("short", 200, seed=3)
+    assert corpus != inference.make_corpus("short", 200, seed=4)
+    assert max(len(comment.split()) for comment in corpus) <= 30
+    assert min(len(comment.split()) for comment in inference.make_corpus("long", 50)) >= 150
+
+
+def test_compare_flags_only_changes_beyond_tolerance_in_the_worse_direction():
+    baseline = [result(1000.0, 50.0), result(1000.0, 50.0, batch_size=32)]
+    current = [
+        # slower throughput and higher latency, beyond 10%
+        result(850.0, 60.0),
+        # faster and within tolerance, not flagged
+        result(1200.0, 54.0, batch_size=32),
+        # no baseline for this configuration
+        result(1.0, 1000.0, batch_size=64),
+    ]
+
+    regressions = inference.compare(current, baseline, 0.1)
+
+    assert [(regression["config"]["batch_size"], regression["metric"]) for regression in regressions] == [(8, "comments_per_s"), (8, "p99_ms")]
+    assert regressions[0]["baseline"] == 1000.0 and regressions[0]["current"] == 850.0
@@ -0,0 +1,74 @@
+import asyncio
+
+import pandas as pd
+import pytest
+
+from app.machine_learning import make_predictions
+
+
+class FakePredictAsync:
+    """Classifies a page after a delay given by its first comment, recording how many pages were in flight."""
+
+    def __init__(self) -> None:
+        self.running = 0
+        self.most_running = 0
+        self.cancelled = 0
+
+    async def __call__(self, page):
+        self.running += 1
+        self.most_running = max(self.most_running, self.running)
+        try:
+            await asyncio.sleep(page["delay"].iloc[0])
+            return page["id"].tolist()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.running -= 1
+
+
+async def download(delays, fail_after=None):
+    for index, delay in enumerate(delays):
+        if index == fail_after:
+            raise ConnectionError("download failed")
+
+        yield pd.DataFrame({"id": [f"page {index}"], "delay": [delay]})
+        await asyncio.sleep(0.01)
+
+
+def collect(pages, **kwargs):
+    async def run():
+        return [result async for result in make_predictions.predict_iter(pages, **kwargs)]
+
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def predict_async(monkeypatch):
+    fake = FakePredictAsync()
+    monkeypatch.setattr(make_predictions, "predict_async", fake)
+    return fake
+
+
+def test_pages_come_back_in_order_while_later_pages_download(predict_async):
+    # later pages finish first
+    results = collect(download([0.2, 0.1, 0.0]))
+
+    assert results == [["page 0"], ["page 1"], ["page 2"]]
+    # every page was fetched while the first one was still being classified
+    assert predict_async.most_running == 3
+
+
+def test_pages_in_flight_are_bounded(predict_async):
+    results = collect(download([0.05] * 6), max_in_flight=2)
+
+    assert len(results) == 6
+    assert predict_async.most_running == 2
+
+
+def test_failed_download_cancels_pages_in_flight(predict_async):
+    with pytest.raises(ConnectionError):
+        collect(download([1.0, 1.0, 1.0], fail_after=2))
+
+    assert predict_async.cancelled == 2
+    assert predict_async.running == 0
@@ -0,0 +1,49 @@
+import pytest
+
+from app.library import metrics
+from app.library.metrics import Counter, Gauge, Histogram, escapeLabelValue
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = metrics.Registry()
+    monkeypatch.setattr(metrics, "registry", registry)
+    return registry
+
+
+def test_label_values_are_escaped():
+    assert escapeLabelValue('say "hi"\\\nbye') == 'say \\"hi\\"\\\\\\nbye'
+
+
+def test_counter_renders_escaped_labels(registry):
+    counter = Counter("test_requests_total", "Requests.", ("endpoint",))
+    counter.inc(endpoint='comments/"x"\n')
+    counter.inc(2, endpoint='comments/"x"\n')
+
+    assert 'test_requests_total{endpoint="comments/\\"x\\"\\n"} 3' in registry.render().splitlines()
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    histogram = Histogram("test_seconds", "Durations.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+
+    lines = registry.render().splitlines()
+
+    assert 'test_seconds_bucket{le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{le="+Inf"} 3' in lines
+    assert "test_seconds_count 3" in lines
+
+
+def test_snapshots_of_workers_are_merged(registry):
+    counter = Counter("test_batches_total", "Batches.")
+    gauge = Gauge("test_remaining", "Remaining.")
+    counter.inc()
+    gauge.set(5)
+
+    snapshot = registry.snapshot()
+    registry.merge(snapshot)
+
+    assert counter.values == {(): 2}
+    assert gauge.values == {(): 5}
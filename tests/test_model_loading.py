@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+import pandas as pd
+import pytest
+
+from app import main
+from app.machine_learning import make_predictions
+
+
+@pytest.fixture
+def failed_load(monkeypatch):
+    error = OSError("weights missing")
+    monkeypatch.setattr(make_predictions, "model_loaded", type(make_predictions.model_loaded)())
+    monkeypatch.setattr(make_predictions, "model_load_error", None)
+
+    make_predictions.set_load_error(error)
+
+    return error
+
+
+def test_predict_async_fails_right_away_after_a_failed_load(failed_load):
+    start = time.perf_counter()
+
+    with pytest.raises(RuntimeError) as raised:
+        asyncio.run(make_predictions.predict_async(pd.DataFrame({"id": ["a"], "comment_text": ["hi"]})))
+
+    assert raised.value.__cause__ is failed_load
+    assert time.perf_counter() - start < 1
+
+
+def finished_task() -> asyncio.Task:
+    async def run():
+        task = asyncio.ensure_future(asyncio.sleep(0))
+        await task
+        return task
+
+    return asyncio.run(run())
+
+
+def test_health_reports_a_failed_load(monkeypatch):
+    monkeypatch.setattr(main.app.state, "warmup_task", finished_task(), raising=False)
+    monkeypatch.setattr(main.app.state, "model_error", OSError("weights missing"), raising=False)
+
+    response = main.health()
+
+    assert response.status_code == 503
+    assert b'"status":"error"' in response.body
+
+
+def test_health_is_ok_once_loaded(monkeypatch):
+    monkeypatch.setattr(main.app.state, "warmup_task", finished_task(), raising=False)
+    monkeypatch.setattr(main.app.state, "model_error", None, raising=False)
+
+    assert main.health()["status"] == "ok"
+    assert main.health()["model_loaded"] is True
+
+
+def test_failed_worker_start_is_reported(monkeypatch, failed_load):
+    def failing_start():
+        raise RuntimeError("no forkserver")
+
+    monkeypatch.setattr(main, "load_ml_stack", lambda: None)
+    monkeypatch.setattr(main.ml, "start_worker_pool", failing_start)
+    monkeypatch.setattr(main.ml, "start_scheduler", lambda: None)
+    monkeypatch.setattr(main.app.state, "model_error", None, raising=False)
+
+    asyncio.run(main.warm_up_model())
+
+    monkeypatch.setattr(main.app.state, "warmup_task", finished_task(), raising=False)
+    assert main.health().status_code == 503
+    assert isinstance(make_predictions.model_load_error, RuntimeError)
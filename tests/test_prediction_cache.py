@@ -0,0 +1,72 @@
+import numpy as np
+
+from app.machine_learning.base_engine import LABELS
+from app.machine_learning.prediction_cache import PredictionCache
+
+
+def rows(*values):
+    return np.array([[value] * len(LABELS) for value in values], dtype=np.float32)
+
+
+def test_memory_tier_hits_and_evicts_least_recently_used():
+    cache = PredictionCache("v1", memory_items=2)
+    first, second, third = (cache.key(text) for text in ("first", "second", "third"))
+
+    cache.store([first, second], rows(0.1, 0.2))
+    cache.lookup([first])
+    cache.store([third], rows(0.3))
+
+    probs, misses = cache.lookup([first, second, third])
+
+    assert misses == [1]
+    assert np.allclose(probs[[0, 2], 0], [0.1, 0.3])
+    assert cache.stats() == {"hits": 3, "misses": 1, "memory_entries": 2}
+
+
+def test_copies_of_a_missed_comment_all_miss():
+    cache = PredictionCache("v1")
+
+    probs, misses = cache.lookup([cache.key("Spam  Spam"), cache.key("spam spam"), cache.key("other")])
+
+    assert misses == [0, 1, 2]
+    assert not probs.any()
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    PredictionCache("v1", str(tmp_path / "cache.db")).store([b"key"], rows(0.4))
+
+    cache = PredictionCache("v1", str(tmp_path / "cache.db"))
+    probs, misses = cache.lookup([b"key"])
+
+    assert misses == []
+    assert np.allclose(probs, 0.4)
+    assert cache.stats()["memory_entries"] == 1
+
+
+def test_disk_tier_is_evicted_below_its_byte_limit(tmp_path):
+    cache = PredictionCache("v1", str(tmp_path / "cache.db"), memory_items=1, disk_bytes=64 * 1024)
+    keys = [cache.key(f"comment {index}") for index in range(5000)]
+
+    for start in range(0, len(keys), 500):
+        cache.store(keys[start:start + 500], rows(*[0.5] * 500))
+
+    db = cache.db
+    used_pages = db.execute("PRAGMA page_count").fetchone()[0] - db.execute("PRAGMA freelist_count").fetchone()[0]
+    stored = db.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+    assert used_pages * db.execute("PRAGMA page_size").fetchone()[0] <= 2 * cache.disk_bytes
+    assert 0 < stored < len(keys)
+
+    # the latest entries are kept, the oldest are dropped
+    assert cache.lookup(keys[-1:])[1] == []
+    assert cache.lookup(keys[:1])[1] == [0]
+
+
+def test_other_model_version_misses(tmp_path):
+    old = PredictionCache("v1", str(tmp_path / "cache.db"))
+    old.store([old.key("nice video")], rows(0.9))
+
+    new = PredictionCache("v2", str(tmp_path / "cache.db"))
+
+    assert new.key("nice video") != old.key("nice video")
+    assert new.lookup([new.key("nice video")])[1] == [0]
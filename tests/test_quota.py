@@ -0,0 +1,77 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.exceptions import QuotaExceededError
+from app.library import quota
+from app.library.quota import BACKGROUND, INTERACTIVE, QuotaScheduler
+
+
+def test_background_calls_leave_the_reserve_to_interactive_ones():
+    scheduler = QuotaScheduler(10, 0.2, 1000, 100)
+
+    for _ in range(8):
+        asyncio.run(scheduler.acquire("videos", BACKGROUND))
+
+    with pytest.raises(QuotaExceededError):
+        asyncio.run(scheduler.acquire("videos", BACKGROUND))
+
+    asyncio.run(scheduler.acquire("videos", INTERACTIVE))
+    asyncio.run(scheduler.acquire("videos", INTERACTIVE))
+    assert scheduler.remaining() == 0
+
+    with pytest.raises(QuotaExceededError):
+        asyncio.run(scheduler.acquire("videos", INTERACTIVE))
+
+
+def test_costly_endpoints_are_charged_their_units():
+    scheduler = QuotaScheduler(120, 0, 1000, 100)
+
+    asyncio.run(scheduler.acquire("search"))
+    assert scheduler.remaining() == 20
+
+    with pytest.raises(QuotaExceededError):
+        asyncio.run(scheduler.acquire("comments/setModerationStatus"))
+
+
+def test_exhausted_budget_resets_on_the_next_quota_day(monkeypatch):
+    scheduler = QuotaScheduler(10, 0, 1000, 100)
+    scheduler.exhaust()
+
+    assert scheduler.remaining() == 0
+
+    monkeypatch.setattr(quota, "quotaDay", lambda: scheduler.day.replace(year=scheduler.day.year + 1))
+    assert scheduler.remaining() == 10
+
+
+def test_interactive_calls_get_tokens_before_waiting_background_ones():
+    scheduler = QuotaScheduler(1000, 0, 50, 1)
+    order = []
+
+    async def call(name, priority):
+        await scheduler.acquire("videos", priority)
+        order.append(name)
+
+    async def main():
+        await call("first", INTERACTIVE)
+        background = asyncio.ensure_future(call("background", BACKGROUND))
+        await asyncio.sleep(0)
+        await asyncio.gather(call("interactive", INTERACTIVE), call("interactive", INTERACTIVE), background)
+
+    asyncio.run(main())
+
+    assert order == ["first", "interactive", "interactive", "background"]
+
+
+@pytest.mark.parametrize("name, value", [
+    ("YOUTUBE_REQUESTS_PER_SECOND", "0"), ("YOUTUBE_QUOTA_RESERVE", "1.5"), ("YOUTUBE_REQUEST_BURST", "0")
+])
+def test_invalid_quota_settings_are_refused(name, value):
+    result = subprocess.run(
+        [sys.executable, "-c", "import app.config"], env={**os.environ, name: value}, capture_output=True, text=True
+    )
+
+    assert result.returncode != 0 and "YouTube quota settings" in result.stderr
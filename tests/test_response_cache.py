@@ -0,0 +1,65 @@
+import asyncio
+
+import httpx
+
+from app.library import response_cache, youtube
+from app.library.quota import QuotaScheduler
+from app.library.response_cache import ResponseCache
+
+
+def test_keys_differ_per_account_and_ignore_parameter_order():
+    key = ResponseCache.key("channels", {"mine": "true", "part": "snippet"}, {"refresh_token": "a", "access_token": "x"})
+
+    assert key == ResponseCache.key("channels", {"part": "snippet", "mine": "true"}, {"refresh_token": "a", "access_token": "y"})
+    assert key != ResponseCache.key("channels", {"mine": "true", "part": "snippet"}, {"refresh_token": "b"})
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ResponseCache(10, 60)
+    cache.put("a", b"aaaa", {}, '"a"')
+    cache.put("b", b"bbbb", {}, '"b"')
+    cache.get("a")
+    cache.put("c", b"cccc", {}, '"c"')
+
+    assert list(cache.responses) == ["a", "c"]
+    assert cache.size == 8
+
+    cache.put("huge", b"x" * 11, {}, '"x"')
+    assert cache.get("huge") is None
+
+
+def test_entries_expire_unless_revalidated(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(response_cache.time, "monotonic", lambda: now[0])
+    cache = ResponseCache(1024, 10)
+
+    cache.put("a", b"body", {}, '"a"')
+    now[0] = 109.0
+    cache.put("a", b"body", {}, '"a"')
+    now[0] = 115.0
+    assert cache.get("a").content == b"body"
+
+    now[0] = 120.0
+    assert cache.get("a") is None and cache.size == 0
+
+
+def test_not_modified_reads_are_answered_from_the_cache(monkeypatch):
+    requests = []
+
+    def handler(request):
+        requests.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"etag": '"v1"'})
+        return httpx.Response(200, json={"items": [1]}, headers={"etag": '"v1"'})
+
+    monkeypatch.setattr(youtube, "response_cache", ResponseCache(1024, 60))
+    monkeypatch.setattr(youtube, "quota_scheduler", QuotaScheduler(100, 0, 100, 100))
+
+    async def read_twice():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return [await youtube.requestApi(client, "GET", "videos", {"access_token": "t"}, {"id": "a"}) for _ in range(2)]
+
+    first, second = asyncio.run(read_twice())
+
+    assert requests == [None, '"v1"']
+    assert second.status_code == 200 and second.json() == first.json() == {"items": [1]}
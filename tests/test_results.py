@@ -0,0 +1,53 @@
+import numpy as np
+
+from app.machine_learning.base_engine import LABELS
+from app.machine_learning.results import PredictionResult
+
+
+def make_result(ids, toxic_rows, thresholds=0.5):
+    probs = np.zeros((len(ids), len(LABELS)), dtype=np.float32)
+    for row, labels in toxic_rows.items():
+        for label in labels:
+            probs[row, LABELS.index(label)] = 0.9
+
+    return PredictionResult(ids, probs, thresholds)
+
+
+def test_labels_are_packed_per_class():
+    result = make_result(["a", "b", "c"], {0: ["Toxic", "Insult"], 2: ["Identity Hate"]})
+
+    assert result.labels.tolist() == [0b010001, 0, 0b100000]
+    assert result.class_mask("Insult").tolist() == [True, False, False]
+    assert result.toxic_ids() == ["a", "c"]
+    assert result.class_counts() == {"Toxic": 1, "Severe Toxic": 0, "Obscene": 0, "Threat": 0, "Insult": 1, "Identity Hate": 1}
+
+
+def test_per_class_thresholds():
+    probs = np.full((1, len(LABELS)), 0.6, dtype=np.float32)
+    result = PredictionResult(["a"], probs, [0.7, 0.5, 0.7, 0.7, 0.7, 0.7])
+
+    assert result.class_counts()["Severe Toxic"] == 1
+    assert sum(result.class_counts().values()) == 1
+
+
+def test_concat_keeps_thresholds_of_first_non_empty_result():
+    thresholds = [0.95] * len(LABELS)
+    merged = PredictionResult.concat([PredictionResult.empty_result(), make_result(["a"], {0: ["Toxic"]}, thresholds)])
+
+    assert merged.thresholds.tolist() == np.float32(thresholds).tolist()
+    assert merged.toxic_ids() == []
+
+
+def test_reindex_skips_unknown_ids_and_keeps_first_duplicate():
+    result = PredictionResult.concat([make_result(["a", "b"], {0: ["Toxic"]}), make_result(["a"], {})])
+    reindexed = result.reindex(["b", "missing", "a"])
+
+    assert reindexed.ids.tolist() == ["b", "a"]
+    assert reindexed.toxic_ids() == ["a"]
+
+
+def test_to_frame_has_one_column_per_class():
+    frame = make_result(["a"], {0: ["Threat"]}).to_frame()
+
+    assert frame.columns.tolist() == ["id"] + LABELS
+    assert frame.loc[0, "Threat"] == 1
@@ -0,0 +1,132 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.exceptions import AccessTokenExpiredError
+from app.library import video_analysis
+from app.library.video_analysis import VideoAnalysis
+from app.machine_learning.base_engine import LABELS
+from app.machine_learning.results import PredictionResult
+
+
+async def fake_predict_iter(pages):
+    async for page in pages:
+        yield PredictionResult(page["id"].to_numpy(dtype=object), np.zeros((len(page), len(LABELS)), dtype=np.float32))
+
+
+async def fetch(pages, error=None):
+    for page in pages:
+        yield page
+    if error is not None:
+        raise error
+
+
+@pytest.fixture(autouse=True)
+def no_model(monkeypatch):
+    monkeypatch.setattr(video_analysis, "predict_iter", fake_predict_iter)
+
+
+def test_failed_fetch_rolls_back_clusters_of_unmerged_comments():
+    analysis = VideoAnalysis()
+    asyncio.run(analysis.streamComments(fetch([{"id": ["a"], "comment_text": ["first comment"]}])))
+
+    analysis.refreshComments()
+    pages = [{"id": ["a", "b"], "comment_text": ["first comment", "second comment"]}]
+    with pytest.raises(AccessTokenExpiredError):
+        asyncio.run(analysis.streamComments(fetch(pages, AccessTokenExpiredError())))
+
+    assert set(analysis.duplicates.representative) == {"a"}
+    assert set(analysis.word_frequencies.comment_words) == {"a"}
+
+    # the next refresh classifies the rolled back comment instead of failing on its missing representative
+    analysis.refreshComments()
+    asyncio.run(analysis.streamComments(fetch(pages)))
+
+    assert analysis.predictions.ids.tolist() == ["a", "b"]
+
+
+OPPOSITES = [
+    ("you are such a wonderful person, thank you", "you are such a worthless person, thank you"),
+    ("I really love the way you explain these topics", "I really hate the way you explain these topics"),
+    ("honestly the best video on the channel so far", "honestly the worst video on the channel so far"),
+    # long enough for one changed word to stay above the clustering threshold
+    (
+        "I have been watching this channel for years and every single upload teaches me something new about "
+        "compilers, type systems and the history of programming languages, you are wonderful, keep going",
+        "I have been watching this channel for years and every single upload teaches me something new about "
+        "compilers, type systems and the history of programming languages, you are worthless, keep going",
+    ),
+]
+
+
+async def scoring_predict_iter(pages):
+    """Scores comments containing a hostile word as toxic, whatever their cluster."""
+
+    async for page in pages:
+        probs = np.zeros((len(page), len(LABELS)), dtype=np.float32)
+        probs[:, 0] = page["comment_text"].str.contains("worthless|hate|worst").to_numpy(dtype=np.float32)
+        yield PredictionResult(page["id"].to_numpy(dtype=object), probs)
+
+
+def test_opposite_meaning_near_duplicates_keep_their_own_predictions(monkeypatch):
+    monkeypatch.setattr(video_analysis, "predict_iter", scoring_predict_iter)
+    analysis = VideoAnalysis()
+
+    ids = [f"{side}{pair}" for pair in range(len(OPPOSITES)) for side in ("clean", "toxic")]
+    texts = [text for pair in OPPOSITES for text in pair]
+    asyncio.run(analysis.streamComments(fetch([{"id": ids, "comment_text": texts}])))
+
+    assert analysis.getClusterIds("clean3") == ["clean3", "toxic3"]
+    assert sorted(analysis.getToxicIds()) == [f"toxic{pair}" for pair in range(len(OPPOSITES))]
+
+
+def test_copies_are_classified_once(monkeypatch):
+    classified = []
+
+    async def counting_predict_iter(pages):
+        async for page in fake_predict_iter(pages):
+            classified.extend(page.ids)
+            yield page
+
+    monkeypatch.setattr(video_analysis, "predict_iter", counting_predict_iter)
+    analysis = VideoAnalysis()
+
+    asyncio.run(analysis.streamComments(fetch([{"id": ["a", "b"], "comment_text": ["Nice video", "nice   VIDEO"]}])))
+    analysis.refreshComments()
+    asyncio.run(analysis.streamComments(fetch([{"id": ["a", "b", "c"], "comment_text": ["Nice video", "nice   VIDEO", "NICE video"]}])))
+
+    assert classified == ["a"]
+    assert analysis.predictions.ids.tolist() == ["a", "b", "c"]
+
+
+def test_pages_are_concatenated_once_on_read():
+    analysis = VideoAnalysis()
+    analysis.appendComments({"id": ["a", "b"], "comment_text": ["first", "second"]})
+    analysis.appendComments(pd.DataFrame({"id": ["c"], "comment_text": ["third"]}))
+
+    assert len(analysis._id_chunks) == 2
+    assert analysis.comment_ids.tolist() == ["a", "b", "c"]
+    assert len(analysis._id_chunks) == 1
+    assert analysis.comment_texts is analysis.comment_texts
+
+    frame = analysis.comments_df
+    assert frame is analysis.comments_df
+    assert frame["comment_text"].tolist() == ["first", "second", "third"]
+
+    # a new page invalidates the frame, reading keeps fetch order
+    analysis.appendComments({"id": ["d"], "comment_text": ["fourth"]})
+    assert analysis.comments_df is not frame
+    assert analysis.getComments()[-1] == {"id": "d", "comment_text": "fourth"}
+    assert analysis.comments_df["id"].tolist() == ["a", "b", "c", "d"]
+
+
+def test_refreshed_analysis_reads_as_empty():
+    analysis = VideoAnalysis()
+    analysis.appendComments({"id": ["a"], "comment_text": ["first"]})
+    analysis.refreshComments()
+
+    assert analysis.comment_ids.tolist() == []
+    assert analysis.comments_df.empty
+    assert analysis.getComments() == []
@@ -0,0 +1,94 @@
+import asyncio
+
+from fastapi import APIRouter
+from starlette.requests import Request
+
+from app.exceptions import YouTubeApiError
+from app.views import video_analysis as views
+from app.views.home import home_view
+
+# routes url_for resolves in the views
+home_router = APIRouter()
+home_router.include_router(home_view, prefix="/home")
+home_router.include_router(views.analysis_view)
+
+
+def test_stored_analyses_are_kept_per_channel():
+    views.analysis_store.clear()
+
+    first = views.getStoredAnalysis("channel-a", "video")
+    other_channel = views.getStoredAnalysis("channel-b", "video")
+
+    assert first is not other_channel
+    assert views.getStoredAnalysis("channel-a", "video") is first
+
+
+def test_least_recently_used_analyses_are_dropped(monkeypatch):
+    monkeypatch.setattr(views, "MAX_STORED_ANALYSES", 2)
+    views.analysis_store.clear()
+
+    views.getStoredAnalysis("channel", "first")
+    views.getStoredAnalysis("channel", "second")
+    views.getStoredAnalysis("channel", "first")
+    views.getStoredAnalysis("channel", "third")
+
+    assert list(views.analysis_store) == [("channel", "first"), ("channel", "third")]
+
+
+def reject_cluster(session, video_id, comment_ids):
+    request = Request({"type": "http", "session": session})
+    return asyncio.run(views.reject_cluster(request, video_id, comment_ids))
+
+
+def test_reject_cluster_of_foreign_video_or_without_ids_is_not_found(monkeypatch):
+    rejected = []
+
+    async def reject(credentials, ids):
+        rejected.extend(ids)
+
+    monkeypatch.setattr(views, "rejectComments", reject)
+    session = {"channel_data": {"channel_details": {"id": "channel"}, "video_data": {"video": {}}}, "credentials": {}}
+
+    assert reject_cluster(session, "foreign", ["a"]).status_code == 404
+    assert reject_cluster(session, "video", []).status_code == 404
+    assert rejected == []
+
+
+def test_reject_cluster_needs_no_stored_analysis(monkeypatch):
+    rejected = []
+
+    async def reject(credentials, ids):
+        rejected.extend(ids)
+
+    monkeypatch.setattr(views, "rejectComments", reject)
+    views.analysis_store.clear()
+    session = {"channel_data": {"channel_details": {"id": "channel"}, "video_data": {"video": {}}}, "credentials": {}}
+
+    assert reject_cluster(session, "video", ["a", "b"])["status"] == "success"
+    assert rejected == ["a", "b"] and session["deleted_ids"] == ["a", "b"]
+
+
+def test_youtube_errors_are_reported_instead_of_raised(monkeypatch):
+    async def unavailable(credentials, ids):
+        raise YouTubeApiError(503, "backend error")
+
+    monkeypatch.setattr(views, "rejectComments", unavailable)
+    session = {"channel_data": {"channel_details": {"id": "channel"}, "video_data": {"video": {}}}, "credentials": {}}
+
+    assert reject_cluster(session, "video", ["a"])["status"] == "error"
+    assert "deleted_ids" not in session
+
+
+def test_videos_missing_from_the_displayed_page_redirect_home():
+    session = {"channel_data": {"channel_details": {"id": "channel"}, "video_data": {"video": {}}}, "credentials": {}}
+
+    def request(video_id):
+        scope = {
+            "type": "http", "scheme": "http", "server": ("testserver", 80), "path": f"/{video_id}", "query_string": b"",
+            "headers": [], "session": session, "router": home_router,
+        }
+        return Request(scope)
+
+    for view in (views.video_analysis, views.reject_comments):
+        response = asyncio.run(view(request("other"), "other"))
+        assert response.status_code == 307 and response.headers["location"] == "http://testserver/home"
@@ -0,0 +1,46 @@
+import pytest
+import torch
+
+from app.machine_learning import weights
+from app.machine_learning.weights import convert_weights, load_weights, remap_keys
+
+
+def test_remap_keys_renames_bert_and_classifier():
+    state_dict = {"bert.encoder.weight": 1, "classifier.bias": 2, "other": 3}
+
+    assert remap_keys(state_dict) == {"l1.encoder.weight": 1, "l3.bias": 2, "other": 3}
+
+
+def test_converted_weights_load_unchanged(tmp_path):
+    checkpoint = {
+        "bert.embeddings.weight": torch.randn(4, 3),
+        "classifier.weight": torch.randn(3, 4).t(),
+        "classifier.bias": torch.arange(3, dtype=torch.int64),
+        "bert.empty": torch.empty(0),
+    }
+    torch.save(checkpoint, tmp_path / "model.pth")
+
+    target = convert_weights(str(tmp_path / "model.pth"), str(tmp_path / "model.safetensors"))
+    state_dict = load_weights(target)
+
+    assert set(state_dict) == {"l1.embeddings.weight", "l3.weight", "l3.bias", "l1.empty"}
+    assert torch.equal(state_dict["l3.weight"], checkpoint["classifier.weight"])
+    assert state_dict["l3.bias"].dtype == torch.int64
+    assert state_dict["l1.empty"].shape == (0,)
+
+
+def test_failed_conversion_leaves_the_previous_file(tmp_path, monkeypatch):
+    torch.save({"classifier.bias": torch.zeros(3)}, tmp_path / "model.pth")
+    target = convert_weights(str(tmp_path / "model.pth"), str(tmp_path / "model.safetensors"))
+
+    def interrupted_save(tensors, path):
+        with open(path, "wb") as file:
+            file.write(b"half")
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(weights, "save_file", interrupted_save)
+    with pytest.raises(KeyboardInterrupt):
+        convert_weights(str(tmp_path / "model.pth"), target)
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["model.pth", "model.safetensors"]
+    assert torch.equal(load_weights(target)["l3.bias"], torch.zeros(3))
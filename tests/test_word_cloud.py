@@ -0,0 +1,45 @@
+from collections import Counter
+
+from wordcloud import STOPWORDS, WordCloud
+
+from app.library.word_cloud import WordFrequencies, foldWords, frequencyHash
+
+COMMENTS = ["Great video, great VIDEOS!", "Videos are great", "the video's ending", "Great class classes 2024", "cats cat Cats dogs"]
+
+
+def test_frequencies_match_wordcloud_process_text():
+    frequencies = WordFrequencies()
+    frequencies.addComments(range(len(COMMENTS)), COMMENTS)
+
+    expected = WordCloud(stopwords=STOPWORDS, collocations=False).process_text(" ".join(COMMENTS))
+
+    assert frequencies.topWords() == expected
+
+
+def test_plurals_merge_only_when_singular_occurs():
+    assert foldWords(Counter({"videos": 2, "video": 1, "dogs": 1, "class": 1, "classes": 1})) == {
+        "video": 3, "dogs": 1, "class": 1, "classes": 1
+    }
+
+
+def test_case_variants_count_under_most_frequent_spelling():
+    assert foldWords(Counter({"Great": 1, "great": 2, "GREAT": 1})) == {"great": 4}
+    assert foldWords(Counter({"Great": 1, "great": 1})) == {"Great": 2}
+
+
+def test_removed_comments_are_subtracted():
+    frequencies = WordFrequencies()
+    frequencies.addComments(["a", "b"], ["Nice video", "nice videos"])
+    frequencies.addComments(["a"], ["counted once per comment id"])
+
+    frequencies.removeComments(["b", "unknown"])
+
+    assert frequencies.topWords() == {"Nice": 1, "video": 1}
+
+
+def test_top_words_break_ties_alphabetically():
+    frequencies = WordFrequencies()
+    frequencies.addComments(["a"], ["zebra apple mango apple"])
+
+    assert list(frequencies.topWords(max_words=2)) == ["apple", "mango"]
+    assert frequencyHash({"apple": 2}, 10, 10, "png") != frequencyHash({"apple": 2}, 10, 10, "svg")
@@ -0,0 +1,128 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.exceptions import AccessTokenExpiredError, QuotaExceededError, YouTubeApiError
+from app.library import youtube
+from app.library.quota import BACKGROUND, QuotaScheduler
+from app.library.response_cache import ResponseCache
+
+
+def serve(monkeypatch, handler):
+    """Routes api calls of the module to handler through a mock transport, without quota pacing or cached responses."""
+
+    monkeypatch.setattr(youtube, "client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(youtube, "quota_scheduler", QuotaScheduler(10**6, 0, 10**6, 10**6))
+    monkeypatch.setattr(youtube, "response_cache", ResponseCache(1024 * 1024, 60))
+    monkeypatch.setattr(youtube, "KEY", "secret")
+    monkeypatch.setattr(youtube, "CLIENT_ID", "client")
+
+
+@pytest.mark.parametrize("status, error", [(500, YouTubeApiError), (400, YouTubeApiError), (429, QuotaExceededError), (401, AccessTokenExpiredError)])
+def test_error_statuses_raise(monkeypatch, status, error):
+    serve(monkeypatch, lambda request: httpx.Response(status, json={}))
+
+    with pytest.raises(error):
+        asyncio.run(youtube.fetchChannelData({"access_token": "token"}))
+
+
+def test_only_batches_failed_with_expired_token_are_retried(monkeypatch):
+    sent = []
+
+    def handler(request):
+        if request.url.host == "oauth2.googleapis.com":
+            return httpx.Response(200, json={"access_token": "fresh"})
+
+        ids = request.url.params["id"]
+        sent.append((request.headers["authorization"], ids))
+        expired = request.headers["authorization"] == "Bearer stale" and ids.startswith("c50")
+        return httpx.Response(401 if expired else 204)
+
+    serve(monkeypatch, handler)
+    credentials = {"access_token": "stale", "refresh_token": "refresh"}
+    comment_ids = [f"c{index}" for index in range(120)]
+
+    asyncio.run(youtube.rejectComments(credentials, comment_ids))
+
+    assert credentials["access_token"] == "fresh"
+    assert sorted(ids.split(",")[0] for token, ids in sent if token == "Bearer stale") == ["c0", "c100", "c50"]
+    assert [ids.split(",")[0] for token, ids in sent if token == "Bearer fresh"] == ["c50"]
+
+
+def test_other_moderation_errors_are_not_retried(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.host)
+        return httpx.Response(503, text="backend error")
+
+    serve(monkeypatch, handler)
+
+    with pytest.raises(YouTubeApiError) as error:
+        asyncio.run(youtube.rejectComments({"access_token": "token", "refresh_token": "refresh"}, ["a", "b"]))
+
+    assert error.value.status_code == 503
+    assert calls == ["www.googleapis.com"]
+
+
+def uploads(pages, missing_playlist=False):
+    """Handler serving an uploads playlist of pages of video ids and the details of every video."""
+
+    def handler(request):
+        if request.url.path.endswith("/playlistItems"):
+            if missing_playlist:
+                return httpx.Response(404, json={})
+
+            index = int(request.url.params["pageToken"] or 0)
+            page = {"items": [{"contentDetails": {"videoId": video_id}} for video_id in pages[index]]}
+            if index + 1 < len(pages):
+                page["nextPageToken"] = str(index + 1)
+            if index:
+                page["prevPageToken"] = str(index - 1)
+            return httpx.Response(200, json=page)
+
+        snippet = {"title": "title", "description": "description", "thumbnails": {"medium": {"url": "url"}}}
+        items = [{"id": video_id, "snippet": snippet, "statistics": {"viewCount": "3"}} for video_id in request.url.params["id"].split(",")]
+        return httpx.Response(200, json={"items": items})
+
+    return handler
+
+
+def test_video_pages_are_fetched_one_at_a_time(monkeypatch):
+    serve(monkeypatch, uploads([["a", "b"], ["c"]]))
+
+    first = asyncio.run(youtube.fetchVideoPage({"access_token": "token"}, "uploads"))
+    second = asyncio.run(youtube.fetchVideoPage({"access_token": "token"}, "uploads", first["next_page_token"]))
+
+    assert list(first["video_data"]) == ["a", "b"] and first["prev_page_token"] is None
+    assert list(second["video_data"]) == ["c"] and second["prev_page_token"] == "0" and second["next_page_token"] is None
+    assert list(asyncio.run(youtube.fetchVideoData({"access_token": "token"}, "uploads"))) == ["a", "b", "c"]
+
+
+def test_missing_uploads_playlist_means_no_videos(monkeypatch):
+    serve(monkeypatch, uploads([], missing_playlist=True))
+
+    with pytest.raises(youtube.EntityNotFoundError):
+        asyncio.run(youtube.fetchVideoPage({"access_token": "token"}, "uploads"))
+
+    with pytest.raises(YouTubeApiError):
+        asyncio.run(youtube.fetchVideoPage({"access_token": "token"}, "uploads", "1"))
+
+
+def test_failed_video_lookup_is_not_an_empty_page(monkeypatch):
+    listing = uploads([["a"]])
+    serve(monkeypatch, lambda request: listing(request) if "playlistItems" in request.url.path else httpx.Response(500, json={}))
+
+    with pytest.raises(YouTubeApiError):
+        asyncio.run(youtube.fetchVideoData({"access_token": "token"}, "uploads"))
+
+
+def test_background_video_listing_leaves_the_reserve_to_interactive_calls(monkeypatch):
+    serve(monkeypatch, uploads([["a", "b"], ["c"]]))
+    monkeypatch.setattr(youtube, "quota_scheduler", QuotaScheduler(3, 0.7, 10**6, 10**6))
+
+    with pytest.raises(QuotaExceededError):
+        asyncio.run(youtube.fetchVideoData({"access_token": "token"}, "uploads", BACKGROUND))
+
+    assert list(asyncio.run(youtube.fetchVideoPage({"access_token": "token"}, "uploads"))["video_data"]) == ["a", "b"]